@@ -41,25 +41,171 @@ class ConfigManager:
             "server": {
                 "host": "0.0.0.0",
                 "port": 8000,
-                "debug": True
+                "debug": True,
+                "workers": 1
             },
             "paths": {
                 "uploads": "uploads",
                 "outputs": "outputs",
-                "models": "models"
+                "models": "models",
+                "cache": "cache",
+                "data": "data"
             },
             "asr": {
+                "enabled": True,
+                "preload": True,
                 "model_size": "small",
                 "language": "zh",
-                "model_path": "models/whisper"
+                "model_path": "models/whisper",
+                "models": {
+                    "allowed": ["tiny", "base", "small", "medium"],
+                    "memory_budget_mb": 4096
+                },
+                "long_audio": {
+                    "workers": 2,
+                    "threshold_seconds": 600,
+                    "chunk_seconds": 300,
+                    "overlap_seconds": 2,
+                    "search_seconds": 30
+                },
+                "stream": {
+                    "window_seconds": 30,
+                    "overlap_seconds": 1,
+                    "search_seconds": 5
+                }
             },
             "ocr": {
+                "enabled": True,
+                "preload": True,
                 "use_gpu": False,
                 "lang": "ch",
-                "model_path": "models/paddleocr"
+                "model_path": "models/paddleocr",
+                "profile": "balanced",
+                "profiles": {
+                    "fast": {
+                        "use_angle_cls": False,
+                        "det_limit_side_len": 736,
+                        "rec_batch_num": 32,
+                        "models": "light"
+                    },
+                    "balanced": {
+                        "use_angle_cls": True,
+                        "det_limit_side_len": 960,
+                        "rec_batch_num": 16,
+                        "models": "light"
+                    },
+                    "accurate": {
+                        "use_angle_cls": True,
+                        "det_limit_side_len": 1536,
+                        "rec_batch_num": 8,
+                        "models": "heavy"
+                    }
+                },
+                "models": {
+                    "light": {},
+                    "heavy": {
+                        "ch": {
+                            "det_model_dir": "paddleocr/ch_PP-OCRv4_det_server_infer",
+                            "rec_model_dir": "paddleocr/ch_PP-OCRv4_rec_server_infer"
+                        }
+                    }
+                },
+                "batch": {
+                    "max_images": 16
+                },
+                "engines": {
+                    "memory_budget_mb": 2048,
+                    "memory_per_engine_mb": 500,
+                    "default_instances": 1,
+                    "instances": {},
+                    "idle_minutes": 10
+                },
+                "preprocess": {
+                    "max_side": 2560,
+                    "tile_min_side": 10000,
+                    "tile_size": 2048,
+                    "tile_overlap": 256,
+                    "tile_workers": 2
+                }
             },
             "pdf": {
-                "dpi": 300
+                "enabled": True,
+                "preload": True,
+                "dpi": 300,
+                "executor": "process",
+                "process_workers": 2,
+                "shard": {
+                    "enabled": True,
+                    "threshold_pages": 100,
+                    "min_pages": 20
+                },
+                "ocr": {
+                    "auto": True,
+                    "dpi": 200,
+                    "min_text_chars": 10,
+                    "max_pending_pages": 8
+                }
+            },
+            "cache": {
+                "enabled": True,
+                "max_size_mb": 2048
+            },
+            "upload": {
+                "chunk_size_kb": 1024,
+                "max_size_mb": {
+                    "asr": 2048,
+                    "ocr": 50,
+                    "pdf": 500
+                }
+            },
+            "tasks": {
+                "db_name": "tasks.db",
+                "ttl_hours": 24,
+                "purge_interval_minutes": 10,
+                "stale_minutes": 120,
+                "events": {
+                    "recheck_seconds": 2,
+                    "heartbeat_seconds": 15
+                }
+            },
+            "scheduler": {
+                "workers": {
+                    "asr": 1,
+                    "ocr": 2,
+                    "pdf": 2
+                }
+            },
+            "admission": {
+                "enabled": True,
+                "client_header": "",
+                "retry_after_max_seconds": 300,
+                "rate_limit": {
+                    "requests_per_minute": 120,
+                    "burst": 30
+                },
+                "services": {
+                    "asr": {"max_concurrent": 4, "max_queue": 8},
+                    "ocr": {"max_concurrent": 32, "max_queue": 64},
+                    "pdf": {"max_concurrent": 8, "max_queue": 16}
+                },
+                "endpoints": {
+                    "/api/ocr/recognize/batch": {"max_concurrent": 2}
+                },
+                "batch": {
+                    "max_files": 50,
+                    "max_total_mb": 200
+                }
+            },
+            "model_server": {
+                "enabled": False,
+                "autostart": True,
+                "host": "127.0.0.1",
+                "port": 50001,
+                "authkey": None,
+                "workers": {
+                    "asr": 1,
+                    "ocr": 2
+                }
             }
         }
     
@@ -118,6 +264,36 @@ class ConfigManager:
     def pdf(self) -> Dict[str, Any]:
         """获取PDF配置"""
         return self._config.get("pdf", {})
+    
+    @property
+    def cache(self) -> Dict[str, Any]:
+        """获取结果缓存配置"""
+        return self._config.get("cache", {})
+    
+    @property
+    def upload(self) -> Dict[str, Any]:
+        """获取上传配置"""
+        return self._config.get("upload", {})
+    
+    @property
+    def tasks(self) -> Dict[str, Any]:
+        """获取任务存储配置"""
+        return self._config.get("tasks", {})
+    
+    @property
+    def scheduler(self) -> Dict[str, Any]:
+        """获取任务调度配置"""
+        return self._config.get("scheduler", {})
+    
+    @property
+    def admission(self) -> Dict[str, Any]:
+        """获取准入控制配置"""
+        return self._config.get("admission", {})
+    
+    @property
+    def model_server(self) -> Dict[str, Any]:
+        """获取推理服务配置"""
+        return self._config.get("model_server", {})
 
 
 config = ConfigManager()
@@ -3,19 +3,37 @@
 提供语音转文字、PDF转Word、图片OCR等功能
 """
 import sys
+import asyncio
 from pathlib import Path
 from contextlib import asynccontextmanager
+from typing import List
 
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.app.config import config
 from backend.app.routers import asr, pdf2word, ocr
+from backend.app.services.asr_service import asr_service
+from backend.app.services.ocr_service import ocr_service
+from backend.app.services.pdf_service import pdf_service
+from backend.app.utils.admission import admission, AdmissionMiddleware
+from backend.app.utils.cache import result_cache
+from backend.app.utils.metrics import metrics, MetricsMiddleware, render_gauge, process_rss
+from backend.app.utils.model_server import model_client
+from backend.app.utils.scheduler import job_scheduler
+from backend.app.utils.singleflight import single_flight
+
+
+SERVICES = {
+    "asr": asr_service,
+    "ocr": ocr_service,
+    "pdf": pdf_service
+}
 
 
 @asynccontextmanager
@@ -23,8 +41,20 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     print("正在启动离线办公助手...")
     print(f"服务地址: http://{config.server['host']}:{config.server['port']}")
+    
+    # 模型在后台线程中加载，不阻塞端口监听，加载进度通过/ready查询
+    loop = asyncio.get_event_loop()
+    for service in SERVICES.values():
+        state = service.load_state()
+        if state["enabled"] and state["preload"]:
+            loop.run_in_executor(None, service.load)
+    
     yield
     print("正在关闭离线办公助手...")
+    job_scheduler.shutdown()
+    asr_service.shutdown()
+    pdf_service.shutdown()
+    model_client.close()
 
 
 app = FastAPI(
@@ -34,6 +64,8 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# 准入控制在CORS之内，拒绝响应同样带有跨域头；指标中间件在最外层，拒绝的请求也计入
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -41,6 +73,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 base_path = Path(__file__).parent.parent.parent
 static_path = base_path / "frontend" / "static"
@@ -63,7 +96,107 @@ async def index(request: Request):
 @app.get("/health")
 async def health_check():
     """健康检查接口"""
-    return {"status": "healthy", "message": "服务运行正常"}
+    return {
+        "status": "healthy",
+        "message": "服务运行正常",
+        "cache": result_cache.stats(),
+        "coalescing": single_flight.stats(),
+        "admission": admission.stats()
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    就绪检查接口
+    
+    返回各服务的模型加载状态和耗时，需要预加载的服务全部加载完成前返回503
+    """
+    services = {name: service.load_state() for name, service in SERVICES.items()}
+    ready = all(state["ready"] for state in services.values())
+    
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "services": services}
+    )
+
+
+def collect_runtime_metrics() -> List[str]:
+    """
+    采集运行状态指标
+    
+    包括各服务的队列深度与执行中任务数、模型加载耗时、结果缓存命中、
+    请求合并次数和进程内存，导出/metrics时调用
+    """
+    scheduler = job_scheduler.stats()
+    cache = result_cache.stats()
+    coalescing = single_flight.stats()
+    
+    model_loads = []
+    for name, times in (
+        ("asr", asr_service.models_stats().get("load_times", {})),
+        ("ocr", ocr_service.engines_stats().get("create_times", {}))
+    ):
+        model_loads.extend(((name, model), seconds) for model, seconds in times.items())
+    
+    return [
+        *render_gauge(
+            "officetools_queue_depth", "排队等待执行的任务数",
+            [((name,), stats["queued"]) for name, stats in scheduler.items()], ("service",)
+        ),
+        *render_gauge(
+            "officetools_jobs_running", "正在执行的任务数",
+            [((name,), stats["running"]) for name, stats in scheduler.items()], ("service",)
+        ),
+        *render_gauge(
+            "officetools_jobs_workers", "工作池并发数",
+            [((name,), stats["workers"]) for name, stats in scheduler.items()], ("service",)
+        ),
+        *render_gauge(
+            "officetools_jobs_total", "已结束的任务数",
+            [
+                ((name, outcome), stats[outcome])
+                for name, stats in scheduler.items()
+                for outcome in ("completed", "failed")
+            ],
+            ("service", "outcome"), "counter"
+        ),
+        *render_gauge(
+            "officetools_service_load_seconds", "服务模型加载耗时（秒），未加载的服务不导出",
+            [((name,), service.load_state().get("load_time")) for name, service in SERVICES.items()],
+            ("service",)
+        ),
+        *render_gauge(
+            "officetools_model_load_seconds", "各模型或语言引擎实例的创建耗时（秒）",
+            model_loads, ("service", "model")
+        ),
+        *render_gauge("officetools_cache_hits_total", "结果缓存命中次数", [((), cache["hits"])], (), "counter"),
+        *render_gauge("officetools_cache_misses_total", "结果缓存未命中次数", [((), cache["misses"])], (), "counter"),
+        *render_gauge("officetools_cache_hit_ratio", "结果缓存命中率", [((), cache["hit_rate"])]),
+        *render_gauge("officetools_cache_entries", "结果缓存条目数", [((), cache["entries"])]),
+        *render_gauge("officetools_cache_size_bytes", "结果缓存占用大小（字节）", [((), cache["size_bytes"])]),
+        *render_gauge(
+            "officetools_coalesced_requests_total", "请求合并次数，started为实际执行，shared为复用进行中的计算",
+            [(("started",), coalescing["started"]), (("shared",), coalescing["shared"])],
+            ("outcome",), "counter"
+        ),
+        *render_gauge("officetools_coalescing_in_flight", "进行中的可合并计算数", [((), coalescing["in_flight"])]),
+        *render_gauge("officetools_process_resident_memory_bytes", "进程常驻内存（字节）", [((), process_rss())])
+    ]
+
+
+metrics.register_collector(collect_runtime_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    运行指标接口
+    
+    以Prometheus文本格式导出请求数与耗时、各处理阶段耗时直方图、
+    队列深度、模型加载耗时、缓存命中率和内存占用，只统计当前进程
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
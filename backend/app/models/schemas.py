@@ -18,6 +18,7 @@ class AsrResult(BaseModel):
     text: str
     language: str
     duration: float
+    model: Optional[str] = None
 
 
 class AsrResponse(BaseResponse):
@@ -30,11 +31,23 @@ class OcrResult(BaseModel):
     text: str
     boxes: List[List[float]]
     confidence: float
+    page: Optional[int] = None
+
+
+class OcrPageResult(BaseModel):
+    """PDF单页识别结果模型"""
+    page: int
+    text: str
+    source: str
+    confidence: Optional[float] = None
 
 
 class OcrResponse(BaseResponse):
     """OCR响应模型"""
     data: Optional[List[OcrResult]] = None
+    profile: Optional[str] = None
+    models: Optional[str] = None
+    pages: Optional[List[OcrPageResult]] = None
 
 
 class PdfConvertResult(BaseModel):
@@ -42,6 +55,7 @@ class PdfConvertResult(BaseModel):
     output_path: str
     page_count: int
     word_count: int
+    mode: Optional[str] = None
 
 
 class PdfConvertResponse(BaseResponse):
@@ -56,3 +70,5 @@ class TaskStatus(BaseModel):
     progress: float
     message: str
     result: Optional[Dict[str, Any]] = None
+    detail: Optional[Dict[str, Any]] = None
+    queue_position: Optional[int] = None
@@ -3,84 +3,115 @@
 提供音频文件上传和转录接口
 """
 import os
+import json
+import time
 import uuid
+import asyncio
 import aiofiles
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Request, UploadFile, File, Form, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse, JSONResponse
 
 from backend.app.config import config
 from backend.app.models.schemas import AsrResponse, AsrResult, BaseResponse, TaskStatus
-from backend.app.services.asr_service import asr_service
+from backend.app.services.asr_service import asr_service, StreamingTranscriber
+from backend.app.utils.metrics import metrics
+from backend.app.utils.scheduler import job_scheduler, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from backend.app.utils.task_events import task_events_response
+from backend.app.utils.task_store import task_store
+from backend.app.utils.upload import save_upload_file, get_max_upload_size, raise_too_large, remove_upload
 
 
 router = APIRouter()
 
-tasks_store: dict = {}
+# 流式转录支持的任务类型
+STREAM_TASKS = ("transcribe", "translate")
 
 
-async def save_upload_file(upload_file: UploadFile, save_dir: str) -> str:
-    """
-    保存上传的文件
-    
-    Args:
-        upload_file: 上传的文件对象
-        save_dir: 保存目录
-    
-    Returns:
-        保存后的文件路径
-    """
-    file_ext = os.path.splitext(upload_file.filename)[1]
-    file_name = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(save_dir, file_name)
-    
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await upload_file.read()
-        await f.write(content)
-    
-    return file_path
+def _is_end_message(text: str) -> bool:
+    """判断WebSocket文本消息是否为结束消息，不是JSON对象时抛出ValueError"""
+    try:
+        message = json.loads(text)
+    except json.JSONDecodeError:
+        raise ValueError("消息格式错误，文本消息须为JSON")
+    if not isinstance(message, dict):
+        raise ValueError("消息格式错误，文本消息须为JSON对象")
+    return message.get("type") == "end"
 
 
-async def process_asr_task(task_id: str, audio_path: str, language: Optional[str]):
+def resolve_model(model: Optional[str]) -> str:
+    """校验请求的模型名，不支持时返回400"""
+    try:
+        return asr_service.resolve_model(model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def process_asr_task(
+    task_id: str,
+    audio_path: str,
+    language: Optional[str],
+    long_audio: Optional[bool],
+    content_hash: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    model: Optional[str] = None
+):
     """后台处理语音识别任务"""
+    def update_progress(progress: float):
+        task_store.update(task_id, progress=round(0.1 + progress * 0.7, 4))
+    
     try:
-        tasks_store[task_id]["status"] = "processing"
-        tasks_store[task_id]["progress"] = 0.3
-        
-        result = await asr_service.transcribe_async(audio_path, language)
+        result = await asr_service.transcribe_async(
+            audio_path,
+            language,
+            long_audio=long_audio,
+            progress_callback=update_progress,
+            content_hash=content_hash,
+            model=model,
+            priority=priority,
+            task_id=task_id,
+            on_start=lambda: task_store.update(
+                task_id, status="processing", progress=0.1, message="正在转录"
+            )
+        )
         
-        tasks_store[task_id]["progress"] = 0.8
+        task_store.update(task_id, progress=0.8)
         
         output_dir = os.path.join(config.paths["outputs"], "asr")
         os.makedirs(output_dir, exist_ok=True)
         output_file = os.path.join(output_dir, f"{task_id}.txt")
         
-        async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
-            await f.write(result["text"])
+        with metrics.stage("asr", "output_write"):
+            async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
+                await f.write(result["text"])
+        
+        task_store.update(
+            task_id,
+            status="completed",
+            progress=1.0,
+            message="任务已完成",
+            result={
+                "text": result["text"],
+                "language": result["language"],
+                "duration": result["duration"],
+                "model": result.get("model", model),
+                "output_file": output_file
+            }
+        )
         
-        tasks_store[task_id]["status"] = "completed"
-        tasks_store[task_id]["progress"] = 1.0
-        tasks_store[task_id]["result"] = {
-            "text": result["text"],
-            "language": result["language"],
-            "duration": result["duration"],
-            "output_file": output_file
-        }
+        remove_upload(audio_path, "asr")
         
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
-            
     except Exception as e:
-        tasks_store[task_id]["status"] = "failed"
-        tasks_store[task_id]["message"] = str(e)
+        task_store.update(task_id, status="failed", message=str(e))
 
 
 @router.post("/transcribe", response_model=AsrResponse)
 async def transcribe_audio(
     file: UploadFile = File(..., description="音频文件"),
-    language: Optional[str] = Form(None, description="语言代码，如zh、en")
+    language: Optional[str] = Form(None, description="语言代码，如zh、en"),
+    model: Optional[str] = Form(None, description="模型名，如tiny、base、small、medium")
 ):
     """
     转录音频文件
@@ -89,6 +120,7 @@ async def transcribe_audio(
     
     - **file**: 音频文件
     - **language**: 语言代码，不指定则自动检测
+    - **model**: Whisper模型，不指定则使用配置的默认模型
     """
     if not asr_service.is_available():
         raise HTTPException(
@@ -96,6 +128,8 @@ async def transcribe_audio(
             detail="语音识别服务不可用，请检查Whisper模型是否正确安装"
         )
     
+    model = resolve_model(model)
+    
     allowed_types = ["audio/mpeg", "audio/wav", "audio/x-wav", "audio/mp3",
                      "audio/m4a", "audio/x-m4a", "audio/flac", "audio/ogg",
                      "video/mp4"]
@@ -103,19 +137,25 @@ async def transcribe_audio(
     upload_dir = config.paths["uploads"]
     
     try:
-        audio_path = await save_upload_file(file, upload_dir)
+        saved = await save_upload_file(file, upload_dir, get_max_upload_size("asr"), service="asr")
+        audio_path = saved.path
         
-        result = await asr_service.transcribe_async(audio_path, language)
+        result = await asr_service.transcribe_async(
+            audio_path,
+            language,
+            content_hash=saved.sha256,
+            model=model
+        )
         
         output_dir = os.path.join(config.paths["outputs"], "asr")
         os.makedirs(output_dir, exist_ok=True)
         output_file = os.path.join(output_dir, f"{uuid.uuid4()}.txt")
         
-        async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
-            await f.write(result["text"])
+        with metrics.stage("asr", "output_write"):
+            async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
+                await f.write(result["text"])
         
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
+        remove_upload(audio_path, "asr")
         
         return AsrResponse(
             success=True,
@@ -123,10 +163,13 @@ async def transcribe_audio(
             data=AsrResult(
                 text=result["text"],
                 language=result["language"],
-                duration=result["duration"]
+                duration=result["duration"],
+                model=result.get("model", model)
             )
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"转录失败: {str(e)}")
 
@@ -135,11 +178,16 @@ async def transcribe_audio(
 async def transcribe_audio_async(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="音频文件"),
-    language: Optional[str] = Form(None, description="语言代码")
+    language: Optional[str] = Form(None, description="语言代码"),
+    long_audio: Optional[bool] = Form(None, description="长音频分段并行转录，不指定则按时长自动判断"),
+    priority: int = Form(PRIORITY_NORMAL, ge=PRIORITY_HIGH, le=PRIORITY_LOW, description="调度优先级，0最高"),
+    model: Optional[str] = Form(None, description="模型名，如tiny、base、small、medium")
 ):
     """
     异步转录音频文件（适合大文件）
     
+    长音频会在静音处切分为重叠窗口，由多个进程并行转录后拼接
+    
     返回任务ID，可通过/task/{task_id}查询进度
     """
     if not asr_service.is_available():
@@ -148,39 +196,202 @@ async def transcribe_audio_async(
             detail="语音识别服务不可用"
         )
     
+    model = resolve_model(model)
+    
     upload_dir = config.paths["uploads"]
-    audio_path = await save_upload_file(file, upload_dir)
-    
-    task_id = str(uuid.uuid4())
-    tasks_store[task_id] = {
-        "task_id": task_id,
-        "status": "pending",
-        "progress": 0.0,
-        "message": "任务已创建"
-    }
+    saved = await save_upload_file(file, upload_dir, get_max_upload_size("asr"), service="asr")
+    
+    task = task_store.create("asr", message="排队中")
+    task_id = task["task_id"]
     
-    background_tasks.add_task(process_asr_task, task_id, audio_path, language)
+    background_tasks.add_task(
+        process_asr_task,
+        task_id,
+        saved.path,
+        language,
+        long_audio,
+        saved.sha256,
+        priority,
+        model
+    )
     
-    return TaskStatus(**tasks_store[task_id])
+    return TaskStatus(**task)
+
+
+@router.websocket("/stream")
+async def stream_transcribe(
+    websocket: WebSocket,
+    language: Optional[str] = None,
+    task: str = "transcribe",
+    format: str = "pcm",
+    model: Optional[str] = None
+):
+    """
+    流式转录WebSocket接口
+    
+    - **format=pcm**: 客户端持续发送16kHz单声道s16le PCM二进制帧，
+      每凑满一个窗口即返回新增分段
+    - **format=file**: 客户端分块发送任意格式的音频文件，
+      发送结束后服务端逐窗口转录并返回分段
+    
+    客户端发送文本消息 {"type": "end"} 表示音频结束。服务端消息:
+    {"type": "segments", "segments": [...]}、
+    {"type": "done", "text": ..., "language": ..., "duration": ..., "model": ...}、
+    {"type": "error", "message": ...}
+    """
+    await websocket.accept()
+    
+    if not asr_service.is_available():
+        await websocket.send_json({"type": "error", "message": "语音识别服务不可用"})
+        await websocket.close()
+        return
+    
+    if format not in ("pcm", "file"):
+        await websocket.send_json({"type": "error", "message": f"不支持的格式: {format}"})
+        await websocket.close()
+        return
+    
+    if task not in STREAM_TASKS:
+        await websocket.send_json({"type": "error", "message": f"不支持的任务类型: {task}"})
+        await websocket.close()
+        return
+    
+    try:
+        model = asr_service.resolve_model(model)
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        await websocket.close()
+        return
+    
+    start_time = time.time()
+    audio_path = None
+    
+    try:
+        if format == "pcm":
+            session = StreamingTranscriber(asr_service, language, task, model)
+            pending: asyncio.Queue = asyncio.Queue()
+            
+            async def receive_audio():
+                try:
+                    while True:
+                        message = await websocket.receive()
+                        if message["type"] == "websocket.disconnect":
+                            raise WebSocketDisconnect(message.get("code", 1000))
+                        if message.get("bytes"):
+                            await pending.put(message["bytes"])
+                        elif message.get("text") and _is_end_message(message["text"]):
+                            return
+                finally:
+                    # 正常结束、客户端断开或消息无效时都唤醒主循环，异常由主循环重新抛出
+                    pending.put_nowait(None)
+            
+            receiver = asyncio.create_task(receive_audio())
+            try:
+                finished = False
+                while not finished:
+                    chunks = [await pending.get()]
+                    while not pending.empty():
+                        chunks.append(pending.get_nowait())
+                    if chunks[-1] is None:
+                        chunks.pop()
+                        finished = True
+                        await receiver
+                    if not chunks:
+                        continue
+                    
+                    added = await job_scheduler.run(
+                        "asr", session.feed_pcm16, b"".join(chunks), priority=PRIORITY_HIGH
+                    )
+                    if added:
+                        await websocket.send_json({"type": "segments", "segments": added})
+                
+                added = await job_scheduler.run("asr", session.finish, priority=PRIORITY_HIGH)
+                if added:
+                    await websocket.send_json({"type": "segments", "segments": added})
+            finally:
+                receiver.cancel()
+            
+            text = session.text
+            result_language = session.language
+        else:
+            audio_path = os.path.join(config.paths["uploads"], f"{uuid.uuid4()}.audio")
+            max_size = get_max_upload_size("asr")
+            size = 0
+            async with aiofiles.open(audio_path, 'wb') as f:
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        raise WebSocketDisconnect(message.get("code", 1000))
+                    if message.get("bytes"):
+                        size += len(message["bytes"])
+                        if max_size is not None and size > max_size:
+                            raise_too_large(max_size)
+                        await f.write(message["bytes"])
+                    elif message.get("text") and _is_end_message(message["text"]):
+                        break
+            
+            segments = asr_service.iter_transcribe(audio_path, language, task, model)
+            all_segments = []
+            while True:
+                added = await job_scheduler.run("asr", next, segments, None, priority=PRIORITY_HIGH)
+                if added is None:
+                    break
+                all_segments.extend(added)
+                await websocket.send_json({"type": "segments", "segments": added})
+            
+            result_language = language or config.asr.get("language", "zh")
+            text = "".join(
+                asr_service._join_text(segment["text"], result_language)
+                for segment in all_segments
+            ).strip()
+        
+        await websocket.send_json({
+            "type": "done",
+            "text": text,
+            "language": result_language,
+            "duration": time.time() - start_time,
+            "model": model
+        })
+        await websocket.close()
+        
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        try:
+            await websocket.send_json({"type": "error", "message": f"转录失败: {str(e)}"})
+            await websocket.close()
+        except Exception:
+            pass
+    finally:
+        remove_upload(audio_path, "asr")
 
 
 @router.get("/task/{task_id}", response_model=TaskStatus)
 async def get_task_status(task_id: str):
     """获取异步任务状态"""
-    if task_id not in tasks_store:
+    task = task_store.get(task_id, "asr")
+    if task is None:
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    return TaskStatus(**tasks_store[task_id])
+    if task["status"] == "pending":
+        task["queue_position"] = job_scheduler.queue_position("asr", task_id)
+    
+    return TaskStatus(**task)
+
+
+@router.get("/task/{task_id}/events")
+async def stream_task_events(task_id: str, request: Request):
+    """以Server-Sent Events推送异步任务的状态和进度，任务结束后关闭连接"""
+    return task_events_response(request, "asr", task_id)
 
 
 @router.get("/download/{task_id}")
 async def download_result(task_id: str):
     """下载转录结果文件"""
-    if task_id not in tasks_store:
+    task = task_store.get(task_id, "asr")
+    if task is None:
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    task = tasks_store[task_id]
-    
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="任务尚未完成")
     
@@ -201,5 +412,7 @@ async def get_service_status():
     """获取服务状态"""
     return {
         "available": asr_service.is_available(),
-        "model": config.asr.get("model_size", "small")
+        "model": asr_service.default_model,
+        "models": asr_service.models_stats(),
+        "scheduler": job_scheduler.pool("asr").stats()
     }
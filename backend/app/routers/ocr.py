@@ -8,18 +8,24 @@ import aiofiles
 from pathlib import Path
 from typing import Optional, List
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Request, UploadFile, File, Form, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse, JSONResponse
 
 from backend.app.config import config
-from backend.app.models.schemas import OcrResponse, OcrResult, BaseResponse, TaskStatus
+from backend.app.models.schemas import OcrResponse, OcrResult, OcrPageResult, BaseResponse, TaskStatus
 from backend.app.services.ocr_service import ocr_service
+from backend.app.services.pdf_service import pdf_service
+from backend.app.utils.admission import admission
+from backend.app.utils.metrics import metrics
+from backend.app.utils.scheduler import job_scheduler, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from backend.app.utils.task_events import task_events_response
+from backend.app.utils.task_store import task_store
+from backend.app.utils.text_export import TEXT_FORMATS
+from backend.app.utils.upload import save_upload_file, read_upload_file, get_max_upload_size, remove_upload
 
 
 router = APIRouter()
 
-tasks_store: dict = {}
-
 ALLOWED_IMAGE_TYPES = [
     "image/jpeg", "image/jpg", "image/png", "image/bmp",
     "image/tiff", "image/webp", "image/gif"
@@ -27,75 +33,199 @@ ALLOWED_IMAGE_TYPES = [
 
 ALLOWED_EXTENSIONS = [".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".tif", ".webp", ".gif"]
 
+PDF_EXTENSION = ".pdf"
 
-async def save_upload_file(upload_file: UploadFile, save_dir: str) -> str:
-    """
-    保存上传的文件
-    
-    Args:
-        upload_file: 上传的文件对象
-        save_dir: 保存目录
-    
-    Returns:
-        保存后的文件路径
-    """
-    file_ext = os.path.splitext(upload_file.filename)[1]
-    file_name = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(save_dir, file_name)
+OUTPUT_MEDIA_TYPES = {
+    ".txt": "text/plain",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+}
+
+
+def resolve_profile(profile: Optional[str]) -> str:
+    """校验请求的识别档位，不支持时返回400"""
+    try:
+        return ocr_service.resolve_profile(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def check_file_type(filename: str) -> str:
+    """校验上传文件的扩展名，返回小写扩展名；PDF需要PDF服务可用"""
+    file_ext = os.path.splitext(filename)[1].lower()
+    if file_ext == PDF_EXTENSION:
+        if not pdf_service.is_available():
+            raise HTTPException(
+                status_code=503,
+                detail="PDF服务不可用，无法识别PDF文件"
+            )
+        return file_ext
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的文件格式，支持: {', '.join(ALLOWED_EXTENSIONS + [PDF_EXTENSION])}"
+        )
+    return file_ext
+
+
+def pdf_ocr_response(result: dict) -> OcrResponse:
+    """将PDF识别结果整理为响应，逐行结果标注所在页码"""
+    return OcrResponse(
+        success=True,
+        message="识别成功",
+        data=[
+            OcrResult(
+                text=r["text"],
+                boxes=r["box"],
+                confidence=r["confidence"],
+                page=page["page"]
+            )
+            for page in result["pages"]
+            for r in page.get("results", [])
+        ],
+        profile=result.get("profile"),
+        models=result.get("models"),
+        pages=[
+            OcrPageResult(
+                page=page["page"],
+                text=page["text"],
+                source=page["source"],
+                confidence=page.get("confidence")
+            )
+            for page in result["pages"]
+        ]
+    )
+
+
+async def process_ocr_pdf_task(
+    task_id: str,
+    pdf_path: str,
+    output_file: str,
+    language: Optional[str],
+    content_hash: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    profile: Optional[str] = None
+):
+    """后台处理PDF识别任务"""
     
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await upload_file.read()
-        await f.write(content)
+    def update_progress(detail: dict):
+        task_store.update(
+            task_id,
+            progress=round(0.1 + detail["progress"] * 0.85, 4),
+            message=f"正在识别扫描页 {detail['pages_done']}/{detail['pages_total']}页",
+            detail=detail
+        )
     
-    return file_path
+    try:
+        result = await pdf_service.ocr_convert_async(
+            pdf_path,
+            output_file,
+            language=language,
+            profile=profile,
+            content_hash=content_hash,
+            progress_callback=update_progress,
+            priority=priority,
+            task_id=task_id,
+            on_start=lambda: task_store.update(
+                task_id, status="processing", progress=0.1, message="正在识别"
+            )
+        )
+        
+        task_store.update(
+            task_id,
+            status="completed",
+            progress=1.0,
+            message="任务已完成",
+            result={
+                "text": "\n\n".join(page["text"] for page in result["pages"]),
+                "page_count": result["page_count"],
+                "ocr_pages": result["ocr_pages"],
+                "pages": [
+                    {key: page.get(key) for key in ("page", "source", "text", "confidence")}
+                    for page in result["pages"]
+                ],
+                "duration": result["duration"],
+                "profile": result.get("profile"),
+                "models": result.get("models"),
+                "output_file": output_file
+            }
+        )
+        
+    except Exception as e:
+        task_store.update(task_id, status="failed", message=str(e))
+    finally:
+        remove_upload(pdf_path, "ocr")
 
 
-async def process_ocr_task(task_id: str, image_path: str, language: Optional[str]):
+async def process_ocr_task(
+    task_id: str,
+    image_path: str,
+    language: Optional[str],
+    content_hash: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    profile: Optional[str] = None
+):
     """后台处理OCR任务"""
     try:
-        tasks_store[task_id]["status"] = "processing"
-        tasks_store[task_id]["progress"] = 0.3
-        
-        result = await ocr_service.recognize_async(image_path, language)
+        result = await ocr_service.recognize_async(
+            image_path,
+            language,
+            content_hash,
+            profile,
+            priority=priority,
+            task_id=task_id,
+            on_start=lambda: task_store.update(
+                task_id, status="processing", progress=0.3, message="正在识别"
+            )
+        )
         
-        tasks_store[task_id]["progress"] = 0.8
+        task_store.update(task_id, progress=0.8)
         
         output_dir = os.path.join(config.paths["outputs"], "ocr")
         os.makedirs(output_dir, exist_ok=True)
         output_file = os.path.join(output_dir, f"{task_id}.txt")
         
-        async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
-            await f.write(result["text"])
+        with metrics.stage("ocr", "output_write"):
+            async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
+                await f.write(result["text"])
+        
+        task_store.update(
+            task_id,
+            status="completed",
+            progress=1.0,
+            message="任务已完成",
+            result={
+                "text": result["text"],
+                "confidence": result["confidence"],
+                "duration": result["duration"],
+                "profile": result.get("profile"),
+                "models": result.get("models"),
+                "output_file": output_file
+            }
+        )
         
-        tasks_store[task_id]["status"] = "completed"
-        tasks_store[task_id]["progress"] = 1.0
-        tasks_store[task_id]["result"] = {
-            "text": result["text"],
-            "confidence": result["confidence"],
-            "duration": result["duration"],
-            "output_file": output_file
-        }
+        remove_upload(image_path, "ocr")
         
-        if os.path.exists(image_path):
-            os.remove(image_path)
-            
     except Exception as e:
-        tasks_store[task_id]["status"] = "failed"
-        tasks_store[task_id]["message"] = str(e)
+        task_store.update(task_id, status="failed", message=str(e))
 
 
 @router.post("/recognize", response_model=OcrResponse)
 async def recognize_image(
     file: UploadFile = File(..., description="图片文件"),
-    language: Optional[str] = Form(None, description="语言代码，如ch、en")
+    language: Optional[str] = Form(None, description="语言代码，如ch、en"),
+    profile: Optional[str] = Form(None, description="识别档位: fast、balanced、accurate")
 ):
     """
-    识别图片中的文字
+    识别图片或扫描PDF中的文字
     
     支持的图片格式: jpg, jpeg, png, bmp, tiff, webp, gif
     
+    图片在内存中解码后直接识别，不写入上传目录；PDF中的扫描页渲染后识别，
+    含文字的页面直接提取，结果按页返回
+    
     - **file**: 图片文件
     - **language**: 语言代码，不指定则自动检测
+    - **profile**: 识别档位，不指定则使用配置的默认档位
     """
     if not ocr_service.is_available():
         raise HTTPException(
@@ -103,29 +233,23 @@ async def recognize_image(
             detail="OCR服务不可用，请检查PaddleOCR是否正确安装"
         )
     
-    file_ext = os.path.splitext(file.filename)[1].lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"不支持的图片格式，支持: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
+    file_ext = check_file_type(file.filename)
+    profile = resolve_profile(profile)
     
-    upload_dir = config.paths["uploads"]
+    if file_ext == PDF_EXTENSION:
+        return await recognize_pdf(file, language, profile)
     
     try:
-        image_path = await save_upload_file(file, upload_dir)
-        
-        result = await ocr_service.recognize_async(image_path, language)
+        upload = await read_upload_file(file, get_max_upload_size("ocr"), service="ocr")
+        result = await ocr_service.recognize_bytes_async(upload.data, language, upload.sha256, profile)
         
         output_dir = os.path.join(config.paths["outputs"], "ocr")
         os.makedirs(output_dir, exist_ok=True)
         output_file = os.path.join(output_dir, f"{uuid.uuid4()}.txt")
         
-        async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
-            await f.write(result["text"])
-        
-        if os.path.exists(image_path):
-            os.remove(image_path)
+        with metrics.stage("ocr", "output_write"):
+            async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
+                await f.write(result["text"])
         
         ocr_results = [
             OcrResult(
@@ -139,23 +263,59 @@ async def recognize_image(
         return OcrResponse(
             success=True,
             message="识别成功",
-            data=ocr_results
+            data=ocr_results,
+            profile=result.get("profile"),
+            models=result.get("models")
         )
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"识别失败: {str(e)}")
+
+
+async def recognize_pdf(file: UploadFile, language: Optional[str], profile: str) -> OcrResponse:
+    """识别上传的PDF，识别文本写入输出目录"""
+    saved = await save_upload_file(file, config.paths["uploads"], get_max_upload_size("pdf"), service="ocr")
+    
+    output_dir = os.path.join(config.paths["outputs"], "ocr")
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, f"{uuid.uuid4()}.txt")
+    
+    try:
+        result = await pdf_service.ocr_convert_async(
+            saved.path,
+            output_file,
+            language=language,
+            profile=profile,
+            content_hash=saved.sha256
+        )
+        return pdf_ocr_response(result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"识别失败: {str(e)}")
+    finally:
+        remove_upload(saved.path, "ocr")
 
 
 @router.post("/recognize/batch", response_model=List[OcrResponse])
 async def recognize_images_batch(
     files: List[UploadFile] = File(..., description="图片文件列表"),
-    language: Optional[str] = Form(None, description="语言代码")
+    language: Optional[str] = Form(None, description="语言代码"),
+    profile: Optional[str] = Form(None, description="识别档位")
 ):
     """
     批量识别多张图片
     
+    所有图片先完成上传，再作为一批提交识别：逐张检测文本框后，
+    整批的文本行合并送入识别模型，结果按上传顺序返回
+    
     - **files**: 图片文件列表
     - **language**: 语言代码
+    - **profile**: 识别档位
     """
     if not ocr_service.is_available():
         raise HTTPException(
@@ -163,53 +323,86 @@ async def recognize_images_batch(
             detail="OCR服务不可用"
         )
     
+    # 准入控制在读取请求体时已按文件数中止超限的请求，无法从请求体中识别
+    # 文件部分时由这里兜底，只限制处理的文件数
+    max_files = admission.max_batch_files
+    if max_files is not None and len(files) > max_files:
+        raise HTTPException(
+            status_code=413,
+            detail=f"文件过多，单次最多上传 {max_files} 个文件"
+        )
+    
+    profile = resolve_profile(profile)
+    
     upload_dir = config.paths["uploads"]
-    results = []
+    output_dir = os.path.join(config.paths["outputs"], "ocr")
+    os.makedirs(output_dir, exist_ok=True)
     
-    for file in files:
+    results: List[Optional[OcrResponse]] = [None] * len(files)
+    saved_files = []
+    
+    for index, file in enumerate(files):
         file_ext = os.path.splitext(file.filename)[1].lower()
         if file_ext not in ALLOWED_EXTENSIONS:
-            results.append(OcrResponse(
+            results[index] = OcrResponse(
                 success=False,
                 message=f"不支持的图片格式: {file.filename}"
-            ))
+            )
             continue
         
         try:
-            image_path = await save_upload_file(file, upload_dir)
-            result = await ocr_service.recognize_async(image_path, language)
-            
-            output_dir = os.path.join(config.paths["outputs"], "ocr")
-            os.makedirs(output_dir, exist_ok=True)
-            output_file = os.path.join(output_dir, f"{uuid.uuid4()}.txt")
-            
-            result_text = "\n".join([r["text"] for r in result["results"]])
+            saved = await save_upload_file(file, upload_dir, get_max_upload_size("ocr"), service="ocr")
+            saved_files.append((index, saved))
+        except HTTPException as e:
+            results[index] = OcrResponse(
+                success=False,
+                message=f"识别失败: {e.detail}"
+            )
+    
+    try:
+        batch_results = await ocr_service.recognize_batch_async(
+            [saved.path for _, saved in saved_files],
+            language,
+            [saved.sha256 for _, saved in saved_files],
+            profile
+        )
+    except Exception as e:
+        batch_results = [{"error": str(e)} for _ in saved_files]
+    finally:
+        for _, saved in saved_files:
+            remove_upload(saved.path, "ocr")
+    
+    for (index, _), result in zip(saved_files, batch_results):
+        if "error" in result:
+            results[index] = OcrResponse(
+                success=False,
+                message=f"识别失败: {result['error']}"
+            )
+            continue
+        
+        output_file = os.path.join(output_dir, f"{uuid.uuid4()}.txt")
+        
+        result_text = "\n".join([r["text"] for r in result["results"]])
+        with metrics.stage("ocr", "output_write"):
             async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
                 await f.write(result_text)
-            
-            if os.path.exists(image_path):
-                os.remove(image_path)
-            
-            ocr_results = [
-                OcrResult(
-                    text=r["text"],
-                    boxes=r["box"],
-                    confidence=r["confidence"]
-                )
-                for r in result["results"]
-            ]
-            
-            results.append(OcrResponse(
-                success=True,
-                message="识别成功",
-                data=ocr_results
-            ))
-            
-        except Exception as e:
-            results.append(OcrResponse(
-                success=False,
-                message=f"识别失败: {str(e)}"
-            ))
+        
+        ocr_results = [
+            OcrResult(
+                text=r["text"],
+                boxes=r["box"],
+                confidence=r["confidence"]
+            )
+            for r in result["results"]
+        ]
+        
+        results[index] = OcrResponse(
+            success=True,
+            message="识别成功",
+            data=ocr_results,
+            profile=result.get("profile"),
+            models=result.get("models")
+        )
     
     return results
 
@@ -218,12 +411,16 @@ async def recognize_images_batch(
 async def recognize_image_async(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="图片文件"),
-    language: Optional[str] = Form(None, description="语言代码")
+    language: Optional[str] = Form(None, description="语言代码"),
+    profile: Optional[str] = Form(None, description="识别档位"),
+    output_format: str = Form("txt", description="PDF识别结果格式: txt、docx"),
+    priority: int = Form(PRIORITY_NORMAL, ge=PRIORITY_HIGH, le=PRIORITY_LOW, description="调度优先级，0最高")
 ):
     """
-    异步识别图片（适合大图片）
+    异步识别图片或扫描PDF（适合大图片和多页文档）
     
-    返回任务ID，可通过/task/{task_id}查询进度
+    返回任务ID，可通过/task/{task_id}查询进度，完成后可下载识别结果；
+    PDF可用output_format选择生成纯文本或可搜索的Word文档
     """
     if not ocr_service.is_available():
         raise HTTPException(
@@ -231,39 +428,80 @@ async def recognize_image_async(
             detail="OCR服务不可用"
         )
     
+    file_ext = check_file_type(file.filename)
+    profile = resolve_profile(profile)
+    
+    if output_format not in TEXT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的输出格式，支持: {', '.join(TEXT_FORMATS)}"
+        )
+    
     upload_dir = config.paths["uploads"]
-    image_path = await save_upload_file(file, upload_dir)
-    
-    task_id = str(uuid.uuid4())
-    tasks_store[task_id] = {
-        "task_id": task_id,
-        "status": "pending",
-        "progress": 0.0,
-        "message": "任务已创建"
-    }
+    saved = await save_upload_file(
+        file,
+        upload_dir,
+        get_max_upload_size("pdf" if file_ext == PDF_EXTENSION else "ocr"),
+        service="ocr"
+    )
+    
+    task = task_store.create("ocr", message="排队中")
+    task_id = task["task_id"]
     
-    background_tasks.add_task(process_ocr_task, task_id, image_path, language)
+    if file_ext == PDF_EXTENSION:
+        output_dir = os.path.join(config.paths["outputs"], "ocr")
+        os.makedirs(output_dir, exist_ok=True)
+        background_tasks.add_task(
+            process_ocr_pdf_task,
+            task_id,
+            saved.path,
+            os.path.join(output_dir, f"{task_id}.{output_format}"),
+            language,
+            saved.sha256,
+            priority,
+            profile
+        )
+        return TaskStatus(**task)
     
-    return TaskStatus(**tasks_store[task_id])
+    background_tasks.add_task(
+        process_ocr_task,
+        task_id,
+        saved.path,
+        language,
+        saved.sha256,
+        priority,
+        profile
+    )
+    
+    return TaskStatus(**task)
 
 
 @router.get("/task/{task_id}", response_model=TaskStatus)
 async def get_task_status(task_id: str):
     """获取异步任务状态"""
-    if task_id not in tasks_store:
+    task = task_store.get(task_id, "ocr")
+    if task is None:
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    return TaskStatus(**tasks_store[task_id])
+    if task["status"] == "pending":
+        task["queue_position"] = job_scheduler.queue_position("ocr", task_id)
+    
+    return TaskStatus(**task)
+
+
+@router.get("/task/{task_id}/events")
+async def stream_task_events(task_id: str, request: Request):
+    """以Server-Sent Events推送异步任务的状态和进度，任务结束后关闭连接"""
+    return task_events_response(request, "ocr", task_id)
 
 
 @router.get("/download/{task_id}")
 async def download_result(task_id: str):
     """下载识别结果文件"""
-    if task_id not in tasks_store:
+    task = task_store.get(task_id, "ocr")
+    if task is None:
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    task = tasks_store[task_id]
-    
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="任务尚未完成")
     
@@ -272,10 +510,11 @@ async def download_result(task_id: str):
     if not output_file or not os.path.exists(output_file):
         raise HTTPException(status_code=404, detail="结果文件不存在")
     
+    ext = os.path.splitext(output_file)[1].lower()
     return FileResponse(
         output_file,
-        media_type="text/plain",
-        filename=f"ocr_result_{task_id}.txt"
+        media_type=OUTPUT_MEDIA_TYPES.get(ext, "text/plain"),
+        filename=f"ocr_result_{task_id}{ext}"
     )
 
 
@@ -284,5 +523,8 @@ async def get_service_status():
     """获取服务状态"""
     return {
         "available": ocr_service.is_available(),
-        "language": config.ocr.get("lang", "ch")
+        "language": config.ocr.get("lang", "ch"),
+        "profiles": ocr_service.profiles_stats(),
+        "engines": ocr_service.engines_stats(),
+        "scheduler": job_scheduler.pool("ocr").stats()
     }
@@ -4,43 +4,83 @@ PDF转Word API路由
 """
 import os
 import uuid
-import aiofiles
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Request, UploadFile, File, Form, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse
 
 from backend.app.config import config
 from backend.app.models.schemas import PdfConvertResponse, PdfConvertResult, BaseResponse, TaskStatus
 from backend.app.services.pdf_service import pdf_service
+from backend.app.utils.scheduler import job_scheduler, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from backend.app.utils.task_events import task_events_response
+from backend.app.utils.task_store import task_store
+from backend.app.utils.text_export import TEXT_FORMATS
+from backend.app.utils.upload import save_upload_file, get_max_upload_size, remove_upload
 
 
 router = APIRouter()
 
-tasks_store: dict = {}
+CONVERT_MODES = ("layout", "text", "ocr")
 
+STAGE_LABELS = {
+    "parse": "解析页面",
+    "make_docx": "生成文档",
+    "text": "提取文字",
+    "ocr": "识别扫描页"
+}
 
-async def save_upload_file(upload_file: UploadFile, save_dir: str) -> str:
+OUTPUT_MEDIA_TYPES = {
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".txt": "text/plain"
+}
+
+
+def output_extension(mode: str, output_format: str) -> str:
     """
-    保存上传的文件
+    校验转换模式和输出格式，返回输出文件扩展名
     
-    Args:
-        upload_file: 上传的文件对象
-        save_dir: 保存目录
-    
-    Returns:
-        保存后的文件路径
+    layout模式还原版面，只能输出Word文档；text和ocr模式可输出docx或txt
     """
-    file_ext = os.path.splitext(upload_file.filename)[1]
-    file_name = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(save_dir, file_name)
-    
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await upload_file.read()
-        await f.write(content)
-    
-    return file_path
+    if mode not in CONVERT_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的转换模式: {mode}，可选: {', '.join(CONVERT_MODES)}"
+        )
+    if output_format not in TEXT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的输出格式: {output_format}，可选: {', '.join(TEXT_FORMATS)}"
+        )
+    if mode == "layout" and output_format != "docx":
+        raise HTTPException(status_code=400, detail="layout模式只能输出docx")
+    return f".{output_format}"
+
+
+def run_conversion(
+    mode: str,
+    pdf_path: str,
+    output_path: str,
+    start_page: Optional[int],
+    end_page: Optional[int],
+    dpi: int,
+    content_hash: Optional[str],
+    **kwargs
+):
+    """按转换模式调用PDF服务，返回可等待的转换结果"""
+    if mode == "text":
+        return pdf_service.extract_text_async(
+            pdf_path, output_path, start_page or 0, end_page, content_hash, **kwargs
+        )
+    if mode == "ocr":
+        return pdf_service.ocr_convert_async(
+            pdf_path, output_path, start_page or 0, end_page,
+            content_hash=content_hash, **kwargs
+        )
+    return pdf_service.convert_async(
+        pdf_path, output_path, start_page or 0, end_page, dpi, content_hash, **kwargs
+    )
 
 
 async def process_pdf_task(
@@ -49,35 +89,56 @@ async def process_pdf_task(
     output_path: str,
     start_page: Optional[int],
     end_page: Optional[int],
-    dpi: int
+    dpi: int,
+    content_hash: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    mode: str = "layout"
 ):
     """后台处理PDF转换任务"""
+    
+    def update_progress(detail: dict):
+        label = STAGE_LABELS.get(detail["stage"], "转换")
+        task_store.update(
+            task_id,
+            progress=round(0.1 + detail["progress"] * 0.85, 4),
+            message=f"正在{label} {detail['pages_done']}/{detail['pages_total']}页",
+            detail=detail
+        )
+    
     try:
-        tasks_store[task_id]["status"] = "processing"
-        tasks_store[task_id]["progress"] = 0.1
-        
-        result = await pdf_service.convert_async(
+        result = await run_conversion(
+            mode,
             pdf_path,
             output_path,
-            start_page or 0,
+            start_page,
             end_page,
-            dpi
+            dpi,
+            content_hash,
+            progress_callback=update_progress,
+            priority=priority,
+            task_id=task_id,
+            on_start=lambda: task_store.update(
+                task_id, status="processing", progress=0.1, message="正在转换"
+            )
         )
         
-        tasks_store[task_id]["status"] = "completed"
-        tasks_store[task_id]["progress"] = 1.0
-        tasks_store[task_id]["result"] = {
-            "output_path": result["output_path"],
-            "page_count": result["page_count"],
-            "word_count": result["word_count"]
-        }
+        task_store.update(
+            task_id,
+            status="completed",
+            progress=1.0,
+            message="任务已完成",
+            result={
+                "output_path": result["output_path"],
+                "page_count": result["page_count"],
+                "word_count": result["word_count"],
+                "mode": result.get("mode", mode)
+            }
+        )
         
-        if os.path.exists(pdf_path):
-            os.remove(pdf_path)
+        remove_upload(pdf_path, "pdf")
             
     except Exception as e:
-        tasks_store[task_id]["status"] = "failed"
-        tasks_store[task_id]["message"] = str(e)
+        task_store.update(task_id, status="failed", message=str(e))
 
 
 @router.post("/convert", response_model=PdfConvertResponse)
@@ -85,7 +146,9 @@ async def convert_pdf(
     file: UploadFile = File(..., description="PDF文件"),
     start_page: Optional[int] = Form(None, description="起始页码（从0开始）"),
     end_page: Optional[int] = Form(None, description="结束页码"),
-    dpi: int = Form(300, description="渲染DPI")
+    dpi: int = Form(300, description="渲染DPI"),
+    mode: str = Form("layout", description="转换模式: layout、text、ocr"),
+    output_format: str = Form("docx", description="输出格式: docx、txt，text和ocr模式可用")
 ):
     """
     将PDF转换为Word文档
@@ -94,6 +157,9 @@ async def convert_pdf(
     - **start_page**: 起始页码（从0开始），不指定则从第一页开始
     - **end_page**: 结束页码，不指定则转换到最后一页
     - **dpi**: 渲染DPI，影响图片质量，默认300
+    - **mode**: layout还原版面（扫描件自动识别文字）；text只提取文字，速度快、占用内存少；
+      ocr对扫描页识别文字
+    - **output_format**: 输出格式，layout模式只支持docx
     """
     if not pdf_service.is_available():
         raise HTTPException(
@@ -104,26 +170,30 @@ async def convert_pdf(
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="请上传PDF文件")
     
+    ext = output_extension(mode, output_format)
+    
     upload_dir = config.paths["uploads"]
     output_dir = os.path.join(config.paths["outputs"], "pdf")
     os.makedirs(output_dir, exist_ok=True)
     
     try:
-        pdf_path = await save_upload_file(file, upload_dir)
+        saved = await save_upload_file(file, upload_dir, get_max_upload_size("pdf"), service="pdf")
+        pdf_path = saved.path
         
-        output_name = f"{uuid.uuid4()}.docx"
+        output_name = f"{uuid.uuid4()}{ext}"
         output_path = os.path.join(output_dir, output_name)
         
-        result = await pdf_service.convert_async(
+        result = await run_conversion(
+            mode,
             pdf_path,
             output_path,
-            start_page or 0,
+            start_page,
             end_page,
-            dpi
+            dpi,
+            saved.sha256
         )
         
-        if os.path.exists(pdf_path):
-            os.remove(pdf_path)
+        remove_upload(pdf_path, "pdf")
         
         return PdfConvertResponse(
             success=True,
@@ -131,10 +201,13 @@ async def convert_pdf(
             data=PdfConvertResult(
                 output_path=output_name,
                 page_count=result["page_count"],
-                word_count=result["word_count"]
+                word_count=result["word_count"],
+                mode=result.get("mode", mode)
             )
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"转换失败: {str(e)}")
 
@@ -145,7 +218,10 @@ async def convert_pdf_async(
     file: UploadFile = File(..., description="PDF文件"),
     start_page: Optional[int] = Form(None, description="起始页码"),
     end_page: Optional[int] = Form(None, description="结束页码"),
-    dpi: int = Form(300, description="渲染DPI")
+    dpi: int = Form(300, description="渲染DPI"),
+    mode: str = Form("layout", description="转换模式: layout、text、ocr"),
+    output_format: str = Form("docx", description="输出格式: docx、txt"),
+    priority: int = Form(PRIORITY_NORMAL, ge=PRIORITY_HIGH, le=PRIORITY_LOW, description="调度优先级，0最高")
 ):
     """
     异步转换PDF（适合大文件）
@@ -158,42 +234,52 @@ async def convert_pdf_async(
             detail="PDF转换服务不可用"
         )
     
+    ext = output_extension(mode, output_format)
+    
     upload_dir = config.paths["uploads"]
     output_dir = os.path.join(config.paths["outputs"], "pdf")
     os.makedirs(output_dir, exist_ok=True)
     
-    pdf_path = await save_upload_file(file, upload_dir)
+    saved = await save_upload_file(file, upload_dir, get_max_upload_size("pdf"), service="pdf")
     
-    task_id = str(uuid.uuid4())
-    output_path = os.path.join(output_dir, f"{task_id}.docx")
+    task = task_store.create("pdf", message="排队中")
+    task_id = task["task_id"]
+    output_path = os.path.join(output_dir, f"{task_id}{ext}")
     
-    tasks_store[task_id] = {
-        "task_id": task_id,
-        "status": "pending",
-        "progress": 0.0,
-        "message": "任务已创建"
-    }
     
     background_tasks.add_task(
         process_pdf_task,
         task_id,
-        pdf_path,
+        saved.path,
         output_path,
         start_page,
         end_page,
-        dpi
+        dpi,
+        saved.sha256,
+        priority,
+        mode
     )
     
-    return TaskStatus(**tasks_store[task_id])
+    return TaskStatus(**task)
 
 
 @router.get("/task/{task_id}", response_model=TaskStatus)
 async def get_task_status(task_id: str):
     """获取异步任务状态"""
-    if task_id not in tasks_store:
+    task = task_store.get(task_id, "pdf")
+    if task is None:
         raise HTTPException(status_code=404, detail="任务不存在")
     
-    return TaskStatus(**tasks_store[task_id])
+    if task["status"] == "pending":
+        task["queue_position"] = job_scheduler.queue_position("pdf", task_id)
+    
+    return TaskStatus(**task)
+
+
+@router.get("/task/{task_id}/events")
+async def stream_task_events(task_id: str, request: Request):
+    """以Server-Sent Events推送异步任务的状态和进度，任务结束后关闭连接"""
+    return task_events_response(request, "pdf", task_id)
 
 
 @router.get("/download/{filename}")
@@ -207,7 +293,7 @@ async def download_result(filename: str):
     
     return FileResponse(
         file_path,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        media_type=OUTPUT_MEDIA_TYPES.get(os.path.splitext(filename)[1].lower(), "application/octet-stream"),
         filename=filename
     )
 
@@ -239,5 +325,6 @@ async def get_page_count(file_path: str):
 async def get_service_status():
     """获取服务状态"""
     return {
-        "available": pdf_service.is_available()
+        "available": pdf_service.is_available(),
+        "scheduler": job_scheduler.pool("pdf").stats()
     }
@@ -5,30 +5,463 @@
 import os
 import time
 import uuid
+import importlib.util
 import asyncio
 import shutil
 import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterator
 
 from backend.app.config import config
+from backend.app.utils.cache import result_cache, file_sha256
+from backend.app.utils.scheduler import job_scheduler, PRIORITY_NORMAL
+from backend.app.utils.singleflight import single_flight
+from backend.app.utils.metrics import metrics
+from backend.app.utils.model_loader import ModelLoader
+from backend.app.utils.model_registry import ModelRegistry
+from backend.app.utils.model_server import model_client
+
+
+SAMPLE_RATE = 16000
+
+# 各Whisper模型加载前的预估内存占用（MB，fp32权重）
+WHISPER_MODEL_SIZES_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3060,
+    "large": 6170,
+    "turbo": 3240
+}
+
+
+def _init_chunk_worker(num_threads: int) -> None:
+    """
+    长音频分段转录子进程初始化
+    限制每个进程的torch线程数，避免多进程之间抢占CPU
+    
+    Args:
+        num_threads: 每个进程可用的线程数
+    """
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+    
+    AsrService().load()
+
+
+def _transcribe_chunk(
+    audio,
+    language: Optional[str],
+    task: str,
+    model: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    在子进程中转录一个音频窗口
+    
+    Args:
+        audio: 16kHz单声道float32音频数据
+        language: 语言代码
+        task: 任务类型
+        model: 模型名，不指定则使用默认模型
+    
+    Returns:
+        窗口内的分段列表，时间戳相对窗口起点
+    """
+    return AsrService().transcribe_window(audio, language, task, model)
+
+
+def find_silence(audio, lo: int, hi: int) -> int:
+    """
+    在[lo, hi)范围内查找能量最低的帧
+    
+    Args:
+        audio: 16kHz单声道float32音频数据
+        lo: 搜索起点（采样点）
+        hi: 搜索终点（采样点）
+    
+    Returns:
+        静音帧中心的采样点下标，范围过短时返回hi
+    """
+    import numpy as np
+    
+    frame = int(0.03 * SAMPLE_RATE)
+    region = audio[lo:hi]
+    n_frames = len(region) // frame
+    if n_frames == 0:
+        return hi
+    
+    energy = np.sqrt(np.mean(
+        region[:n_frames * frame].reshape(n_frames, frame) ** 2,
+        axis=1
+    ))
+    return lo + int(np.argmin(energy)) * frame + frame // 2
+
+
+def split_on_silence(
+    audio,
+    chunk_seconds: float,
+    overlap_seconds: float,
+    search_seconds: float
+) -> List[Tuple[int, int, int, int]]:
+    """
+    在静音处切分音频，生成相互重叠的窗口
+    
+    在每个目标切分点之前的搜索范围内寻找能量最低的帧作为切分点，
+    窗口向两侧各延伸overlap_seconds，拼接时以切分点为界取舍分段。
+    
+    Args:
+        audio: 16kHz单声道float32音频数据
+        chunk_seconds: 目标窗口长度（秒）
+        overlap_seconds: 窗口重叠长度（秒）
+        search_seconds: 切分点向前搜索静音的范围（秒）
+    
+    Returns:
+        (窗口起点, 窗口终点, 保留区间起点, 保留区间终点) 采样点下标列表
+    """
+    total = len(audio)
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    search = int(search_seconds * SAMPLE_RATE)
+    
+    cuts = [0]
+    pos = 0
+    while total - pos > chunk:
+        target = pos + chunk
+        cut = find_silence(audio, max(pos + chunk // 2, target - search), target)
+        cuts.append(cut)
+        pos = cut
+    cuts.append(total)
+    
+    windows = []
+    for keep_start, keep_end in zip(cuts[:-1], cuts[1:]):
+        windows.append((
+            max(0, keep_start - overlap),
+            min(total, keep_end + overlap),
+            keep_start,
+            keep_end
+        ))
+    return windows
+
+
+class SegmentStitcher:
+    """
+    转录分段拼接器
+    
+    将各窗口的分段换算为全局时间，只保留起点落在窗口保留区间内的分段，
+    并去除重叠区域中与前一分段重复的文本。只追加不修改已输出的分段，
+    便于流式场景逐窗口下发。
+    """
+    
+    def __init__(self):
+        self.segments: List[Dict[str, Any]] = []
+    
+    def add(
+        self,
+        segments: List[Dict[str, Any]],
+        window: Tuple[int, int, int, int]
+    ) -> List[Dict[str, Any]]:
+        """
+        加入一个窗口的转录分段
+        
+        Args:
+            segments: 窗口内的分段，时间戳相对窗口起点
+            window: (窗口起点, 窗口终点, 保留区间起点, 保留区间终点)
+        
+        Returns:
+            本次新增的全局分段列表
+        """
+        win_start, _, keep_start, keep_end = window
+        offset = win_start / SAMPLE_RATE
+        keep_lo = keep_start / SAMPLE_RATE
+        keep_hi = keep_end / SAMPLE_RATE
+        
+        added = []
+        for segment in segments:
+            start = segment["start"] + offset
+            end = segment["end"] + offset
+            if start < keep_lo or start >= keep_hi:
+                continue
+            
+            text = segment["text"]
+            if self.segments and start < self.segments[-1]["end"]:
+                previous = self.segments[-1]
+                if previous["text"].endswith(text):
+                    continue
+                if text.startswith(previous["text"]):
+                    text = text[len(previous["text"]):].strip()
+                    start = previous["end"]
+            if not text:
+                continue
+            
+            stitched = {
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "text": text
+            }
+            self.segments.append(stitched)
+            added.append(stitched)
+        
+        return added
+
+
+def stitch_segments(
+    chunk_results: List[List[Dict[str, Any]]],
+    windows: List[Tuple[int, int, int, int]]
+) -> List[Dict[str, Any]]:
+    """
+    拼接各窗口的转录分段
+    
+    Args:
+        chunk_results: 各窗口的分段列表
+        windows: split_on_silence返回的窗口列表
+    
+    Returns:
+        全局时间轴上的分段列表
+    """
+    stitcher = SegmentStitcher()
+    for segments, window in zip(chunk_results, windows):
+        stitcher.add(segments, window)
+    return stitcher.segments
+
+
+class StreamingTranscriber:
+    """
+    流式转录会话
+    
+    持续接收16kHz单声道音频，缓冲区达到一个窗口后在静音处切分并转录，
+    逐窗口返回新增分段。窗口之间保留少量重叠，由SegmentStitcher去重。
+    """
+    
+    def __init__(
+        self,
+        service: "AsrService",
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        model: Optional[str] = None
+    ):
+        import numpy as np
+        
+        stream_config = config.asr.get("stream", {})
+        
+        self.service = service
+        self.language = language or config.asr.get("language", "zh")
+        self.task = task
+        self.model = model
+        self.window = int(stream_config.get("window_seconds", 30) * SAMPLE_RATE)
+        self.overlap = int(stream_config.get("overlap_seconds", 1) * SAMPLE_RATE)
+        self.search = int(stream_config.get("search_seconds", 5) * SAMPLE_RATE)
+        self.stitcher = SegmentStitcher()
+        
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._base = 0
+        self._keep_start = 0
+        # 上一帧末尾不足一个采样的字节，WebSocket帧不一定在采样边界结束
+        self._pcm_remainder = b""
+    
+    @property
+    def segments(self) -> List[Dict[str, Any]]:
+        """已输出的全部分段"""
+        return self.stitcher.segments
+    
+    @property
+    def text(self) -> str:
+        """已输出分段拼接后的文本"""
+        return "".join(
+            AsrService._join_text(segment["text"], self.language)
+            for segment in self.segments
+        ).strip()
+    
+    def feed_pcm16(self, data: bytes) -> List[Dict[str, Any]]:
+        """
+        输入16位小端PCM数据
+        
+        数据可以在任意字节处分块，末尾不足一个采样的字节留到下次拼接
+        
+        Args:
+            data: 16kHz单声道s16le音频字节
+        
+        Returns:
+            本次新增的分段列表
+        """
+        import numpy as np
+        
+        if self._pcm_remainder:
+            data = self._pcm_remainder + data
+        end = len(data) // 2 * 2
+        self._pcm_remainder = data[end:]
+        samples = np.frombuffer(data[:end], dtype="<i2")
+        return self.feed(samples.astype(np.float32) / 32768.0)
+    
+    def feed(self, audio) -> List[Dict[str, Any]]:
+        """
+        输入float32音频数据，缓冲区足够时转录完整窗口
+        
+        Args:
+            audio: 16kHz单声道float32音频数据
+        
+        Returns:
+            本次新增的分段列表
+        """
+        import numpy as np
+        
+        self._buffer = np.concatenate([self._buffer, audio])
+        
+        added = []
+        while self._base + len(self._buffer) - self._keep_start >= self.window + self.overlap:
+            target = self._keep_start + self.window
+            cut = self._base + find_silence(
+                self._buffer,
+                max(self._keep_start + self.window // 2, target - self.search) - self._base,
+                target - self._base
+            )
+            added.extend(self._transcribe_window(cut + self.overlap, cut))
+            
+            self._keep_start = cut
+            trim = max(0, self._keep_start - self.overlap - self._base)
+            self._buffer = self._buffer[trim:]
+            self._base += trim
+        
+        return added
+    
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        转录缓冲区中剩余的音频
+        
+        Returns:
+            本次新增的分段列表
+        """
+        end = self._base + len(self._buffer)
+        if end <= self._keep_start:
+            return []
+        
+        added = self._transcribe_window(end, end)
+        self._keep_start = end
+        return added
+    
+    def _transcribe_window(self, win_end: int, keep_end: int) -> List[Dict[str, Any]]:
+        """转录[保留区间起点-重叠, win_end)范围的音频"""
+        win_start = max(self._base, self._keep_start - self.overlap)
+        audio = self._buffer[win_start - self._base:win_end - self._base]
+        segments = self.service.transcribe_window(audio, self.language, self.task, self.model)
+        return self.stitcher.add(segments, (win_start, win_end, self._keep_start, keep_end))
 
 
 class AsrService:
     """语音识别服务类"""
     
     _instance = None
-    _model = None
+    _registry = None
     _ffmpeg_available = None
+    _chunk_pool = None
+    _loader = ModelLoader(
+        "asr",
+        enabled=config.asr.get("enabled", True),
+        preload=config.asr.get("preload", True)
+    )
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
-        if self._model is None:
-            self._load_model()
+    def load(self) -> bool:
+        """
+        加载默认Whisper模型，已加载时直接返回
+        
+        启用model_server时模型在推理进程中加载，这里只查询推理服务是否可用
+        
+        Returns:
+            模型是否可用
+        """
+        if model_client.remote("asr"):
+            return model_client.usable("asr")
+        return self._loader.ensure_loaded(self._load_model)
+    
+    @property
+    def default_model(self) -> str:
+        """默认模型名"""
+        return config.asr.get("model_size", "small")
+    
+    @property
+    def available_models(self) -> List[str]:
+        """允许按请求选择的模型名"""
+        allowed = config.asr.get("models", {}).get("allowed") or [self.default_model]
+        if self.default_model not in allowed:
+            allowed = [self.default_model, *allowed]
+        return list(allowed)
+    
+    def resolve_model(self, model: Optional[str] = None) -> str:
+        """
+        校验并解析模型名
+        
+        Args:
+            model: 请求的模型名，不指定则使用默认模型
+        
+        Returns:
+            模型名
+        """
+        if model is None:
+            return self.default_model
+        if model not in self.available_models:
+            raise ValueError(f"不支持的模型: {model}，可选: {', '.join(self.available_models)}")
+        return model
+    
+    def get_model(self, model: Optional[str] = None):
+        """
+        获取Whisper模型，未加载时加载
+        
+        Args:
+            model: 模型名，不指定则使用默认模型
+        
+        Returns:
+            Whisper模型
+        """
+        model = self.resolve_model(model)
+        if not self.load():
+            raise RuntimeError("语音识别服务不可用")
+        return self._get_registry().get(model)
+    
+    def load_state(self) -> Dict[str, Any]:
+        """获取模型加载状态"""
+        if model_client.remote("asr"):
+            return model_client.load_state("asr")
+        return self._loader.snapshot()
+    
+    def models_stats(self) -> Dict[str, Any]:
+        """获取已加载模型和内存预算信息，启用model_server时为各推理进程的信息"""
+        stats = {"default": self.default_model, "available": self.available_models}
+        if model_client.remote("asr"):
+            stats["model_server"] = model_client.workers("asr")
+        elif self._registry is not None:
+            stats.update(self._registry.stats())
+        return stats
+    
+    def _get_registry(self) -> ModelRegistry:
+        """获取Whisper模型注册表，首次使用时创建"""
+        if self._registry is None:
+            budget_mb = config.asr.get("models", {}).get("memory_budget_mb", 4096)
+            AsrService._registry = ModelRegistry(
+                "Whisper",
+                self._load_whisper,
+                budget_mb * 1024 * 1024,
+                size_func=self._model_bytes,
+                estimates={
+                    name: size * 1024 * 1024 for name, size in WHISPER_MODEL_SIZES_MB.items()
+                }
+            )
+        return self._registry
+    
+    @staticmethod
+    def _model_bytes(model) -> int:
+        """计算模型权重和缓冲区占用的字节数"""
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
     
     def _check_ffmpeg(self) -> bool:
         """
@@ -81,8 +514,8 @@ class AsrService:
         self._ffmpeg_available = False
         return self._ffmpeg_available
     
-    def _load_model(self) -> None:
-        """加载Whisper模型"""
+    def _load_model(self) -> bool:
+        """加载默认Whisper模型"""
         try:
             import whisper
             
@@ -91,48 +524,82 @@ class AsrService:
                 print("请安装ffmpeg: conda install ffmpeg -c conda-forge")
                 print("或者: pip install imageio-ffmpeg")
             
-            model_size = config.asr.get("model_size", "small")
-            model_path = config.asr.get("model_path")
-            
-            model_file = Path(model_path) / f"{model_size}.pt"
-            
-            if model_file.exists():
-                print(f"从本地加载Whisper模型: {model_file}")
-                try:
-                    self._model = whisper.load_model(str(model_file))
-                    print("Whisper模型加载完成")
-                    return
-                except Exception as e:
-                    print(f"本地模型加载失败: {e}，尝试从网络下载...")
-            
-            print(f"加载Whisper模型: {model_size}")
-            self._model = whisper.load_model(model_size)
-            print("Whisper模型加载完成")
+            self._get_registry().get(self.default_model)
+            return True
             
         except ImportError:
             print("警告: Whisper未安装，语音识别功能不可用")
-            self._model = None
         except Exception as e:
             print(f"加载Whisper模型失败: {e}")
-            self._model = None
+        return False
+    
+    def _load_whisper(self, model_size: str):
+        """
+        加载指定大小的Whisper模型，优先使用本地模型文件
+        
+        Args:
+            model_size: 模型名，如'tiny'、'small'
+        
+        Returns:
+            Whisper模型
+        """
+        import whisper
+        
+        model_path = config.asr.get("model_path")
+        model_file = Path(model_path) / f"{model_size}.pt"
+        
+        if model_file.exists():
+            print(f"从本地加载Whisper模型: {model_file}")
+            try:
+                model = whisper.load_model(str(model_file))
+                print("Whisper模型加载完成")
+                return model
+            except Exception as e:
+                print(f"本地模型加载失败: {e}，尝试从网络下载...")
+        
+        print(f"加载Whisper模型: {model_size}")
+        model = whisper.load_model(model_size)
+        print("Whisper模型加载完成")
+        return model
     
     def is_available(self) -> bool:
-        """检查服务是否可用"""
-        return self._model is not None and self._check_ffmpeg()
+        """
+        检查服务是否可用
+        
+        只检查服务是否启用、依赖是否安装，不触发模型加载；
+        启用model_server时检查推理服务是否可连接
+        """
+        if model_client.remote("asr"):
+            return model_client.usable("asr")
+        return (
+            self._loader.usable
+            and importlib.util.find_spec("whisper") is not None
+            and self._check_ffmpeg()
+        )
     
     def transcribe(
         self,
         audio_path: str,
         language: Optional[str] = None,
-        task: str = "transcribe"
+        task: str = "transcribe",
+        long_audio: Optional[bool] = False,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        content_hash: Optional[str] = None,
+        model: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         转录音频文件
         
+        相同内容和参数的请求直接返回缓存结果
+        
         Args:
             audio_path: 音频文件路径
             language: 语言代码，如'zh'、'en'
             task: 任务类型，'transcribe'为转录，'translate'为翻译为英文
+            long_audio: 长音频分段并行模式，None表示按时长自动判断
+            progress_callback: 进度回调，参数为0-1之间的进度值
+            content_hash: 文件内容哈希，不指定则读取文件计算
+            model: 模型名，如'tiny'、'small'，不指定则使用默认模型
         
         Returns:
             包含转录结果的字典
@@ -142,15 +609,105 @@ class AsrService:
         
         if language is None:
             language = config.asr.get("language", "zh")
+        model = self.resolve_model(model)
         
-        start_time = time.time()
+        cache_key = self._cache_key(audio_path, language, task, content_hash, model)
+        cached = self._cached_result(cache_key)
+        if cached is not None:
+            return cached
         
-        result = self._model.transcribe(
-            audio_path,
+        return self._transcribe_and_cache(
+            cache_key, audio_path, language, task, long_audio, progress_callback, model
+        )
+    
+    def _cache_key(
+        self,
+        audio_path: str,
+        language: str,
+        task: str,
+        content_hash: Optional[str],
+        model: str
+    ) -> str:
+        """生成转录结果的缓存键"""
+        return result_cache.make_key(
+            "asr",
+            content_hash or file_sha256(audio_path),
             language=language,
             task=task,
-            verbose=False
+            model=model
         )
+    
+    def _cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的转录结果"""
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            cached["cached"] = True
+        return cached
+    
+    def _transcribe_and_cache(self, cache_key: str, *args: Any) -> Dict[str, Any]:
+        """执行转录并写入缓存，参数同_transcribe"""
+        result = self._transcribe(*args)
+        result_cache.put(cache_key, result)
+        return result
+    
+    def _transcribe(
+        self,
+        audio_path: str,
+        language: str,
+        task: str,
+        long_audio: Optional[bool],
+        progress_callback: Optional[Callable[[float], None]],
+        model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """执行转录，参数同transcribe；启用model_server时在推理进程中执行"""
+        if model_client.remote("asr"):
+            return model_client.call(
+                "asr", "_transcribe", audio_path, language, task, long_audio,
+                progress_callback=progress_callback, model=model
+            )
+        
+        start_time = time.time()
+        model = self.resolve_model(model)
+        
+        if long_audio is not False and self._long_audio_workers() > 1:
+            import whisper
+            
+            with metrics.stage("asr", "decode"):
+                audio = whisper.load_audio(audio_path)
+            threshold = config.asr.get("long_audio", {}).get("threshold_seconds", 600)
+            
+            if long_audio or len(audio) >= threshold * SAMPLE_RATE:
+                with metrics.stage("asr", "inference"):
+                    segments = self._transcribe_chunked(
+                        audio, language, task, progress_callback, model
+                    )
+                
+                return {
+                    "text": "".join(
+                        self._join_text(segment["text"], language) for segment in segments
+                    ).strip(),
+                    "language": language,
+                    "segments": segments,
+                    "duration": time.time() - start_time,
+                    "model": model
+                }
+            
+            with metrics.stage("asr", "inference"):
+                result = self.get_model(model).transcribe(
+                    audio,
+                    language=language,
+                    task=task,
+                    verbose=False
+                )
+        else:
+            # 直接传入文件路径时解码在whisper内部完成，计入推理耗时
+            with metrics.stage("asr", "inference"):
+                result = self.get_model(model).transcribe(
+                    audio_path,
+                    language=language,
+                    task=task,
+                    verbose=False
+                )
         
         duration = time.time() - start_time
         
@@ -166,31 +723,231 @@ class AsrService:
             "text": result["text"].strip(),
             "language": result.get("language", language),
             "segments": segments,
-            "duration": duration
+            "duration": duration,
+            "model": model
+        }
+    
+    def transcribe_window(
+        self,
+        audio,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        model: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        转录内存中的一段音频
+        
+        Args:
+            audio: 16kHz单声道float32音频数据
+            language: 语言代码
+            task: 任务类型
+            model: 模型名，不指定则使用默认模型
+        
+        Returns:
+            分段列表，时间戳相对音频起点
+        """
+        if not self.is_available():
+            raise RuntimeError("语音识别服务不可用")
+        if model_client.remote("asr"):
+            return model_client.call("asr", "transcribe_window", audio, language, task, model)
+        
+        result = self.get_model(model).transcribe(
+            audio,
+            language=language,
+            task=task,
+            verbose=False
+        )
+        
+        return [
+            {
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"].strip()
+            }
+            for segment in result.get("segments", [])
+        ]
+    
+    def iter_transcribe(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        model: Optional[str] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        逐窗口转录音频文件
+        
+        Args:
+            audio_path: 音频文件路径
+            language: 语言代码
+            task: 任务类型
+            model: 模型名，不指定则使用默认模型
+        
+        Yields:
+            每个窗口新增的分段列表
+        """
+        import whisper
+        
+        audio = whisper.load_audio(audio_path)
+        session = StreamingTranscriber(self, language, task, model)
+        
+        for pos in range(0, len(audio), session.window):
+            added = session.feed(audio[pos:pos + session.window])
+            if added:
+                yield added
+        
+        added = session.finish()
+        if added:
+            yield added
+    
+    def _long_audio_workers(self) -> int:
+        """获取长音频模式的并行进程数"""
+        return int(config.asr.get("long_audio", {}).get("workers", 1))
+    
+    def _get_chunk_pool(self) -> ProcessPoolExecutor:
+        """
+        获取长音频分段转录进程池
+        每个子进程各自加载一份Whisper模型，首次使用时创建
+        """
+        if self._chunk_pool is None:
+            workers = self._long_audio_workers()
+            num_threads = max(1, (os.cpu_count() or 1) // workers)
+            AsrService._chunk_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chunk_worker,
+                initargs=(num_threads,)
+            )
+        return self._chunk_pool
+    
+    def _transcribe_chunked(
+        self,
+        audio,
+        language: Optional[str],
+        task: str,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        model: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        分段并行转录长音频
+        
+        Args:
+            audio: 16kHz单声道float32音频数据
+            language: 语言代码
+            task: 任务类型
+            progress_callback: 进度回调
+            model: 模型名
+        
+        Returns:
+            拼接后的分段列表
+        """
+        from concurrent.futures import as_completed
+        
+        long_config = config.asr.get("long_audio", {})
+        windows = split_on_silence(
+            audio,
+            chunk_seconds=long_config.get("chunk_seconds", 300),
+            overlap_seconds=long_config.get("overlap_seconds", 2),
+            search_seconds=long_config.get("search_seconds", 30)
+        )
+        
+        pool = self._get_chunk_pool()
+        futures = {
+            pool.submit(_transcribe_chunk, audio[win_start:win_end], language, task, model): index
+            for index, (win_start, win_end, _, _) in enumerate(windows)
         }
+        
+        chunk_results: List[List[Dict[str, Any]]] = [[] for _ in windows]
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                chunk_results[futures[future]] = future.result()
+                if progress_callback is not None:
+                    progress_callback(done / len(windows))
+        except BrokenProcessPool:
+            AsrService._chunk_pool = None
+            raise RuntimeError("长音频转录子进程异常退出")
+        finally:
+            for future in futures:
+                future.cancel()
+        
+        return stitch_segments(chunk_results, windows)
+    
+    @staticmethod
+    def _join_text(text: str, language: Optional[str]) -> str:
+        """按语言拼接分段文本，中日韩文本不插入空格"""
+        if language in ("zh", "ja", "ko"):
+            return text
+        return " " + text
+    
+    def shutdown(self) -> None:
+        """关闭长音频转录进程池"""
+        if self._chunk_pool is not None:
+            self._chunk_pool.shutdown(wait=False, cancel_futures=True)
+            AsrService._chunk_pool = None
     
     async def transcribe_async(
         self,
         audio_path: str,
         language: Optional[str] = None,
-        task: str = "transcribe"
+        task: str = "transcribe",
+        long_audio: Optional[bool] = False,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        content_hash: Optional[str] = None,
+        model: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL,
+        task_id: Optional[str] = None,
+        on_start: Optional[Callable[[], None]] = None
     ) -> Dict[str, Any]:
         """
         异步转录音频文件
         
+        先查询缓存，未命中时提交到ASR工作池排队执行；同一音频以相同参数
+        的转录正在进行时，等待并复用它的结果
+        
         Args:
             audio_path: 音频文件路径
             language: 语言代码
             task: 任务类型
+            long_audio: 长音频分段并行模式
+            progress_callback: 进度回调
+            content_hash: 文件内容哈希
+            model: 模型名
+            priority: 调度优先级，数值越小越先执行
+            task_id: 关联的异步任务ID
+            on_start: 开始执行时的回调
         
         Returns:
             包含转录结果的字典
         """
+        if not self.is_available():
+            raise RuntimeError("语音识别服务不可用")
+        
+        if language is None:
+            language = config.asr.get("language", "zh")
+        model = self.resolve_model(model)
+        
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None,
-            lambda: self.transcribe(audio_path, language, task)
+        cache_key = await loop.run_in_executor(
+            None, self._cache_key, audio_path, language, task, content_hash, model
+        )
+        cached = await loop.run_in_executor(None, self._cached_result, cache_key)
+        if cached is not None:
+            return cached
+        
+        result, shared = await single_flight.run(
+            cache_key,
+            lambda started, progress: job_scheduler.run(
+                "asr",
+                self._transcribe_and_cache,
+                cache_key, audio_path, language, task, long_audio, progress, model,
+                priority=priority,
+                task_id=task_id,
+                on_start=started
+            ),
+            on_start=on_start,
+            progress_callback=progress_callback
         )
+        return {**result, "shared": True} if shared else result
 
 
 asr_service = AsrService()
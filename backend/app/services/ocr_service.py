@@ -5,61 +5,328 @@ OCR识别服务模块
 import os
 import time
 import asyncio
+import hashlib
+import importlib.util
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Tuple
 
 from backend.app.config import config
+from backend.app.utils.cache import result_cache, file_sha256
+from backend.app.utils.scheduler import job_scheduler, PRIORITY_NORMAL
+from backend.app.utils.singleflight import single_flight
+from backend.app.utils.metrics import metrics
+from backend.app.utils.model_loader import ModelLoader
+from backend.app.utils.engine_pool import EnginePool
+from backend.app.utils.model_server import model_client
+from backend.app.utils.image_preprocess import (
+    PreparedImage, get_preprocess_config, prepare_image, prepare_array,
+    split_tiles, merge_tile_lines, scale_lines
+)
+
+
+def sorted_boxes(dt_boxes) -> List[Any]:
+    """
+    将检测框按从上到下、从左到右的阅读顺序排序
+    
+    Args:
+        dt_boxes: 检测框数组，每个框为4x2的顶点坐标
+    
+    Returns:
+        排序后的检测框列表
+    """
+    boxes = sorted(dt_boxes, key=lambda box: (box[0][1], box[0][0]))
+    for i in range(len(boxes) - 1):
+        for j in range(i, -1, -1):
+            if abs(boxes[j + 1][0][1] - boxes[j][0][1]) < 10 and boxes[j + 1][0][0] < boxes[j][0][0]:
+                boxes[j], boxes[j + 1] = boxes[j + 1], boxes[j]
+            else:
+                break
+    return boxes
+
+
+def crop_text_line(image, box):
+    """
+    按检测框透视变换裁剪出文本行，竖排文本旋转为横排
+    
+    Args:
+        image: BGR图片数组
+        box: 4x2的顶点坐标
+    
+    Returns:
+        文本行图片数组
+    """
+    import cv2
+    import numpy as np
+    
+    points = np.asarray(box, dtype=np.float32)
+    width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+    height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+    target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    
+    crop = cv2.warpPerspective(
+        image,
+        cv2.getPerspectiveTransform(points, target),
+        (max(width, 1), max(height, 1)),
+        borderMode=cv2.BORDER_REPLICATE,
+        flags=cv2.INTER_CUBIC
+    )
+    if crop.shape[0] * 1.0 / crop.shape[1] >= 1.5:
+        crop = np.rot90(crop)
+    return crop
 
 
 class OcrService:
     """OCR识别服务类"""
     
     _instance = None
-    _ocr = None
+    _pool = None
+    _loader = ModelLoader(
+        "ocr",
+        enabled=config.ocr.get("enabled", True),
+        preload=config.ocr.get("preload", True)
+    )
+    
+    # 档位的模型组没有配置请求语言时使用的模型组
+    DEFAULT_MODELS = "light"
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
     
-    def __init__(self):
-        if self._ocr is None:
-            self._load_model()
+    def load(self) -> bool:
+        """
+        加载默认语言的PaddleOCR模型，已加载时直接返回
+        
+        启用model_server时模型在推理进程中加载，这里只查询推理服务是否可用
+        
+        Returns:
+            模型是否可用
+        """
+        if model_client.remote("ocr"):
+            return model_client.usable("ocr")
+        return self._loader.ensure_loaded(self._load_model)
+    
+    @staticmethod
+    def resolve_language(language: Optional[str] = None) -> str:
+        """解析语言代码，不指定时使用配置的默认语言"""
+        return language or config.ocr.get("lang", "ch")
+    
+    @property
+    def default_profile(self) -> str:
+        """默认识别档位"""
+        return config.ocr.get("profile", "balanced")
+    
+    @property
+    def available_profiles(self) -> List[str]:
+        """可按请求选择的识别档位"""
+        return list(config.ocr.get("profiles", {}))
+    
+    def resolve_profile(self, profile: Optional[str] = None) -> str:
+        """
+        校验并解析识别档位
+        
+        Args:
+            profile: 请求的档位名，不指定则使用默认档位
+        
+        Returns:
+            档位名
+        """
+        if profile is None:
+            return self.default_profile
+        if profile not in self.available_profiles:
+            raise ValueError(f"不支持的识别档位: {profile}，可选: {', '.join(self.available_profiles)}")
+        return profile
+    
+    def profile_settings(self, profile: Optional[str] = None) -> Dict[str, Any]:
+        """
+        获取识别档位的参数
+        
+        Args:
+            profile: 档位名，不指定则使用默认档位
+        
+        Returns:
+            包含use_angle_cls、det_limit_side_len、rec_batch_num和models的字典
+        """
+        settings = {
+            "use_angle_cls": True,
+            "det_limit_side_len": 960,
+            "rec_batch_num": 6,
+            "models": self.DEFAULT_MODELS
+        }
+        settings.update(config.ocr.get("profiles", {}).get(self.resolve_profile(profile)) or {})
+        return settings
+    
+    def resolve_models(self, language: Optional[str] = None, profile: Optional[str] = None) -> str:
+        """
+        获取语言和档位实际使用的模型组
+        
+        ocr.models中的模型组按语言配置模型目录，配置为空的模型组使用PaddleOCR各语言的默认模型。
+        档位的模型组没有配置该语言时退回DEFAULT_MODELS，避免把其他语言的识别模型和该语言的字典混用
+        
+        Args:
+            language: 语言代码，不指定则使用默认语言
+            profile: 识别档位，不指定则使用默认档位
+        
+        Returns:
+            模型组名
+        """
+        models = self.profile_settings(profile)["models"]
+        group = config.ocr.get("models", {}).get(models)
+        if group and self.resolve_language(language) not in group:
+            return self.DEFAULT_MODELS
+        return models
+    
+    @contextmanager
+    def engine(self, language: Optional[str] = None, profile: Optional[str] = None):
+        """
+        借出PaddleOCR实例，用with语句使用，结束后自动归还
+        
+        引擎按语言和档位使用的模型组区分，检测尺寸上限和识别批大小在
+        借出时按档位设置，同一模型组的档位共用引擎实例
+        
+        Args:
+            language: 语言代码，不指定则使用默认语言
+            profile: 识别档位，不指定则使用默认档位
+        
+        Yields:
+            PaddleOCR实例
+        """
+        if not self.load():
+            raise RuntimeError("OCR服务不可用")
+        settings = self.profile_settings(profile)
+        key = self._engine_key(self.resolve_language(language), self.resolve_models(language, profile))
+        with self._get_pool().acquire(key) as engine:
+            self._apply_profile(engine, settings)
+            yield engine
     
-    def _load_model(self) -> None:
-        """加载PaddleOCR模型"""
+    def max_parallel(self, language: Optional[str] = None, profile: Optional[str] = None) -> int:
+        """同一语言和档位可同时识别的图片数，即对应引擎的最大实例数"""
+        key = self._engine_key(self.resolve_language(language), self.resolve_models(language, profile))
+        return self._get_pool().max_instances(key)
+    
+    @staticmethod
+    def _engine_key(language: str, models: str) -> str:
+        """引擎池的键，由语言和模型组组成"""
+        return f"{language}/{models}"
+    
+    @staticmethod
+    def _apply_profile(engine, settings: Dict[str, Any]) -> None:
+        """按档位设置引擎的检测尺寸上限和识别批大小"""
+        detector = getattr(engine, "text_detector", None)
+        for op in getattr(detector, "preprocess_op", None) or []:
+            if hasattr(op, "limit_side_len"):
+                op.limit_side_len = settings["det_limit_side_len"]
+        recognizer = getattr(engine, "text_recognizer", None)
+        if recognizer is not None:
+            recognizer.rec_batch_num = settings["rec_batch_num"]
+    
+    def load_state(self) -> Dict[str, Any]:
+        """获取模型加载状态"""
+        if model_client.remote("ocr"):
+            return model_client.load_state("ocr")
+        return self._loader.snapshot()
+    
+    def engines_stats(self) -> Dict[str, Any]:
+        """获取各语言引擎实例的统计信息，启用model_server时为各推理进程的信息"""
+        if model_client.remote("ocr"):
+            return {"model_server": model_client.workers("ocr")}
+        return self._pool.stats() if self._pool is not None else {}
+    
+    def profiles_stats(self) -> Dict[str, Any]:
+        """获取默认档位和各档位参数"""
+        return {
+            "default": self.default_profile,
+            "available": {name: self.profile_settings(name) for name in self.available_profiles}
+        }
+    
+    def _get_pool(self) -> EnginePool:
+        """获取按语言和模型组划分的PaddleOCR引擎池，首次使用时创建"""
+        if self._pool is None:
+            engines_config = config.ocr.get("engines", {})
+            instances = engines_config.get("instances") or {}
+            OcrService._pool = EnginePool(
+                "PaddleOCR",
+                self._create_engine,
+                engines_config.get("memory_budget_mb", 2048) * 1024 * 1024,
+                engines_config.get("memory_per_engine_mb", 500) * 1024 * 1024,
+                max_instances=lambda key: instances.get(key.split("/")[0]),
+                default_instances=engines_config.get("default_instances", 1),
+                idle_seconds=engines_config.get("idle_minutes", 10) * 60,
+                pinned=[self._engine_key(self.resolve_language(), self.resolve_models())]
+            )
+        return self._pool
+    
+    def _create_engine(self, key: str):
+        """
+        创建PaddleOCR实例
+        
+        Args:
+            key: 引擎键，如'ch/light'，由语言代码和resolve_models返回的模型组名组成
+        
+        Returns:
+            PaddleOCR实例
+        """
+        from paddleocr import PaddleOCR
+        
+        lang, models = key.split("/", 1)
+        options = dict((config.ocr.get("models", {}).get(models) or {}).get(lang) or {})
+        for name in ("det_model_dir", "rec_model_dir", "cls_model_dir"):
+            if options.get(name):
+                options[name] = os.path.join(config.paths["models"], options[name])
+        
+        print(f"加载PaddleOCR模型: {lang}（{models}）")
+        return PaddleOCR(lang=lang, use_angle_cls=True, **options)
+    
+    def _load_model(self) -> bool:
+        """加载默认语言和默认档位的PaddleOCR模型"""
         try:
-            from paddleocr import PaddleOCR
-            
-            lang = config.ocr.get("lang", "ch")
+            import paddleocr
             
             print("加载PaddleOCR模型...")
-            self._ocr = PaddleOCR(lang=lang)
+            key = self._engine_key(self.resolve_language(), self.resolve_models())
+            with self._get_pool().acquire(key):
+                pass
             print("PaddleOCR模型加载完成")
+            return True
             
         except ImportError:
             print("警告: PaddleOCR未安装，OCR功能不可用")
             print("请安装: pip install paddleocr")
-            self._ocr = None
         except Exception as e:
             print(f"加载PaddleOCR模型失败: {e}")
-            self._ocr = None
+        return False
     
     def is_available(self) -> bool:
-        """检查服务是否可用"""
-        return self._ocr is not None
+        """
+        检查服务是否可用
+        
+        只检查服务是否启用、依赖是否安装，不触发模型加载；
+        启用model_server时检查推理服务是否可连接
+        """
+        if model_client.remote("ocr"):
+            return model_client.usable("ocr")
+        return self._loader.usable and importlib.util.find_spec("paddleocr") is not None
     
     def recognize(
         self,
         image_path: str,
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        profile: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         识别图片中的文字
         
+        相同内容和参数的请求直接返回缓存结果
+        
         Args:
             image_path: 图片文件路径
             language: 语言代码，如'ch'、'en'
+            content_hash: 文件内容哈希，不指定则读取文件计算
+            profile: 识别档位，如'fast'、'balanced'、'accurate'
         
         Returns:
             包含识别结果的字典
@@ -67,37 +334,303 @@ class OcrService:
         if not self.is_available():
             raise RuntimeError("OCR服务不可用")
         
+        language = self.resolve_language(language)
+        profile = self.resolve_profile(profile)
+        
+        cache_key = self._cache_key(image_path, language, content_hash, profile)
+        cached = self._cached_result(cache_key)
+        if cached is not None:
+            return cached
+        
+        return self._recognize_and_cache(cache_key, image_path, language, profile)
+    
+    def _cache_key(
+        self,
+        image_path: str,
+        language: Optional[str],
+        content_hash: Optional[str],
+        profile: Optional[str] = None
+    ) -> str:
+        """生成识别结果的缓存键"""
+        return result_cache.make_key(
+            "ocr",
+            content_hash or file_sha256(image_path),
+            language=self.resolve_language(language),
+            profile=self.resolve_profile(profile),
+            models=self.resolve_models(language, profile)
+        )
+    
+    def _cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的识别结果"""
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            cached["cached"] = True
+        return cached
+    
+    def _recognize_and_cache(
+        self,
+        cache_key: str,
+        image_path: str,
+        language: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """读取图片文件后执行识别并写入缓存"""
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        return self._recognize_bytes_and_cache(cache_key, data, language, profile)
+    
+    def recognize_bytes(
+        self,
+        data: bytes,
+        language: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        识别内存中的图片，不经过磁盘
+        
+        Args:
+            data: 图片文件的字节内容
+            language: 语言代码
+            content_hash: 内容哈希，不指定则根据data计算
+            profile: 识别档位
+        
+        Returns:
+            包含识别结果的字典
+        """
+        if not self.is_available():
+            raise RuntimeError("OCR服务不可用")
+        
+        language = self.resolve_language(language)
+        profile = self.resolve_profile(profile)
+        
+        cache_key = self._bytes_cache_key(data, language, content_hash, profile)
+        cached = self._cached_result(cache_key)
+        if cached is not None:
+            return cached
+        
+        return self._recognize_bytes_and_cache(cache_key, data, language, profile)
+    
+    def _bytes_cache_key(
+        self,
+        data: bytes,
+        language: Optional[str],
+        content_hash: Optional[str],
+        profile: Optional[str] = None
+    ) -> str:
+        """生成内存图片识别结果的缓存键，与同内容文件的缓存键相同"""
+        return result_cache.make_key(
+            "ocr",
+            content_hash or hashlib.sha256(data).hexdigest(),
+            language=self.resolve_language(language),
+            profile=self.resolve_profile(profile),
+            models=self.resolve_models(language, profile)
+        )
+    
+    def _recognize_bytes_and_cache(
+        self,
+        cache_key: str,
+        data: bytes,
+        language: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """预处理图片后执行识别并写入缓存"""
+        try:
+            with metrics.stage("ocr", "decode"):
+                prepared = prepare_image(data)
+        except Exception as e:
+            raise ValueError(f"无法解码图片: {e}")
+        
+        result = self._recognize(prepared, language, profile)
+        result_cache.put(cache_key, result)
+        return result
+    
+    def recognize_image(
+        self,
+        image,
+        language: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        识别已解码的图片，如PDF渲染出的页面，不经过缓存
+        
+        Args:
+            image: BGR格式的numpy数组
+            language: 语言代码
+            profile: 识别档位
+        
+        Returns:
+            包含识别结果的字典
+        """
+        if not self.is_available():
+            raise RuntimeError("OCR服务不可用")
+        return self._recognize(prepare_array(image), language, profile)
+    
+    def _recognize(
+        self,
+        prepared: PreparedImage,
+        language: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        执行识别
+        
+        缩小过的图片识别后把检测框还原到原图坐标；切块的大图由多个引擎
+        实例并行识别各块，再合并为整图结果。启用model_server时预处理后的
+        图片发送到推理进程识别
+        
+        Args:
+            prepared: 预处理后的图片
+            language: 语言代码
+            profile: 识别档位
+        
+        Returns:
+            包含识别结果的字典
+        """
+        if model_client.remote("ocr"):
+            return model_client.call("ocr", "_recognize", prepared, language, profile)
+        
+        language = self.resolve_language(language)
+        profile = self.resolve_profile(profile)
         start_time = time.time()
         
-        result = self._ocr.ocr(image_path, cls=True)
+        tiles = self._split(prepared)
+        with metrics.stage("ocr", "inference"):
+            if len(tiles) == 1:
+                with self.engine(language, profile) as engine:
+                    result = engine.ocr(prepared.image, cls=self.profile_settings(profile)["use_angle_cls"])
+                tile_lines = [result[0] if result else None]
+            else:
+                tile_lines = self._recognize_tiles(tiles, language, profile)
         
         duration = time.time() - start_time
         
+        output = self._format_result(self._assemble(prepared, tiles, tile_lines), duration)
+        output["language"] = language
+        output["profile"] = profile
+        output["models"] = self.resolve_models(language, profile)
+        output["preprocess"] = self._preprocess_info(prepared, len(tiles))
+        return output
+    
+    @staticmethod
+    def _split(prepared: PreparedImage) -> List[Tuple[int, int, Any]]:
+        """按预处理结果切块，不需要切块时整张图片作为一块"""
+        if not prepared.tiled:
+            return [(0, 0, prepared.image)]
+        prep_config = get_preprocess_config()
+        return split_tiles(
+            prepared.image,
+            int(prep_config.get("tile_size", 2048)),
+            int(prep_config.get("tile_overlap", 256))
+        )
+    
+    @staticmethod
+    def _assemble(
+        prepared: PreparedImage,
+        tiles: List[Tuple[int, int, Any]],
+        tile_lines: List[Optional[List[Any]]]
+    ) -> List[List[Any]]:
+        """将各块的行结果合并并还原到原图坐标"""
+        if not prepared.tiled:
+            return scale_lines(tile_lines[0] or [], prepared.scale)
+        return merge_tile_lines(
+            [
+                (x, y, tile.shape[1], tile.shape[0], lines or [])
+                for (x, y, tile), lines in zip(tiles, tile_lines)
+            ],
+            int(get_preprocess_config().get("tile_overlap", 256)),
+            prepared.original_size
+        )
+    
+    @staticmethod
+    def _preprocess_info(prepared: PreparedImage, tile_count: int) -> Dict[str, Any]:
+        """预处理信息，随识别结果返回"""
+        return {
+            "original_size": list(prepared.original_size),
+            "scale": round(prepared.scale, 4),
+            "tiles": tile_count
+        }
+    
+    def _recognize_tiles(
+        self,
+        tiles: List[Tuple[int, int, Any]],
+        language: str,
+        profile: str
+    ) -> List[List[Any]]:
+        """
+        并行识别切块
+        
+        切块分为若干组，每组借用一个引擎实例完成检测和合批识别，并行组数
+        不超过tile_workers和该语言的最大引擎实例数
+        
+        Args:
+            tiles: [(左上角x, 左上角y, 块图片), ...]
+            language: 语言代码
+            profile: 识别档位
+        
+        Returns:
+            与切块顺序一致的行结果列表
+        """
+        settings = self.profile_settings(profile)
+        workers = min(
+            len(tiles),
+            max(1, int(get_preprocess_config().get("tile_workers", 2))),
+            self.max_parallel(language, profile)
+        )
+        groups = [list(range(len(tiles)))[offset::workers] for offset in range(workers)]
+        
+        def run_group(indexes: List[int]) -> List[List[Any]]:
+            with self.engine(language, profile) as engine:
+                lines, errors = self._recognize_units(
+                    engine, [tiles[index][2] for index in indexes], settings["use_angle_cls"]
+                )
+            if errors:
+                raise RuntimeError(next(iter(errors.values())))
+            return lines
+        
+        tile_lines: List[List[Any]] = [[] for _ in tiles]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-tile") as executor:
+            for indexes, lines in zip(groups, executor.map(run_group, groups)):
+                for index, tile_result in zip(indexes, lines):
+                    tile_lines[index] = tile_result
+        return tile_lines
+    
+    @staticmethod
+    def _format_result(lines: Optional[List[Any]], duration: float) -> Dict[str, Any]:
+        """
+        将PaddleOCR的行结果整理为识别结果字典
+        
+        Args:
+            lines: [[检测框, (文本, 置信度)], ...]
+            duration: 识别耗时
+        
+        Returns:
+            包含识别结果的字典
+        """
         text_results = []
         all_text = []
         total_confidence = 0
         text_count = 0
         
-        if result and result[0]:
-            for line in result[0]:
-                if line is None:
-                    continue
-                try:
-                    box = line[0]
-                    text = line[1][0]
-                    confidence = line[1][1]
-                    
-                    text_results.append({
-                        "text": text,
-                        "box": box,
-                        "confidence": round(float(confidence), 4)
-                    })
-                    all_text.append(text)
-                    total_confidence += float(confidence)
-                    text_count += 1
-                except (IndexError, TypeError) as e:
-                    print(f"解析OCR结果失败: {e}")
-                    continue
+        for line in lines or []:
+            if line is None:
+                continue
+            try:
+                box = line[0]
+                text = line[1][0]
+                confidence = line[1][1]
+                
+                text_results.append({
+                    "text": text,
+                    "box": box,
+                    "confidence": round(float(confidence), 4)
+                })
+                all_text.append(text)
+                total_confidence += float(confidence)
+                text_count += 1
+            except (IndexError, TypeError) as e:
+                print(f"解析OCR结果失败: {e}")
+                continue
         
         avg_confidence = total_confidence / text_count if text_count > 0 else 0
         
@@ -111,50 +644,328 @@ class OcrService:
     def recognize_batch(
         self,
         image_paths: List[str],
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        content_hashes: Optional[List[Optional[str]]] = None,
+        profile: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         批量识别多张图片
         
+        命中缓存的图片直接返回，其余图片每batch.max_images张为一组，
+        先逐张检测文本框，再把整组的文本行合在一起送入识别模型，
+        使识别批次尽量填满。
+        
         Args:
             image_paths: 图片文件路径列表
             language: 语言代码
+            content_hashes: 与图片一一对应的内容哈希，不指定则读取文件计算
+            profile: 识别档位
         
         Returns:
-            识别结果列表
+            与输入顺序一致的识别结果列表，失败的图片包含error字段
         """
-        results = []
-        for path in image_paths:
+        if not self.is_available():
+            raise RuntimeError("OCR服务不可用")
+        
+        profile = self.resolve_profile(profile)
+        content_hashes = content_hashes or [None] * len(image_paths)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(image_paths)
+        pending = []
+        
+        for index, (path, content_hash) in enumerate(zip(image_paths, content_hashes)):
+            try:
+                cache_key = self._cache_key(path, language, content_hash, profile)
+            except OSError as e:
+                results[index] = {"error": str(e)}
+                continue
+            cached = self._cached_result(cache_key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, cache_key))
+        
+        max_images = max(1, int(config.ocr.get("batch", {}).get("max_images", 16)))
+        for offset in range(0, len(pending), max_images):
+            group = pending[offset:offset + max_images]
             try:
-                result = self.recognize(path, language)
-                result["image_path"] = path
-                results.append(result)
+                group_results = self._recognize_many(
+                    [image_paths[index] for index, _ in group], language, profile
+                )
             except Exception as e:
-                results.append({
-                    "image_path": path,
-                    "error": str(e)
-                })
+                group_results = [{"error": str(e)} for _ in group]
+            
+            for (index, cache_key), result in zip(group, group_results):
+                if "error" not in result:
+                    result_cache.put(cache_key, result)
+                results[index] = result
+        
+        for path, result in zip(image_paths, results):
+            result["image_path"] = path
+        return results
+    
+    def _recognize_many(
+        self,
+        image_paths: List[str],
+        language: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        对一组图片执行检测和合批识别，启用model_server时在推理进程中执行
+        
+        Args:
+            image_paths: 图片文件路径列表
+            language: 语言代码
+            profile: 识别档位
+        
+        Returns:
+            与输入顺序一致的识别结果列表，单张图片读取或检测失败时包含error字段
+        """
+        if model_client.remote("ocr"):
+            return model_client.call("ocr", "_recognize_many", image_paths, language, profile)
+        
+        language = self.resolve_language(language)
+        profile = self.resolve_profile(profile)
+        with self.engine(language, profile) as engine:
+            results = self._detect_and_recognize(
+                engine, image_paths, self.profile_settings(profile)["use_angle_cls"]
+            )
+        models = self.resolve_models(language, profile)
+        for result in results:
+            if "error" not in result:
+                result["language"] = language
+                result["profile"] = profile
+                result["models"] = models
+        return results
+    
+    def _detect_and_recognize(
+        self,
+        engine,
+        image_paths: List[str],
+        use_cls: bool = True
+    ) -> List[Dict[str, Any]]:
+        """使用一个PaddleOCR实例完成一组图片的检测和合批识别，大图的各块一并送入"""
+        start_time = time.time()
+        
+        errors: Dict[int, str] = {}
+        prepared: Dict[int, PreparedImage] = {}
+        tiles: Dict[int, List[Tuple[int, int, Any]]] = {}
+        units = []
+        owners = []
+        
+        for index, path in enumerate(image_paths):
+            try:
+                with open(path, 'rb') as f, metrics.stage("ocr", "decode"):
+                    prepared[index] = prepare_image(f.read())
+            except Exception as e:
+                errors[index] = f"图片读取或检测失败: {e}"
+                continue
+            tiles[index] = self._split(prepared[index])
+            for _, _, tile in tiles[index]:
+                units.append(tile)
+                owners.append(index)
+        
+        with metrics.stage("ocr", "inference"):
+            unit_lines, unit_errors = self._recognize_units(engine, units, use_cls)
+        for unit_index, error in unit_errors.items():
+            errors.setdefault(owners[unit_index], error)
+        
+        lines: Dict[int, List[List[Any]]] = {index: [] for index in prepared}
+        for index, result in zip(owners, unit_lines):
+            lines[index].append(result)
+        
+        # 检测和识别在整组内交错进行，耗时按图片平均分摊
+        duration = (time.time() - start_time) / len(image_paths)
+        
+        results = []
+        for index in range(len(image_paths)):
+            if index in errors:
+                results.append({"error": errors[index]})
+                continue
+            result = self._format_result(
+                self._assemble(prepared[index], tiles[index], lines[index]), duration
+            )
+            result["preprocess"] = self._preprocess_info(prepared[index], len(tiles[index]))
+            results.append(result)
         return results
     
+    def _recognize_units(
+        self,
+        engine,
+        images: List[Any],
+        use_cls: bool = True
+    ) -> Tuple[List[List[Any]], Dict[int, str]]:
+        """
+        逐张检测文本框，再把全部文本行合在一起识别
+        
+        Args:
+            engine: PaddleOCR实例
+            images: BGR图片数组列表
+            use_cls: 是否使用方向分类器
+        
+        Returns:
+            (与输入顺序一致的行结果列表, 检测失败的图片序号到错误信息的映射)
+        """
+        errors: Dict[int, str] = {}
+        crops = []
+        owners = []
+        
+        for index, image in enumerate(images):
+            try:
+                dt_boxes, _ = engine.text_detector(image)
+            except Exception as e:
+                errors[index] = f"图片读取或检测失败: {e}"
+                continue
+            if dt_boxes is None:
+                continue
+            for box in sorted_boxes(dt_boxes):
+                crops.append(crop_text_line(image, box))
+                owners.append((index, box))
+        
+        if crops and use_cls and getattr(engine, "use_angle_cls", False):
+            crops, _, _ = engine.text_classifier(crops)
+        rec_res, _ = engine.text_recognizer(crops) if crops else ([], 0)
+        
+        drop_score = getattr(engine, "drop_score", 0.5)
+        lines: List[List[Any]] = [[] for _ in images]
+        for (index, box), (text, score) in zip(owners, rec_res):
+            if score >= drop_score:
+                lines[index].append([box.tolist(), (text, score)])
+        return lines, errors
+    
     async def recognize_async(
         self,
         image_path: str,
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        profile: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL,
+        task_id: Optional[str] = None,
+        on_start: Optional[Callable[[], None]] = None
     ) -> Dict[str, Any]:
         """
         异步识别图片文字
         
+        先查询缓存，未命中时提交到OCR工作池排队执行，相同请求进行中时
+        等待其结果
+        
         Args:
             image_path: 图片文件路径
             language: 语言代码
+            content_hash: 文件内容哈希
+            profile: 识别档位
+            priority: 调度优先级，数值越小越先执行
+            task_id: 关联的异步任务ID
+            on_start: 开始执行时的回调
         
         Returns:
             识别结果字典
         """
+        if not self.is_available():
+            raise RuntimeError("OCR服务不可用")
+        
+        language = self.resolve_language(language)
+        profile = self.resolve_profile(profile)
+        
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None,
-            lambda: self.recognize(image_path, language)
+        cache_key = await loop.run_in_executor(
+            None, self._cache_key, image_path, language, content_hash, profile
+        )
+        cached = await loop.run_in_executor(None, self._cached_result, cache_key)
+        if cached is not None:
+            return cached
+        
+        result, shared = await single_flight.run(
+            cache_key,
+            lambda started, _: job_scheduler.run(
+                "ocr",
+                self._recognize_and_cache,
+                cache_key, image_path, language, profile,
+                priority=priority,
+                task_id=task_id,
+                on_start=started
+            ),
+            on_start=on_start
+        )
+        return {**result, "shared": True} if shared else result
+    
+    async def recognize_bytes_async(
+        self,
+        data: bytes,
+        language: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        profile: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL
+    ) -> Dict[str, Any]:
+        """
+        异步识别内存中的图片
+        
+        先查询缓存，未命中时提交到OCR工作池，在工作线程中解码和识别；
+        相同请求进行中时等待其结果
+        
+        Args:
+            data: 图片文件的字节内容
+            language: 语言代码
+            content_hash: 内容哈希
+            profile: 识别档位
+            priority: 调度优先级，数值越小越先执行
+        
+        Returns:
+            识别结果字典
+        """
+        if not self.is_available():
+            raise RuntimeError("OCR服务不可用")
+        
+        language = self.resolve_language(language)
+        profile = self.resolve_profile(profile)
+        
+        loop = asyncio.get_event_loop()
+        cache_key = await loop.run_in_executor(
+            None, self._bytes_cache_key, data, language, content_hash, profile
+        )
+        cached = await loop.run_in_executor(None, self._cached_result, cache_key)
+        if cached is not None:
+            return cached
+        
+        result, shared = await single_flight.run(
+            cache_key,
+            lambda *_: job_scheduler.run(
+                "ocr",
+                self._recognize_bytes_and_cache,
+                cache_key, data, language, profile,
+                priority=priority
+            )
+        )
+        return {**result, "shared": True} if shared else result
+    
+    async def recognize_batch_async(
+        self,
+        image_paths: List[str],
+        language: Optional[str] = None,
+        content_hashes: Optional[List[Optional[str]]] = None,
+        profile: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL
+    ) -> List[Dict[str, Any]]:
+        """
+        异步批量识别，整批作为一个任务提交到OCR工作池
+        
+        Args:
+            image_paths: 图片文件路径列表
+            language: 语言代码
+            content_hashes: 与图片一一对应的内容哈希
+            profile: 识别档位
+            priority: 调度优先级，数值越小越先执行
+        
+        Returns:
+            与输入顺序一致的识别结果列表
+        """
+        if not self.is_available():
+            raise RuntimeError("OCR服务不可用")
+        
+        return await job_scheduler.run(
+            "ocr",
+            self.recognize_batch,
+            image_paths, language, content_hashes, profile,
+            priority=priority
         )
 
 
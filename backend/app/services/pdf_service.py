@@ -3,18 +3,160 @@ PDF转换服务模块
 使用pdf2docx实现PDF转Word功能
 """
 import os
+import math
+import importlib.util
 import time
+import shutil
 import asyncio
+import threading
+import uuid
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Callable, Tuple
 
 from backend.app.config import config
+from backend.app.utils.cache import result_cache, file_sha256
+from backend.app.utils.metrics import metrics
+from backend.app.utils.model_loader import ModelLoader
+from backend.app.utils.progress import PageProgress
+from backend.app.utils.scheduler import job_scheduler, PRIORITY_NORMAL
+from backend.app.utils.singleflight import single_flight
+
+
+# 页面处理回调，参数为(阶段, 页码, 耗时)
+PageCallback = Callable[[str, int, float], None]
+
+# 版面转换各阶段的进度权重，解析页面占绝大部分耗时
+LAYOUT_STAGES = {"parse": 0.8, "make_docx": 0.2}
+
+# 子进程中向主进程汇报页面进度的队列
+_progress_queue = None
+
+
+def _init_pdf_worker(progress_queue=None) -> None:
+    """
+    PDF转换子进程初始化
+    提前导入pdf2docx及其依赖，避免首个任务承担导入开销
+    
+    Args:
+        progress_queue: 向主进程汇报页面进度的队列
+    """
+    global _progress_queue
+    _progress_queue = progress_queue
+    
+    import pdf2docx
+    import docx
+
+
+def _warm_up_worker(delay: float) -> int:
+    """
+    预热子进程
+    
+    Args:
+        delay: 占用子进程的时间，保证每个预热任务落在不同的进程上
+    
+    Returns:
+        子进程ID
+    """
+    time.sleep(delay)
+    return os.getpid()
+
+
+def _convert_in_worker(
+    pdf_path: str,
+    output_path: str,
+    start_page: int,
+    end_page: Optional[int],
+    dpi: int,
+    progress_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    在子进程中执行转换，参数同PdfService.convert
+    
+    指定progress_key时每处理完一页就通过进度队列汇报给主进程
+    """
+    page_callback = None
+    if progress_key is not None and _progress_queue is not None:
+        def page_callback(stage: str, page: int, duration: float) -> None:
+            _progress_queue.put((progress_key, stage, page, duration))
+    
+    return PdfService()._convert_local(
+        pdf_path, output_path, start_page, end_page, dpi, page_callback
+    )
+
+
+def _track_pages(cv, page_callback: PageCallback) -> None:
+    """
+    为pdf2docx转换器挂上逐页计时
+    
+    在load_pages创建页面对象后，替换待转换页面的parse和make_docx方法，
+    每页处理完成后回调阶段、页码和耗时，转换流程本身不变
+    
+    Args:
+        cv: pdf2docx.Converter实例
+        page_callback: 页面处理回调
+    """
+    load_pages = cv.load_pages
+    
+    def timed(stage: str, page, method):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = method(*args, **kwargs)
+            page_callback(stage, page.id, time.perf_counter() - started)
+            return result
+        return wrapper
+    
+    def tracked_load_pages(*args, **kwargs):
+        result = load_pages(*args, **kwargs)
+        for page in cv.pages:
+            if not page.skip_parsing:
+                page.parse = timed("parse", page, page.parse)
+                page.make_docx = timed("make_docx", page, page.make_docx)
+        return result
+    
+    cv.load_pages = tracked_load_pages
+
+
+def _render_page(pdf_path: str, page_number: int, dpi: int) -> Tuple[int, int, bytes]:
+    """
+    将PDF页面渲染为RGB像素，在转换子进程中执行
+    
+    Args:
+        pdf_path: PDF文件路径
+        page_number: 页码（从0开始）
+        dpi: 渲染DPI
+    
+    Returns:
+        (宽, 高, RGB像素字节)
+    """
+    import fitz
+    
+    with fitz.open(pdf_path) as doc:
+        zoom = dpi / 72
+        pixmap = doc[page_number].get_pixmap(
+            matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False
+        )
+        return pixmap.width, pixmap.height, pixmap.samples
 
 
 class PdfService:
     """PDF转换服务类"""
     
     _instance = None
+    _process_pool = None
+    _progress_queue = None
+    _progress_listeners: Dict[str, PageCallback] = {}
+    _loader = ModelLoader(
+        "pdf",
+        enabled=config.pdf.get("enabled", True),
+        preload=config.pdf.get("preload", True)
+    )
+    
+    CACHED_DOCX = "result.docx"
+    CACHED_TEXT_OUTPUT = "result{ext}"
     
     def __new__(cls):
         if cls._instance is None:
@@ -22,12 +164,36 @@ class PdfService:
         return cls._instance
     
     def is_available(self) -> bool:
-        """检查服务是否可用"""
+        """
+        检查服务是否可用
+        
+        只检查服务是否启用、依赖是否安装，不触发导入和进程池启动
+        """
+        return self._loader.usable and importlib.util.find_spec("pdf2docx") is not None
+    
+    def load(self) -> bool:
+        """
+        导入pdf2docx并预热转换进程池，已完成时直接返回
+        
+        Returns:
+            服务是否可用
+        """
+        return self._loader.ensure_loaded(self._load)
+    
+    def _load(self) -> bool:
+        """导入pdf2docx，进程池模式下同时启动全部转换子进程"""
         try:
             import pdf2docx
-            return True
         except ImportError:
+            print("警告: pdf2docx未安装，PDF转换功能不可用")
             return False
+        
+        self.warm_up()
+        return True
+    
+    def load_state(self) -> Dict[str, Any]:
+        """获取加载状态"""
+        return self._loader.snapshot()
     
     def convert(
         self,
@@ -35,17 +201,23 @@ class PdfService:
         output_path: Optional[str] = None,
         start_page: int = 0,
         end_page: Optional[int] = None,
-        dpi: int = 300
+        dpi: int = 300,
+        content_hash: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         """
         将PDF转换为Word文档
         
+        相同内容和参数的请求直接复制缓存的Word文档
+        
         Args:
             pdf_path: PDF文件路径
             output_path: 输出Word文件路径，不指定则自动生成
             start_page: 起始页码（从0开始）
             end_page: 结束页码，不指定则转换到最后一页
             dpi: 渲染DPI，影响图片质量
+            content_hash: 文件内容哈希，不指定则读取文件计算
+            progress_callback: 进度回调，参数为PageProgress.snapshot()返回的字典
         
         Returns:
             包含转换结果的字典
@@ -53,14 +225,769 @@ class PdfService:
         if not self.is_available():
             raise RuntimeError("PDF转换服务不可用，请安装pdf2docx")
         
-        from pdf2docx import Converter
+        if output_path is None:
+            output_path = os.path.splitext(pdf_path)[0] + ".docx"
+        
+        cache_key = self._cache_key(pdf_path, start_page, end_page, dpi, content_hash)
+        cached = self._cached_result(cache_key, output_path)
+        if cached is not None:
+            return cached
+        
+        return self._convert_and_cache(
+            cache_key, pdf_path, output_path, start_page, end_page, dpi, progress_callback
+        )
+    
+    def _cache_key(
+        self,
+        pdf_path: str,
+        start_page: int,
+        end_page: Optional[int],
+        dpi: int,
+        content_hash: Optional[str]
+    ) -> str:
+        """
+        生成转换结果的缓存键
+        
+        _convert会把全部为扫描页的文档改为OCR识别，结果随OCR是否可用、pdf.ocr配置和默认识别语言、
+        档位变化，是否走OCR及OCR参数都计入缓存键
+        """
+        params: Dict[str, Any] = {"start_page": start_page, "end_page": end_page, "dpi": dpi}
+        if self._should_ocr(pdf_path, start_page, end_page):
+            from backend.app.services.ocr_service import ocr_service
+            
+            params.update(
+                mode="ocr",
+                ocr_dpi=config.pdf.get("ocr", {}).get("dpi", 200),
+                language=ocr_service.resolve_language(),
+                profile=ocr_service.resolve_profile(),
+                models=ocr_service.resolve_models()
+            )
+        else:
+            params["mode"] = "layout"
+        return result_cache.make_key("pdf", content_hash or file_sha256(pdf_path), **params)
+    
+    def _convert_and_cache(self, cache_key: str, *args: Any) -> Dict[str, Any]:
+        """执行转换并写入缓存，参数同_convert"""
+        result = self._convert(*args)
+        result_cache.put(cache_key, result, files={self.CACHED_DOCX: result["output_path"]})
+        return result
+    
+    def _cached_result(
+        self,
+        cache_key: str,
+        output_path: str,
+        filename: str = CACHED_DOCX
+    ) -> Optional[Dict[str, Any]]:
+        """
+        从缓存复制转换结果到输出路径
+        
+        Args:
+            cache_key: 缓存键
+            output_path: 输出文件路径
+            filename: 缓存条目中结果文件的名称
+        
+        Returns:
+            缓存的转换结果，未命中时返回None
+        """
+        cached = result_cache.get(cache_key)
+        if cached is None:
+            return None
+        
+        cached_file = result_cache.get_file(cache_key, filename)
+        try:
+            shutil.copyfile(cached_file, output_path)
+        except (TypeError, OSError):
+            return None
+        
+        cached["output_path"] = output_path
+        cached["cached"] = True
+        return cached
+    
+    @staticmethod
+    def _shared_result(result: Dict[str, Any], output_path: str) -> Dict[str, Any]:
+        """
+        复用其他请求的转换结果，将结果文件复制到本请求的输出路径
+        
+        Args:
+            result: 其他请求的转换结果
+            output_path: 本请求的输出文件路径
+        
+        Returns:
+            输出路径指向本请求文件的结果副本
+        """
+        if os.path.abspath(result["output_path"]) != os.path.abspath(output_path):
+            shutil.copyfile(result["output_path"], output_path)
+        return {**result, "output_path": output_path, "shared": True}
+    
+    def _convert(
+        self,
+        pdf_path: str,
+        output_path: str,
+        start_page: int,
+        end_page: Optional[int],
+        dpi: int,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        执行转换，参数同convert
+        
+        进程池模式下提交到常驻子进程执行，绕开GIL使多个转换任务并行；
+        页数较多的文档按页切分后由多个子进程同时转换。各子进程逐页汇报的
+        解析和生成进度汇总到同一个PageProgress。
+        """
+        if not self.load():
+            raise RuntimeError("PDF转换服务不可用，请安装pdf2docx")
+        
+        if self._should_ocr(pdf_path, start_page, end_page):
+            return self._ocr_convert(
+                pdf_path, output_path, start_page, end_page, progress_callback=progress_callback
+            )
+        
+        page_count = self.get_page_count(pdf_path)
+        if end_page is None or end_page >= page_count:
+            end_page = page_count - 1
+        
+        page_callback = None
+        if progress_callback is not None:
+            page_callback = PageProgress(
+                end_page - start_page + 1, LAYOUT_STAGES, progress_callback
+            ).page_done
+        
+        if not self._use_process_pool():
+            with metrics.stage("pdf", "inference"):
+                return self._convert_local(
+                    pdf_path, output_path, start_page, end_page, dpi, page_callback
+                )
+        
+        shards = self._plan_shards(start_page, end_page)
+        if len(shards) > 1:
+            return self._convert_sharded(
+                pdf_path, output_path, shards, page_count, dpi, page_callback
+            )
+        
+        with self._listen_progress(page_callback) as progress_key, metrics.stage("pdf", "inference"):
+            future = self._get_process_pool().submit(
+                _convert_in_worker, pdf_path, output_path, start_page, end_page, dpi, progress_key
+            )
+            try:
+                return future.result()
+            except BrokenProcessPool:
+                self._reset_process_pool()
+                raise RuntimeError("PDF转换子进程异常退出")
+    
+    def _should_ocr(self, pdf_path: str, start_page: int, end_page: Optional[int]) -> bool:
+        """
+        待转换的页面是否全部为扫描页
+        
+        开启ocr.auto且OCR服务可用时检查，遇到第一个含文字的页面即返回，
+        普通文档只需检查首页
+        """
+        from backend.app.services.ocr_service import ocr_service
+        
+        ocr_config = config.pdf.get("ocr", {})
+        if not ocr_config.get("auto", True) or not ocr_service.is_available():
+            return False
+        
+        import fitz
+        
+        min_chars = int(ocr_config.get("min_text_chars", 10))
+        with fitz.open(pdf_path) as doc:
+            last_page = doc.page_count - 1 if end_page is None else min(end_page, doc.page_count - 1)
+            pages = range(start_page, last_page + 1)
+            return len(pages) > 0 and all(
+                self._is_image_page(doc[number], min_chars) for number in pages
+            )
+    
+    @staticmethod
+    def _is_image_page(page, min_chars: int, text: Optional[str] = None) -> bool:
+        """页面是否只有图片而没有可提取的文字，即扫描页"""
+        if text is None:
+            text = page.get_text("text")
+        return len(text.strip()) < min_chars and bool(page.get_images())
+    
+    def _plan_shards(self, start_page: int, end_page: int) -> List[Tuple[int, int]]:
+        """
+        将页码范围切分为分片
+        
+        页数达到shard.threshold_pages时按转换进程数均分，每片不少于
+        shard.min_pages页，否则整体作为一个分片
+        
+        Args:
+            start_page: 起始页码
+            end_page: 结束页码（包含）
+        
+        Returns:
+            [(起始页码, 结束页码), ...]
+        """
+        shard_config = config.pdf.get("shard", {})
+        total_pages = end_page - start_page + 1
+        
+        if (not shard_config.get("enabled", True)
+                or total_pages < shard_config.get("threshold_pages", 100)):
+            return [(start_page, end_page)]
+        
+        shard_size = max(
+            int(shard_config.get("min_pages", 20)),
+            math.ceil(total_pages / self._process_workers())
+        )
+        return [
+            (first, min(first + shard_size - 1, end_page))
+            for first in range(start_page, end_page + 1, shard_size)
+        ]
+    
+    def _convert_sharded(
+        self,
+        pdf_path: str,
+        output_path: str,
+        shards: List[Tuple[int, int]],
+        page_count: int,
+        dpi: int,
+        page_callback: Optional[PageCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        分片并行转换
+        
+        各分片提交到进程池分别转换为临时文档，全部完成后按页码顺序合并
+        
+        Args:
+            pdf_path: PDF文件路径
+            output_path: 输出Word文件路径
+            shards: 页码分片列表
+            page_count: PDF总页数
+            dpi: 渲染DPI
+            page_callback: 页面处理回调，各分片共用
+        
+        Returns:
+            包含转换结果的字典
+        """
+        from backend.app.utils.docx_merge import merge_docx
+        
+        start_time = time.time()
+        
+        base_path = os.path.splitext(output_path)[0]
+        part_paths = [f"{base_path}.part{index}.docx" for index in range(len(shards))]
+        
+        with self._listen_progress(page_callback) as progress_key:
+            pool = self._get_process_pool()
+            futures = [
+                pool.submit(_convert_in_worker, pdf_path, part_path, first, last, dpi, progress_key)
+                for part_path, (first, last) in zip(part_paths, shards)
+            ]
+            
+            try:
+                with metrics.stage("pdf", "inference"):
+                    for future in futures:
+                        future.result()
+                with metrics.stage("pdf", "output_write"):
+                    merge_docx(part_paths, output_path)
+            except BrokenProcessPool:
+                self._reset_process_pool()
+                raise RuntimeError("PDF转换子进程异常退出")
+            finally:
+                for future in futures:
+                    future.cancel()
+                wait(futures)
+                for part_path in part_paths:
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+        
+        return {
+            "output_path": output_path,
+            "page_count": page_count,
+            "converted_pages": shards[-1][1] - shards[0][0] + 1,
+            "word_count": self._count_words(output_path),
+            "duration": time.time() - start_time,
+            "shards": len(shards)
+        }
+    
+    def extract_text(
+        self,
+        pdf_path: str,
+        output_path: Optional[str] = None,
+        start_page: int = 0,
+        end_page: Optional[int] = None,
+        content_hash: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        快速提取PDF文字，生成只含文字的Word文档或纯文本
+        
+        不做版面还原，适合只需要可编辑文字的普通文档
+        
+        Args:
+            pdf_path: PDF文件路径
+            output_path: 输出文件路径，扩展名为.docx或.txt，不指定则生成同名.docx
+            start_page: 起始页码（从0开始）
+            end_page: 结束页码，不指定则提取到最后一页
+            content_hash: 文件内容哈希，不指定则读取文件计算
+            progress_callback: 进度回调，参数为PageProgress.snapshot()返回的字典
+        
+        Returns:
+            包含输出路径、页数和字数的字典
+        """
+        if not self.is_available():
+            raise RuntimeError("PDF转换服务不可用，请安装pdf2docx")
         
         if output_path is None:
             output_path = os.path.splitext(pdf_path)[0] + ".docx"
         
+        cache_key, filename = self._text_cache_key(
+            pdf_path, output_path, start_page, end_page, content_hash
+        )
+        cached = self._cached_result(cache_key, output_path, filename)
+        if cached is not None:
+            return cached
+        
+        return self._extract_text_and_cache(
+            cache_key, filename, pdf_path, output_path, start_page, end_page, progress_callback
+        )
+    
+    def _text_cache_key(
+        self,
+        pdf_path: str,
+        output_path: str,
+        start_page: int,
+        end_page: Optional[int],
+        content_hash: Optional[str]
+    ) -> Tuple[str, str]:
+        """生成文字提取结果的缓存键和缓存文件名"""
+        from backend.app.utils.text_export import output_format
+        
+        ext = output_format(output_path)
+        cache_key = result_cache.make_key(
+            "pdf-text",
+            content_hash or file_sha256(pdf_path),
+            start_page=start_page,
+            end_page=end_page,
+            format=ext
+        )
+        return cache_key, self.CACHED_TEXT_OUTPUT.format(ext=f".{ext}")
+    
+    def _extract_text_and_cache(self, cache_key: str, filename: str, *args: Any) -> Dict[str, Any]:
+        """执行文字提取并写入缓存，参数同_extract_text"""
+        result = self._extract_text(*args)
+        result_cache.put(cache_key, result, files={filename: result["output_path"]})
+        return result
+    
+    def _extract_text(
+        self,
+        pdf_path: str,
+        output_path: str,
+        start_page: int,
+        end_page: Optional[int],
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        执行文字提取，参数同extract_text
+        
+        逐页读取文字块并按阅读顺序拼接，边读边写，不在内存中保留整本文档的文字
+        """
+        import fitz
+        from backend.app.utils.text_export import write_pages
+        
+        start_time = time.time()
+        
+        with fitz.open(pdf_path) as doc:
+            page_count = doc.page_count
+            if end_page is None or end_page >= page_count:
+                end_page = page_count - 1
+            
+            progress = None
+            if progress_callback is not None:
+                progress = PageProgress(end_page - start_page + 1, {"text": 1.0}, progress_callback)
+            
+            def page_texts() -> Iterator[str]:
+                for number in range(start_page, end_page + 1):
+                    started = time.perf_counter()
+                    text = self._page_text(doc[number])
+                    if progress is not None:
+                        progress.page_done("text", number, time.perf_counter() - started)
+                    yield text
+            
+            # 文字边提取边写出，提取和写出合并计入推理耗时
+            with metrics.stage("pdf", "inference"):
+                word_count = write_pages(page_texts(), output_path)
+        
+        return {
+            "output_path": output_path,
+            "page_count": page_count,
+            "converted_pages": end_page - start_page + 1,
+            "word_count": word_count,
+            "duration": time.time() - start_time,
+            "mode": "text"
+        }
+    
+    @staticmethod
+    def _page_text(page) -> str:
+        """按阅读顺序提取页面中的文字块，忽略图片块"""
+        blocks = page.get_text("blocks", sort=True)
+        return "\n".join(block[4].strip() for block in blocks if block[6] == 0 and block[4].strip())
+    
+    def ocr_convert(
+        self,
+        pdf_path: str,
+        output_path: Optional[str] = None,
+        start_page: int = 0,
+        end_page: Optional[int] = None,
+        language: Optional[str] = None,
+        profile: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        识别PDF中的扫描页，生成可搜索的Word文档或纯文本
+        
+        扫描页渲染后交给OCR服务识别，含文字的页面直接提取文字
+        
+        Args:
+            pdf_path: PDF文件路径
+            output_path: 输出文件路径，扩展名为.docx或.txt，不指定则生成同名.docx
+            start_page: 起始页码（从0开始）
+            end_page: 结束页码，不指定则处理到最后一页
+            language: OCR语言代码
+            profile: OCR识别档位
+            content_hash: 文件内容哈希，不指定则读取文件计算
+            progress_callback: 进度回调，参数为PageProgress.snapshot()返回的字典
+        
+        Returns:
+            包含输出路径、逐页文本和识别统计的字典
+        """
+        if not self.is_available():
+            raise RuntimeError("PDF转换服务不可用，请安装pdf2docx")
+        
+        if output_path is None:
+            output_path = os.path.splitext(pdf_path)[0] + ".docx"
+        
+        cache_key, filename = self._ocr_cache_key(
+            pdf_path, output_path, start_page, end_page, language, profile, content_hash
+        )
+        cached = self._cached_result(cache_key, output_path, filename)
+        if cached is not None:
+            return cached
+        
+        return self._ocr_convert_and_cache(
+            cache_key, filename, pdf_path, output_path, start_page, end_page,
+            language, profile, progress_callback
+        )
+    
+    def _ocr_cache_key(
+        self,
+        pdf_path: str,
+        output_path: str,
+        start_page: int,
+        end_page: Optional[int],
+        language: Optional[str],
+        profile: Optional[str],
+        content_hash: Optional[str]
+    ) -> Tuple[str, str]:
+        """生成扫描件识别结果的缓存键和缓存文件名"""
+        from backend.app.services.ocr_service import ocr_service
+        from backend.app.utils.text_export import output_format
+        
+        ext = output_format(output_path)
+        cache_key = result_cache.make_key(
+            "pdf-ocr",
+            content_hash or file_sha256(pdf_path),
+            start_page=start_page,
+            end_page=end_page,
+            dpi=config.pdf.get("ocr", {}).get("dpi", 200),
+            language=ocr_service.resolve_language(language),
+            profile=ocr_service.resolve_profile(profile),
+            models=ocr_service.resolve_models(language, profile),
+            format=ext
+        )
+        return cache_key, self.CACHED_TEXT_OUTPUT.format(ext=f".{ext}")
+    
+    def _ocr_convert_and_cache(self, cache_key: str, filename: str, *args: Any) -> Dict[str, Any]:
+        """执行扫描件识别并写入缓存，参数同_ocr_convert"""
+        result = self._ocr_convert(*args)
+        result_cache.put(cache_key, result, files={filename: result["output_path"]})
+        return result
+    
+    def _ocr_convert(
+        self,
+        pdf_path: str,
+        output_path: str,
+        start_page: int,
+        end_page: Optional[int],
+        language: Optional[str] = None,
+        profile: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        执行扫描件识别，参数同ocr_convert
+        
+        先逐页提取文字判断是否为扫描页，扫描页交给_ocr_pages渲染和识别，
+        全部完成后按页码顺序写出。进度按扫描页的识别计算，文字页不计入。
+        """
+        import fitz
+        from backend.app.services.ocr_service import ocr_service
+        from backend.app.utils.text_export import write_pages
+        
+        if not ocr_service.is_available():
+            raise RuntimeError("OCR服务不可用，无法识别扫描页")
+        
+        start_time = time.time()
+        ocr_config = config.pdf.get("ocr", {})
+        min_chars = int(ocr_config.get("min_text_chars", 10))
+        dpi = int(ocr_config.get("dpi", 200))
+        
+        pages: Dict[int, Dict[str, Any]] = {}
+        image_pages = []
+        with fitz.open(pdf_path) as doc:
+            page_count = doc.page_count
+            if end_page is None or end_page >= page_count:
+                end_page = page_count - 1
+            for number in range(start_page, end_page + 1):
+                page = doc[number]
+                text = page.get_text("text")
+                if self._is_image_page(page, min_chars, text):
+                    image_pages.append(number)
+                else:
+                    pages[number] = {"page": number, "source": "text", "text": text.strip()}
+        
+        progress = None
+        if progress_callback is not None and image_pages:
+            progress = PageProgress(len(image_pages), {"ocr": 1.0}, progress_callback)
+        
+        with metrics.stage("pdf", "inference"):
+            for number, result in self._ocr_pages(pdf_path, image_pages, dpi, language, profile):
+                if progress is not None:
+                    progress.page_done("ocr", number, result["duration"])
+                pages[number] = {
+                    "page": number,
+                    "source": "ocr",
+                    "text": result["text"],
+                    "confidence": result["confidence"],
+                    "duration": result["duration"],
+                    "results": result["results"]
+                }
+        
+        ordered = [pages[number] for number in sorted(pages)]
+        with metrics.stage("pdf", "output_write"):
+            word_count = write_pages((page["text"] for page in ordered), output_path)
+        
+        return {
+            "output_path": output_path,
+            "page_count": page_count,
+            "converted_pages": len(ordered),
+            "ocr_pages": len(image_pages),
+            "word_count": word_count,
+            "duration": time.time() - start_time,
+            "mode": "ocr",
+            "language": ocr_service.resolve_language(language),
+            "profile": ocr_service.resolve_profile(profile),
+            "models": ocr_service.resolve_models(language, profile),
+            "pages": ordered
+        }
+    
+    def _ocr_pages(
+        self,
+        pdf_path: str,
+        page_numbers: List[int],
+        dpi: int,
+        language: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        渲染并识别扫描页，按完成顺序逐页产出结果
+        
+        页面在转换进程池中并行渲染，渲染完成的页面立即交给OCR线程识别，
+        渲染和识别同时进行。已提交但尚未识别完的页面不超过max_pending_pages，
+        避免识别跟不上时渲染结果堆积占满内存。
+        
+        Args:
+            pdf_path: PDF文件路径
+            page_numbers: 待识别的页码列表
+            dpi: 渲染DPI
+            language: OCR语言代码
+            profile: OCR识别档位
+        
+        Yields:
+            (页码, OCR识别结果)
+        """
+        from backend.app.services.ocr_service import ocr_service
+        
+        if not page_numbers:
+            return
+        
+        ocr_workers = ocr_service.max_parallel(language, profile)
+        window = max(
+            ocr_workers + 1,
+            int(config.pdf.get("ocr", {}).get("max_pending_pages", 8))
+        )
+        
+        local_pool = None
+        if self._use_process_pool():
+            render_pool = self._get_process_pool()
+        else:
+            render_pool = local_pool = ThreadPoolExecutor(
+                max_workers=self._process_workers(), thread_name_prefix="pdf-render"
+            )
+        
+        remaining = iter(page_numbers)
+        renders: Dict[Any, int] = {}
+        recognitions: Dict[Any, int] = {}
+        
+        try:
+            with ThreadPoolExecutor(max_workers=ocr_workers, thread_name_prefix="pdf-ocr") as ocr_pool:
+                while True:
+                    while len(renders) + len(recognitions) < window:
+                        number = next(remaining, None)
+                        if number is None:
+                            break
+                        renders[render_pool.submit(_render_page, pdf_path, number, dpi)] = number
+                    
+                    if not renders and not recognitions:
+                        break
+                    
+                    done, _ = wait([*renders, *recognitions], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in renders:
+                            number = renders.pop(future)
+                            recognitions[ocr_pool.submit(
+                                self._recognize_rendered, future.result(), language, profile
+                            )] = number
+                        else:
+                            yield recognitions.pop(future), future.result()
+        except BrokenProcessPool:
+            self._reset_process_pool()
+            raise RuntimeError("PDF渲染子进程异常退出")
+        finally:
+            for future in renders:
+                future.cancel()
+            if local_pool is not None:
+                local_pool.shutdown(wait=True, cancel_futures=True)
+    
+    @staticmethod
+    def _recognize_rendered(
+        rendered: Tuple[int, int, bytes],
+        language: Optional[str],
+        profile: Optional[str]
+    ) -> Dict[str, Any]:
+        """识别渲染好的页面像素"""
+        import numpy as np
+        from backend.app.services.ocr_service import ocr_service
+        
+        width, height, samples = rendered
+        image = np.frombuffer(samples, dtype=np.uint8).reshape(height, width, 3)
+        return ocr_service.recognize_image(np.ascontiguousarray(image[:, :, ::-1]), language, profile)
+    
+    def _use_process_pool(self) -> bool:
+        """是否使用进程池执行转换"""
+        return config.pdf.get("executor", "process") == "process"
+    
+    def _process_workers(self) -> int:
+        """获取进程池大小，默认与PDF工作池并发数一致"""
+        workers = config.pdf.get("process_workers")
+        if workers is None:
+            workers = job_scheduler.pool("pdf").workers
+        return max(1, int(workers))
+    
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """获取PDF转换进程池，首次使用时创建，同时启动进度转发线程"""
+        if self._process_pool is None:
+            context = multiprocessing.get_context("spawn")
+            PdfService._progress_queue = context.Queue()
+            threading.Thread(
+                target=self._dispatch_progress,
+                args=(self._progress_queue,),
+                name="pdf-progress",
+                daemon=True
+            ).start()
+            PdfService._process_pool = ProcessPoolExecutor(
+                max_workers=self._process_workers(),
+                mp_context=context,
+                initializer=_init_pdf_worker,
+                initargs=(self._progress_queue,)
+            )
+        return self._process_pool
+    
+    def _dispatch_progress(self, queue) -> None:
+        """将子进程汇报的页面进度转发给对应任务的回调，收到None时退出"""
+        while True:
+            try:
+                event = queue.get()
+            except (EOFError, OSError):
+                return
+            if event is None:
+                return
+            
+            progress_key, stage, page, duration = event
+            callback = self._progress_listeners.get(progress_key)
+            if callback is not None:
+                callback(stage, page, duration)
+    
+    @contextmanager
+    def _listen_progress(self, page_callback: Optional[PageCallback]) -> Iterator[Optional[str]]:
+        """
+        登记页面进度回调
+        
+        Args:
+            page_callback: 页面处理回调，为None时不登记
+        
+        Yields:
+            传给子进程的进度键，未登记时为None
+        """
+        if page_callback is None:
+            yield None
+            return
+        
+        progress_key = uuid.uuid4().hex
+        self._progress_listeners[progress_key] = page_callback
+        try:
+            yield progress_key
+        finally:
+            self._progress_listeners.pop(progress_key, None)
+    
+    def _reset_process_pool(self) -> None:
+        """丢弃进程池和进度队列，下次使用时重新创建"""
+        if self._progress_queue is not None:
+            self._progress_queue.put(None)
+            PdfService._progress_queue = None
+        PdfService._process_pool = None
+    
+    def warm_up(self) -> None:
+        """
+        预先启动全部转换子进程
+        
+        每个子进程在初始化时导入pdf2docx，首个请求无需等待进程启动
+        """
+        if not self._use_process_pool():
+            return
+        
+        pool = self._get_process_pool()
+        futures = [pool.submit(_warm_up_worker, 0.2) for _ in range(self._process_workers())]
+        wait(futures)
+        print(f"PDF转换进程池已就绪: {len({f.result() for f in futures})} 个进程")
+    
+    def shutdown(self) -> None:
+        """关闭PDF转换进程池"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._reset_process_pool()
+    
+    def _convert_local(
+        self,
+        pdf_path: str,
+        output_path: str,
+        start_page: int,
+        end_page: Optional[int],
+        dpi: int,
+        page_callback: Optional[PageCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        在当前进程中执行转换，参数同convert
+        
+        指定page_callback时每解析或生成完一页回调一次
+        """
+        from pdf2docx import Converter
+        
         start_time = time.time()
         
         cv = Converter(pdf_path)
+        if page_callback is not None:
+            _track_pages(cv, page_callback)
         
         try:
             page_count = cv.fitz_doc.page_count
@@ -125,26 +1052,170 @@ class PdfService:
         output_path: Optional[str] = None,
         start_page: int = 0,
         end_page: Optional[int] = None,
-        dpi: int = 300
+        dpi: int = 300,
+        content_hash: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        priority: int = PRIORITY_NORMAL,
+        task_id: Optional[str] = None,
+        on_start: Optional[Callable[[], None]] = None
     ) -> Dict[str, Any]:
         """
         异步转换PDF
         
+        先查询缓存，未命中时提交到PDF工作池排队执行；相同文件和参数的
+        转换正在进行时等待它完成，复制其结果文件
+        
         Args:
             pdf_path: PDF文件路径
             output_path: 输出路径
             start_page: 起始页码
             end_page: 结束页码
             dpi: 渲染DPI
+            content_hash: 文件内容哈希
+            progress_callback: 进度回调
+            priority: 调度优先级，数值越小越先执行
+            task_id: 关联的异步任务ID
+            on_start: 开始执行时的回调
         
         Returns:
             转换结果字典
         """
+        if not self.is_available():
+            raise RuntimeError("PDF转换服务不可用，请安装pdf2docx")
+        
+        if output_path is None:
+            output_path = os.path.splitext(pdf_path)[0] + ".docx"
+        
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None,
-            lambda: self.convert(pdf_path, output_path, start_page, end_page, dpi)
+        cache_key = await loop.run_in_executor(
+            None, self._cache_key, pdf_path, start_page, end_page, dpi, content_hash
+        )
+        cached = await loop.run_in_executor(None, self._cached_result, cache_key, output_path)
+        if cached is not None:
+            return cached
+        
+        result, shared = await single_flight.run(
+            cache_key,
+            lambda started, progress: job_scheduler.run(
+                "pdf",
+                self._convert_and_cache,
+                cache_key, pdf_path, output_path, start_page, end_page, dpi, progress,
+                priority=priority,
+                task_id=task_id,
+                on_start=started
+            ),
+            on_start=on_start,
+            progress_callback=progress_callback
+        )
+        return self._shared_result(result, output_path) if shared else result
+    
+    async def extract_text_async(
+        self,
+        pdf_path: str,
+        output_path: Optional[str] = None,
+        start_page: int = 0,
+        end_page: Optional[int] = None,
+        content_hash: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        priority: int = PRIORITY_NORMAL,
+        task_id: Optional[str] = None,
+        on_start: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        异步提取PDF文字
+        
+        先查询缓存，未命中时提交到PDF工作池排队执行，相同请求进行中时
+        等待其结果，参数同extract_text
+        
+        Returns:
+            提取结果字典
+        """
+        if not self.is_available():
+            raise RuntimeError("PDF转换服务不可用，请安装pdf2docx")
+        
+        if output_path is None:
+            output_path = os.path.splitext(pdf_path)[0] + ".docx"
+        
+        loop = asyncio.get_event_loop()
+        cache_key, filename = await loop.run_in_executor(
+            None, self._text_cache_key, pdf_path, output_path, start_page, end_page, content_hash
+        )
+        cached = await loop.run_in_executor(
+            None, self._cached_result, cache_key, output_path, filename
+        )
+        if cached is not None:
+            return cached
+        
+        result, shared = await single_flight.run(
+            cache_key,
+            lambda started, progress: job_scheduler.run(
+                "pdf",
+                self._extract_text_and_cache,
+                cache_key, filename, pdf_path, output_path, start_page, end_page, progress,
+                priority=priority,
+                task_id=task_id,
+                on_start=started
+            ),
+            on_start=on_start,
+            progress_callback=progress_callback
+        )
+        return self._shared_result(result, output_path) if shared else result
+    
+    async def ocr_convert_async(
+        self,
+        pdf_path: str,
+        output_path: Optional[str] = None,
+        start_page: int = 0,
+        end_page: Optional[int] = None,
+        language: Optional[str] = None,
+        profile: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        priority: int = PRIORITY_NORMAL,
+        task_id: Optional[str] = None,
+        on_start: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        异步识别扫描PDF
+        
+        先查询缓存，未命中时提交到PDF工作池排队执行，相同请求进行中时
+        等待其结果，参数同ocr_convert
+        
+        Returns:
+            识别结果字典
+        """
+        if not self.is_available():
+            raise RuntimeError("PDF转换服务不可用，请安装pdf2docx")
+        
+        if output_path is None:
+            output_path = os.path.splitext(pdf_path)[0] + ".docx"
+        
+        loop = asyncio.get_event_loop()
+        cache_key, filename = await loop.run_in_executor(
+            None, self._ocr_cache_key,
+            pdf_path, output_path, start_page, end_page, language, profile, content_hash
+        )
+        cached = await loop.run_in_executor(
+            None, self._cached_result, cache_key, output_path, filename
+        )
+        if cached is not None:
+            return cached
+        
+        result, shared = await single_flight.run(
+            cache_key,
+            lambda started, progress: job_scheduler.run(
+                "pdf",
+                self._ocr_convert_and_cache,
+                cache_key, filename, pdf_path, output_path, start_page, end_page,
+                language, profile, progress,
+                priority=priority,
+                task_id=task_id,
+                on_start=started
+            ),
+            on_start=on_start,
+            progress_callback=progress_callback
         )
+        return self._shared_result(result, output_path) if shared else result
     
     def get_page_count(self, pdf_path: str) -> int:
         """
@@ -0,0 +1,460 @@
+"""
+准入控制模块
+在读取请求体之前，按接口并发数、服务排队长度和客户端请求速率决定是否接收上传请求，
+超限的请求直接返回429，并按当前队列的处理速度估算Retry-After
+"""
+import json
+import math
+import time
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from backend.app.config import config
+from backend.app.utils.metrics import metrics, Counter, render_gauge
+from backend.app.utils.scheduler import job_scheduler
+
+
+# 受准入控制的上传接口及其所属服务
+ENDPOINTS = {
+    "/api/asr/transcribe": "asr",
+    "/api/asr/transcribe/async": "asr",
+    "/api/ocr/recognize": "ocr",
+    "/api/ocr/recognize/batch": "ocr",
+    "/api/ocr/recognize/async": "ocr",
+    "/api/pdf/convert": "pdf",
+    "/api/pdf/convert/async": "pdf"
+}
+
+# 限制请求总大小和文件数的批量接口
+BATCH_ENDPOINTS = ("/api/ocr/recognize/batch",)
+
+
+class Rejection(NamedTuple):
+    """拒绝请求的原因和响应"""
+    reason: str
+    status_code: int
+    detail: str
+    retry_after: Optional[int] = None
+
+
+class _TokenBucket:
+    """单个客户端的令牌桶"""
+    
+    __slots__ = ("tokens", "updated")
+    
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+
+
+class _MultipartFileCounter:
+    """
+    在请求体流中统计multipart请求的文件数
+    
+    只查找分隔行和其后的部分头，Content-Disposition中带filename的部分计为一个文件，
+    不解析和保存内容
+    """
+    
+    # 部分头的最大长度，超过时不再等待头结束，该部分不计数
+    MAX_HEADER_SIZE = 16 * 1024
+    
+    def __init__(self, boundary: bytes):
+        self.delimiter = b"\r\n--" + boundary
+        # 第一个分隔行前没有换行，补上后与其余分隔行统一处理
+        self.buffer = b"\r\n"
+        self.files = 0
+    
+    def feed(self, chunk: bytes) -> int:
+        """
+        读入一块请求体
+        
+        Returns:
+            目前为止的文件数
+        """
+        data = self.buffer + chunk
+        pos = 0
+        while True:
+            index = data.find(self.delimiter, pos)
+            if index < 0:
+                break
+            header_start = index + len(self.delimiter)
+            header_end = data.find(b"\r\n\r\n", header_start)
+            if header_end < 0:
+                if len(data) - index <= self.MAX_HEADER_SIZE:
+                    # 部分头还没有读完，从分隔行开始保留到下一块
+                    self.buffer = data[index:]
+                    return self.files
+                pos = header_start
+                continue
+            if b"filename=" in data[header_start:header_end].lower():
+                self.files += 1
+            pos = header_end + 4
+        
+        # 保留可能是被截断的分隔行开头的部分
+        self.buffer = data[max(pos, len(data) - len(self.delimiter) + 1):]
+        return self.files
+
+
+def _multipart_boundary(scope: dict) -> Optional[bytes]:
+    """读取multipart/form-data请求的boundary"""
+    for key, value in scope.get("headers", []):
+        if key == b"content-type":
+            media_type, _, params = value.partition(b";")
+            if media_type.strip().lower() != b"multipart/form-data":
+                return None
+            for param in params.split(b";"):
+                name, _, param_value = param.strip().partition(b"=")
+                if name.lower() == b"boundary" and param_value:
+                    return param_value.strip(b'"')
+    return None
+
+
+class AdmissionController:
+    """
+    准入控制类
+    
+    接口并发数统计从请求进入到响应发送完毕，上传过程也计入；排队长度读取
+    job_scheduler中对应服务的排队任务数，异步接口的后台任务也在其中排队。
+    限制只在当前进程内生效，多个工作进程时每个进程各自计数。
+    """
+    
+    _instance = None
+    _initialized = False
+    
+    # 服务还没有完成过任务、无法估算处理速度时的Retry-After（秒）
+    DEFAULT_RETRY_AFTER = 5
+    
+    # 客户端令牌桶数量超过该值时清理已回满的桶
+    MAX_BUCKETS = 10000
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        if self._initialized:
+            return
+        
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}
+        self._buckets: Dict[str, _TokenBucket] = {}
+        
+        self.rejected = Counter(
+            "officetools_admission_rejected_total",
+            "被准入控制拒绝的请求数",
+            ("path", "reason")
+        )
+        metrics.register_collector(self.collect_metrics)
+        AdmissionController._initialized = True
+    
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """准入控制配置"""
+        return config.admission
+    
+    @property
+    def enabled(self) -> bool:
+        """是否启用准入控制"""
+        return bool(self.settings.get("enabled", True))
+    
+    def endpoint_limits(self, path: str) -> Dict[str, Optional[int]]:
+        """
+        获取接口的并发数和排队长度限制
+        
+        services中按服务配置默认值，endpoints中可按接口路径覆盖
+        
+        Args:
+            path: 接口路径
+        
+        Returns:
+            {"max_concurrent": 并发上限, "max_queue": 排队上限}，None表示不限制
+        """
+        settings = self.settings
+        limits = dict((settings.get("services") or {}).get(ENDPOINTS[path]) or {})
+        limits.update((settings.get("endpoints") or {}).get(path) or {})
+        return {
+            "max_concurrent": limits.get("max_concurrent"),
+            "max_queue": limits.get("max_queue")
+        }
+    
+    @property
+    def max_batch_files(self) -> Optional[int]:
+        """批量接口单次请求的最大文件数，None表示不限制"""
+        if not self.enabled:
+            return None
+        return (self.settings.get("batch") or {}).get("max_files")
+    
+    def max_body_size(self, path: str) -> Optional[int]:
+        """
+        获取接口允许的请求体总大小
+        
+        Args:
+            path: 接口路径
+        
+        Returns:
+            最大字节数，只有批量接口有限制，其余接口返回None
+        """
+        if not self.enabled or path not in BATCH_ENDPOINTS:
+            return None
+        max_total_mb = (self.settings.get("batch") or {}).get("max_total_mb")
+        if max_total_mb is None:
+            return None
+        return int(max_total_mb * 1024 * 1024)
+    
+    def client_key(self, scope: dict) -> str:
+        """
+        识别客户端
+        
+        配置了client_header时取该请求头的第一个地址（如反向代理设置的X-Forwarded-For），
+        否则使用连接的对端地址
+        """
+        header = self.settings.get("client_header")
+        if header:
+            name = header.lower().encode("latin-1")
+            for key, value in scope.get("headers", []):
+                if key == name:
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+    
+    def _drain_seconds(self, stats: Optional[Dict[str, Any]], jobs: int) -> int:
+        """
+        按服务当前的处理速度估算处理完jobs个任务所需的时间
+        
+        处理速度为工作池并发数除以近期任务的平均耗时
+        """
+        if not stats or not stats["avg_duration"]:
+            seconds = self.DEFAULT_RETRY_AFTER
+        else:
+            seconds = math.ceil(max(jobs, 1) * stats["avg_duration"] / stats["workers"])
+        return self._clamp_retry_after(seconds)
+    
+    def _clamp_retry_after(self, seconds: float) -> int:
+        """Retry-After取整并限制在1秒到retry_after_max_seconds之间"""
+        upper = int(self.settings.get("retry_after_max_seconds", 300))
+        return min(max(int(math.ceil(seconds)), 1), upper)
+    
+    def _take_token(self, client: str, now: float) -> Optional[int]:
+        """
+        从客户端的令牌桶中取一个令牌，调用方需持有锁
+        
+        Returns:
+            取到时返回None，否则返回下一个令牌到达前需要等待的秒数
+        """
+        rate_limit = self.settings.get("rate_limit") or {}
+        per_minute = rate_limit.get("requests_per_minute") or 0
+        if per_minute <= 0:
+            return None
+        rate = per_minute / 60.0
+        burst = max(float(rate_limit.get("burst", 1)), 1.0)
+        
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_BUCKETS:
+                self._prune_buckets(now, rate, burst)
+            bucket = self._buckets[client] = _TokenBucket(burst, now)
+        else:
+            bucket.tokens = min(burst, bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+        
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return None
+        return self._clamp_retry_after((1 - bucket.tokens) / rate)
+    
+    def _prune_buckets(self, now: float, rate: float, burst: float) -> None:
+        """删除已经回满的令牌桶，这些客户端下次请求时重新创建效果相同"""
+        full = [
+            client for client, bucket in self._buckets.items()
+            if bucket.tokens + (now - bucket.updated) * rate >= burst
+        ]
+        for client in full:
+            del self._buckets[client]
+    
+    def admit(self, path: str, client: str) -> Optional[Rejection]:
+        """
+        判断是否接收请求
+        
+        依次检查接口并发数、服务排队长度和客户端请求速率，接收时占用一个并发名额，
+        请求结束后需调用release释放
+        
+        Args:
+            path: 接口路径，须为ENDPOINTS中的接口
+            client: 客户端标识
+        
+        Returns:
+            接收时返回None，拒绝时返回Rejection
+        """
+        limits = self.endpoint_limits(path)
+        stats = job_scheduler.stats().get(ENDPOINTS[path])
+        queued = stats["queued"] if stats else 0
+        
+        with self._lock:
+            max_concurrent = limits["max_concurrent"]
+            if max_concurrent is not None and self._in_flight.get(path, 0) >= max_concurrent:
+                rejection = Rejection(
+                    "concurrency", 429,
+                    f"服务繁忙，该接口同时处理的请求已达上限 {max_concurrent}",
+                    self._drain_seconds(stats, 1)
+                )
+            elif limits["max_queue"] is not None and queued >= limits["max_queue"]:
+                rejection = Rejection(
+                    "queue", 429,
+                    f"服务繁忙，排队任务已达上限 {limits['max_queue']}",
+                    self._drain_seconds(stats, queued - limits["max_queue"] + 1)
+                )
+            else:
+                wait = self._take_token(client, time.monotonic())
+                if wait is None:
+                    self._in_flight[path] = self._in_flight.get(path, 0) + 1
+                    return None
+                rejection = Rejection("rate_limit", 429, "请求过于频繁", wait)
+        
+        self.record_rejection(path, rejection)
+        return rejection
+    
+    def release(self, path: str) -> None:
+        """释放admit占用的并发名额"""
+        with self._lock:
+            self._in_flight[path] = max(self._in_flight.get(path, 0) - 1, 0)
+    
+    def record_rejection(self, path: str, rejection: Rejection) -> None:
+        """记录一次拒绝"""
+        self.rejected.inc(path, rejection.reason)
+    
+    def stats(self) -> Dict[str, Any]:
+        """获取各接口进行中的请求数和跟踪的客户端数"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "in_flight": {path: count for path, count in self._in_flight.items() if count},
+                "clients": len(self._buckets)
+            }
+    
+    def collect_metrics(self) -> List[str]:
+        """导出拒绝次数和各接口进行中的请求数"""
+        with self._lock:
+            in_flight = dict(self._in_flight)
+        return [
+            *self.rejected.render(),
+            *render_gauge(
+                "officetools_admission_in_flight", "各上传接口进行中的请求数",
+                [((path,), count) for path, count in sorted(in_flight.items())], ("path",)
+            )
+        ]
+
+
+admission = AdmissionController()
+
+
+class AdmissionMiddleware:
+    """
+    准入控制中间件
+    
+    在路由解析请求体之前执行，被拒绝的上传请求不会读取和保存任何数据。
+    批量接口另外限制请求体总大小和文件数：声明的Content-Length超限时直接拒绝，
+    读取请求体时累计大小超限或出现第max_files+1个文件时中止，路由不会保存剩余部分。
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "").rstrip("/")
+        if scope["type"] != "http" or scope["method"] != "POST" or path not in ENDPOINTS or not admission.enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        # 被拒绝的请求不进入路由，请求指标按该路径统计
+        scope.setdefault("state", {})["admission_path"] = path
+        
+        max_body = admission.max_body_size(path)
+        if max_body is not None:
+            declared = _content_length(scope)
+            if declared is not None and declared > max_body:
+                rejection = Rejection("body_size", 413, f"请求过大，最大允许 {max_body / 1024 / 1024:.0f}MB")
+                admission.record_rejection(path, rejection)
+                await _send_rejection(send, rejection)
+                return
+        
+        rejection = admission.admit(path, admission.client_key(scope))
+        if rejection is not None:
+            await _send_rejection(send, rejection)
+            return
+        
+        max_files = admission.max_batch_files if path in BATCH_ENDPOINTS else None
+        boundary = _multipart_boundary(scope) if max_files is not None else None
+        counter = _MultipartFileCounter(boundary) if boundary else None
+        
+        released = False
+        received = 0
+        aborted: Optional[Rejection] = None
+        
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                admission.release(path)
+        
+        async def receive_wrapper():
+            nonlocal received, aborted
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            
+            body = message.get("body", b"")
+            received += len(body)
+            if max_body is not None and received > max_body:
+                aborted = Rejection("body_size", 413, f"请求过大，最大允许 {max_body / 1024 / 1024:.0f}MB")
+            elif counter is not None and counter.feed(body) > max_files:
+                aborted = Rejection("batch_files", 413, f"文件过多，单次最多上传 {max_files} 个文件")
+            if aborted is not None:
+                # 让应用按客户端断开处理，响应由中间件发送
+                return {"type": "http.disconnect"}
+            return message
+        
+        async def send_wrapper(message):
+            if aborted is not None:
+                return
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # 响应发送完毕即释放名额，之后执行的后台任务由排队长度限制
+                release()
+        
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except Exception:
+            if aborted is None:
+                raise
+        finally:
+            release()
+        
+        if aborted is not None:
+            admission.record_rejection(path, aborted)
+            await _send_rejection(send, aborted)
+
+
+def _content_length(scope: dict) -> Optional[int]:
+    """读取请求头中的Content-Length"""
+    for key, value in scope.get("headers", []):
+        if key == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+async def _send_rejection(send, rejection: Rejection) -> None:
+    """发送拒绝响应，格式与HTTPException一致"""
+    detail = rejection.detail
+    headers = [(b"content-type", b"application/json")]
+    if rejection.retry_after is not None:
+        detail = f"{detail}，请 {rejection.retry_after} 秒后重试"
+        headers.append((b"retry-after", str(rejection.retry_after).encode("latin-1")))
+    
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    headers.append((b"content-length", str(len(body)).encode("latin-1")))
+    await send({"type": "http.response.start", "status": rejection.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
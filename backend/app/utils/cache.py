@@ -0,0 +1,285 @@
+"""
+结果缓存模块
+以文件内容哈希和处理参数为键，在磁盘上缓存ASR、OCR、PDF转换结果
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from backend.app.config import config
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    计算文件内容的SHA-256
+    
+    Args:
+        file_path: 文件路径
+    
+    Returns:
+        十六进制哈希字符串
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    磁盘结果缓存类
+    
+    每个条目是缓存目录下的一个子目录，包含result.json和可选的结果文件。
+    条目的修改时间即最近访问时间，总大小超过上限时按LRU淘汰。
+    多个工作进程共用缓存目录：索引中没有的键会再到磁盘上查找，
+    写入后按目录的实际内容重建索引再淘汰，总大小上限对所有进程合计生效。
+    """
+    
+    _instance = None
+    _initialized = False
+    
+    RESULT_FILE = "result.json"
+    
+    # 写入中途退出留下的临时目录超过该时间（秒）后清理
+    STAGING_MAX_AGE = 3600
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        if self._initialized:
+            return
+        
+        cache_config = config.cache
+        
+        self.enabled = cache_config.get("enabled", True)
+        self.max_size = int(cache_config.get("max_size_mb", 2048) * 1024 * 1024)
+        self.cache_dir = Path(config.paths.get("cache", "cache"))
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_size = 0
+        
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._scan()
+        ResultCache._initialized = True
+    
+    def _entry_size(self, entry: Path) -> Optional[int]:
+        """获取条目占用的大小，条目不存在或不完整时返回None"""
+        try:
+            if not (entry / self.RESULT_FILE).exists():
+                return None
+            return sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+        except OSError:
+            return None
+    
+    def _scan(self) -> None:
+        """
+        扫描缓存目录，按最近访问时间重建LRU索引和总大小，调用方需持有锁
+        
+        其他进程写入和淘汰的条目都以目录为准；以点开头的是正在写入的临时目录，
+        只清理超过STAGING_MAX_AGE的
+        """
+        now = time.time()
+        entries = []
+        for entry in self.cache_dir.glob("*/*"):
+            try:
+                if entry.name.startswith("."):
+                    if now - entry.stat().st_mtime > self.STAGING_MAX_AGE:
+                        shutil.rmtree(entry, ignore_errors=True)
+                    continue
+                size = self._entry_size(entry)
+                if size is None:
+                    shutil.rmtree(entry, ignore_errors=True)
+                    continue
+                entries.append((entry.stat().st_mtime, entry.name, size))
+            except OSError:
+                # 扫描期间被其他进程淘汰
+                continue
+        
+        self._index = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._total_size = sum(self._index.values())
+    
+    @staticmethod
+    def make_key(namespace: str, content_hash: str, **params: Any) -> str:
+        """
+        生成缓存键
+        
+        Args:
+            namespace: 结果类型，如'asr'、'ocr'、'pdf'
+            content_hash: 输入文件内容哈希
+            **params: 影响结果的处理参数
+        
+        Returns:
+            缓存键
+        """
+        payload = json.dumps(
+            {"namespace": namespace, "content": content_hash, "params": params},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _entry_dir(self, key: str) -> Path:
+        """获取缓存条目目录"""
+        return self.cache_dir / key[:2] / key
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存结果
+        
+        Args:
+            key: 缓存键
+        
+        Returns:
+            缓存的结果字典，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+        
+        entry = self._entry_dir(key)
+        
+        with self._lock:
+            known = key in self._index
+            if known:
+                self._index.move_to_end(key)
+        
+        if not known:
+            # 可能是其他工作进程写入的条目
+            size = self._entry_size(entry)
+            with self._lock:
+                if size is None:
+                    self.misses += 1
+                    return None
+                if key not in self._index:
+                    self._index[key] = size
+                    self._total_size += size
+        
+        try:
+            with open(entry / self.RESULT_FILE, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            now = time.time()
+            os.utime(entry, (now, now))
+        except (OSError, ValueError):
+            with self._lock:
+                self._drop(key)
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        return result
+    
+    def get_file(self, key: str, name: str) -> Optional[str]:
+        """
+        获取缓存条目中保存的结果文件路径
+        
+        Args:
+            key: 缓存键
+            name: 文件名
+        
+        Returns:
+            文件路径，不存在时返回None
+        """
+        path = self._entry_dir(key) / name
+        return str(path) if path.exists() else None
+    
+    def put(
+        self,
+        key: str,
+        result: Dict[str, Any],
+        files: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        写入缓存结果
+        
+        Args:
+            key: 缓存键
+            result: 可JSON序列化的结果字典
+            files: 需要一并缓存的结果文件，{缓存内文件名: 源文件路径}
+        """
+        if not self.enabled:
+            return
+        
+        entry = self._entry_dir(key)
+        staging = entry.parent / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        
+        try:
+            staging.mkdir(parents=True, exist_ok=True)
+            with open(staging / self.RESULT_FILE, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False)
+            for name, source in (files or {}).items():
+                shutil.copyfile(source, staging / name)
+            
+            with self._lock:
+                self._drop(key)
+                os.replace(staging, entry)
+                self._scan()
+                self._evict()
+        except OSError as e:
+            print(f"写入结果缓存失败: {e}")
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    
+    def _drop(self, key: str) -> None:
+        """删除缓存条目，调用方需持有锁"""
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._total_size -= size
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+    
+    def _evict(self) -> None:
+        """按LRU淘汰条目直到总大小不超过上限，调用方需持有锁"""
+        while self._total_size > self.max_size and len(self._index) > 1:
+            oldest = next(iter(self._index))
+            self._drop(oldest)
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        """清空缓存，包括其他工作进程写入的条目"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._scan()
+            for key in list(self._index):
+                self._drop(key)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+        
+        Returns:
+            条目数、占用大小、命中与未命中次数等
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._index),
+                "size_bytes": self._total_size,
+                "max_size_bytes": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+result_cache = ResultCache()
@@ -0,0 +1,89 @@
+"""
+Word文档合并模块
+将分片转换得到的多个docx按顺序合并为一个文档，保留每一页的分节和分页结构
+"""
+import io
+import copy
+from typing import List
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+
+
+_REL_ATTRIBUTES = (qn("r:embed"), qn("r:id"), qn("r:link"))
+
+
+def _copy_relationships(element, source_part, target_part) -> None:
+    """
+    将元素中引用的关系复制到目标文档，并改写为新的关系ID
+    
+    Args:
+        element: 已复制到目标文档的XML元素
+        source_part: 元素所属的源文档部件
+        target_part: 目标文档部件
+    """
+    mapping = {}
+    for node in element.iter():
+        for attr in _REL_ATTRIBUTES:
+            old_rid = node.get(attr)
+            if old_rid is None:
+                continue
+            if old_rid not in mapping:
+                rel = source_part.rels.get(old_rid)
+                if rel is None:
+                    continue
+                if rel.is_external:
+                    mapping[old_rid] = target_part.relate_to(
+                        rel.target_ref, rel.reltype, is_external=True
+                    )
+                elif rel.reltype == RT.IMAGE:
+                    mapping[old_rid], _ = target_part.get_or_add_image(
+                        io.BytesIO(rel.target_part.blob)
+                    )
+                else:
+                    continue
+            node.set(attr, mapping[old_rid])
+
+
+def merge_docx(part_paths: List[str], output_path: str) -> None:
+    """
+    按顺序合并Word文档
+    
+    第一个文档作为主文档，后续文档的正文依次追加在后面。追加前把主文档
+    末尾的分节属性移入一个空段落，使其成为独立的一节，再以被追加文档的
+    最后一节属性作为新的文档末节，这样每页的页面大小、边距和分页都不变。
+    
+    Args:
+        part_paths: 待合并的文档路径，按页码顺序排列
+        output_path: 输出文档路径
+    """
+    if not part_paths:
+        raise ValueError("没有需要合并的文档")
+    
+    master = Document(part_paths[0])
+    body = master.element.body
+    
+    for part_path in part_paths[1:]:
+        part = Document(part_path)
+        part_body = part.element.body
+        part_sectPr = part_body.sectPr
+        
+        master_sectPr = body.get_or_add_sectPr()
+        body.add_p().set_sectPr(copy.deepcopy(master_sectPr))
+        
+        for child in part_body.iterchildren():
+            if child is part_sectPr:
+                continue
+            element = copy.deepcopy(child)
+            _copy_relationships(element, part.part, master.part)
+            master_sectPr.addprevious(element)
+        
+        if part_sectPr is not None:
+            body.replace(master_sectPr, copy.deepcopy(part_sectPr))
+    
+    # 合并后图片等对象的docPr编号可能重复，统一重新编号
+    for index, doc_pr in enumerate(body.iter(qn("wp:docPr")), start=1):
+        doc_pr.set("id", str(index))
+    
+    master.save(output_path)
@@ -0,0 +1,223 @@
+"""
+推理引擎池模块
+按键（如语言）维护多个推理引擎实例，按需创建、借出归还，受内存预算限制并回收空闲实例
+"""
+import gc
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+
+class _Engine:
+    """池中的引擎实例"""
+    
+    __slots__ = ("key", "engine", "last_used")
+    
+    def __init__(self, key: str, engine: Any):
+        self.key = key
+        self.engine = engine
+        self.last_used = time.time()
+
+
+class EnginePool:
+    """
+    推理引擎池类
+    
+    每个键可以有多个实例，同一实例同一时间只借给一个调用方，避免并发请求
+    共用一个不支持多线程的预测器。创建新实例前若超出内存预算，先回收最久
+    未用的空闲实例；没有可回收的实例时等待其他调用方归还。空闲超过
+    idle_seconds的实例由后台线程回收，pinned中的键至少保留一个实例。
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        create_func: Callable[[str], Any],
+        budget_bytes: int,
+        engine_bytes: int,
+        max_instances: Optional[Union[Dict[str, int], Callable[[str], Optional[int]]]] = None,
+        default_instances: int = 1,
+        idle_seconds: float = 600,
+        pinned: Optional[List[str]] = None
+    ):
+        self.name = name
+        self.budget = int(budget_bytes)
+        self.engine_bytes = int(engine_bytes)
+        self.idle_seconds = idle_seconds
+        self.pinned = set(pinned or [])
+        
+        self._create_func = create_func
+        self._max_instances = max_instances or {}
+        self._default_instances = max(1, int(default_instances))
+        
+        self._cond = threading.Condition()
+        self._idle: List[_Engine] = []
+        self._busy = 0
+        self._counts: Dict[str, int] = {}
+        self._reaper: Optional[threading.Thread] = None
+        self._shutdown = False
+        
+        self.created = 0
+        self.evictions = 0
+        self.waits = 0
+        self.create_times: Dict[str, float] = {}
+    
+    def max_instances(self, key: str) -> int:
+        """获取键允许的最大实例数，max_instances为函数时由其按键计算，返回None时使用默认值"""
+        if callable(self._max_instances):
+            limit = self._max_instances(key)
+        else:
+            limit = self._max_instances.get(key)
+        return max(1, int(self._default_instances if limit is None else limit))
+    
+    @property
+    def total_instances(self) -> int:
+        """已创建和正在创建的实例总数"""
+        return sum(self._counts.values())
+    
+    @contextmanager
+    def acquire(self, key: str) -> Iterator[Any]:
+        """
+        借出一个引擎实例，使用完毕后自动归还
+        
+        Args:
+            key: 引擎键，如语言代码
+        
+        Yields:
+            引擎对象
+        """
+        item = self._checkout(key)
+        try:
+            yield item.engine
+        finally:
+            with self._cond:
+                self._busy -= 1
+                item.last_used = time.time()
+                self._idle.append(item)
+                self._cond.notify_all()
+    
+    def _checkout(self, key: str) -> _Engine:
+        """取得空闲实例或创建新实例"""
+        with self._cond:
+            self._ensure_reaper()
+            while True:
+                if self._shutdown:
+                    raise RuntimeError(f"{self.name}引擎池已关闭")
+                
+                for item in reversed(self._idle):
+                    if item.key == key:
+                        self._idle.remove(item)
+                        self._busy += 1
+                        return item
+                
+                if self._counts.get(key, 0) < self.max_instances(key) and self._make_room():
+                    self._counts[key] = self._counts.get(key, 0) + 1
+                    self._busy += 1
+                    break
+                
+                self.waits += 1
+                self._cond.wait()
+        
+        start_time = time.time()
+        try:
+            engine = self._create_func(key)
+        except BaseException:
+            with self._cond:
+                self._counts[key] -= 1
+                self._busy -= 1
+                self._cond.notify_all()
+            raise
+        
+        with self._cond:
+            self.created += 1
+            self.create_times[key] = time.time() - start_time
+        print(f"{self.name}: 已创建 {key} 引擎，耗时 {self.create_times[key]:.1f}s")
+        return _Engine(key, engine)
+    
+    def _make_room(self) -> bool:
+        """
+        为新实例腾出预算，按最久未用回收空闲实例，调用方需持有锁
+        
+        Returns:
+            是否可以创建新实例；池为空时总是允许，保证单个实例超出预算也能运行
+        """
+        while self.total_instances and (self.total_instances + 1) * self.engine_bytes > self.budget:
+            if not self._idle:
+                return False
+            victim = min(self._idle, key=lambda item: item.last_used)
+            self._drop(victim)
+            print(f"{self.name}: 超出内存预算，回收 {victim.key} 引擎")
+        return True
+    
+    def _drop(self, item: _Engine) -> None:
+        """移除空闲实例，调用方需持有锁"""
+        self._idle.remove(item)
+        self._counts[item.key] -= 1
+        if not self._counts[item.key]:
+            del self._counts[item.key]
+        self.evictions += 1
+    
+    def _ensure_reaper(self) -> None:
+        """按需启动空闲实例回收线程，调用方需持有锁"""
+        if self._reaper is None and self.idle_seconds > 0:
+            self._reaper = threading.Thread(
+                target=self._reap,
+                name=f"{self.name}-reaper",
+                daemon=True
+            )
+            self._reaper.start()
+    
+    def _reap(self) -> None:
+        """定期回收空闲超时的实例"""
+        interval = max(1.0, self.idle_seconds / 4)
+        while True:
+            with self._cond:
+                if self._shutdown:
+                    return
+                deadline = time.time() - self.idle_seconds
+                expired = []
+                for item in sorted(self._idle, key=lambda item: item.last_used):
+                    if item.last_used >= deadline:
+                        break
+                    if item.key in self.pinned and self._counts[item.key] == 1:
+                        continue
+                    self._drop(item)
+                    expired.append(item)
+                for item in expired:
+                    print(f"{self.name}: 空闲超时，回收 {item.key} 引擎")
+                if expired:
+                    self._cond.notify_all()
+                self._cond.wait(interval)
+            if expired:
+                del expired
+                gc.collect()
+    
+    def shutdown(self) -> None:
+        """关闭引擎池，释放全部空闲实例"""
+        with self._cond:
+            self._shutdown = True
+            for item in list(self._idle):
+                self._drop(item)
+            self._cond.notify_all()
+        gc.collect()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取引擎池统计信息
+        
+        Returns:
+            各键的实例数、空闲与使用中的实例数、内存预算和回收次数等
+        """
+        with self._cond:
+            return {
+                "instances": dict(self._counts),
+                "idle": len(self._idle),
+                "busy": self._busy,
+                "size_bytes": self.total_instances * self.engine_bytes,
+                "budget_bytes": self.budget,
+                "created": self.created,
+                "evictions": self.evictions,
+                "waits": self.waits,
+                "create_times": {key: round(value, 3) for key, value in self.create_times.items()}
+            }
@@ -0,0 +1,265 @@
+"""
+图片预处理模块
+OCR前的图片解码、自适应缩小和大图切块，以及切块结果的坐标还原与去重
+"""
+import io
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from backend.app.config import config
+
+
+# cv2.IMREAD_REDUCED_COLOR_{2,4,8}，JPEG在解码时按比例缩小
+_REDUCED_DECODE_FLAGS = ((8, 65), (4, 33), (2, 17))
+
+# EXIF中的图片方向标签
+_EXIF_ORIENTATION = 0x0112
+
+
+@dataclass
+class PreparedImage:
+    """预处理后的图片"""
+    image: Any
+    original_size: Tuple[int, int]
+    scale: float
+    tiled: bool
+
+
+def get_preprocess_config() -> dict:
+    """获取OCR预处理配置"""
+    return config.ocr.get("preprocess", {})
+
+
+def decode_image(data: bytes, reduce: int = 1):
+    """
+    将图片文件内容解码为BGR格式的numpy数组
+    
+    OpenCV不支持的格式（如GIF）改用PIL解码，两种方式都按EXIF方向旋转
+    
+    Args:
+        data: 图片文件的字节内容
+        reduce: JPEG解码时的缩小倍数，可选1、2、4、8
+    
+    Returns:
+        HxWx3的uint8数组
+    """
+    import cv2
+    import numpy as np
+    
+    flag = dict(_REDUCED_DECODE_FLAGS).get(reduce, cv2.IMREAD_COLOR)
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    if image is not None:
+        return image
+    
+    from PIL import Image, ImageOps
+    
+    with Image.open(io.BytesIO(data)) as pil_image:
+        rgb = ImageOps.exif_transpose(pil_image).convert("RGB")
+        return cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2BGR)
+
+
+def _probe(data: bytes) -> Tuple[Optional[str], Optional[Tuple[int, int]]]:
+    """
+    只读取文件头，获取图片格式和尺寸
+    
+    OpenCV解码时按EXIF方向旋转图片，EXIF方向为5-8（旋转90度）时交换宽高，
+    返回与解码结果一致的尺寸
+    """
+    from PIL import Image
+    
+    try:
+        with Image.open(io.BytesIO(data)) as pil_image:
+            width, height = pil_image.size
+            if pil_image.getexif().get(_EXIF_ORIENTATION) in (5, 6, 7, 8):
+                width, height = height, width
+            return pil_image.format, (width, height)
+    except Exception:
+        return None, None
+
+
+def _limits() -> Tuple[int, int]:
+    """获取缩小和切块的尺寸阈值，0表示不启用"""
+    prep_config = get_preprocess_config()
+    return (
+        int(prep_config.get("max_side", 0) or 0),
+        int(prep_config.get("tile_min_side", 0) or 0)
+    )
+
+
+def prepare_image(data: bytes) -> PreparedImage:
+    """
+    解码并按需缩小图片
+    
+    最长边不超过max_side的图片原样解码；超过tile_min_side的大图保持原始
+    分辨率，交给切块识别；介于两者之间的图片缩小到max_side，JPEG在解码
+    阶段就按2、4、8倍缩小，避免先解码出完整的大图。
+    
+    Args:
+        data: 图片文件的字节内容
+    
+    Returns:
+        预处理后的图片
+    """
+    max_side, tile_min_side = _limits()
+    
+    image_format, size = _probe(data)
+    longest = max(size) if size else 0
+    
+    reduce = 1
+    if (image_format == "JPEG" and max_side and longest > max_side
+            and not (tile_min_side and longest >= tile_min_side)):
+        reduce = next((factor for factor, _ in _REDUCED_DECODE_FLAGS if longest / factor >= max_side), 1)
+    
+    image = decode_image(data, reduce)
+    height, width = image.shape[:2]
+    return _fit(image, size if size and reduce > 1 else (width, height))
+
+
+def prepare_array(image) -> PreparedImage:
+    """
+    对已解码的图片按需缩小或标记为切块识别，规则同prepare_image
+    
+    Args:
+        image: BGR图片数组
+    
+    Returns:
+        预处理后的图片
+    """
+    height, width = image.shape[:2]
+    return _fit(image, (width, height))
+
+
+def _fit(image, original_size: Tuple[int, int]) -> PreparedImage:
+    """按原图尺寸决定切块或缩小到max_side"""
+    import cv2
+    
+    max_side, tile_min_side = _limits()
+    tiled = bool(tile_min_side) and max(original_size) >= tile_min_side
+    
+    height, width = image.shape[:2]
+    if not tiled and max_side and max(height, width) > max_side:
+        ratio = max_side / max(height, width)
+        image = cv2.resize(
+            image,
+            (max(1, round(width * ratio)), max(1, round(height * ratio))),
+            interpolation=cv2.INTER_AREA
+        )
+    
+    return PreparedImage(
+        image=image,
+        original_size=tuple(original_size),
+        scale=image.shape[1] / original_size[0],
+        tiled=tiled
+    )
+
+
+def split_tiles(image, tile_size: int, overlap: int) -> List[Tuple[int, int, Any]]:
+    """
+    将图片切分为相互重叠的块
+    
+    Args:
+        image: BGR图片数组
+        tile_size: 块边长
+        overlap: 相邻块的重叠像素
+    
+    Returns:
+        [(左上角x, 左上角y, 块图片), ...]
+    """
+    height, width = image.shape[:2]
+    step = max(1, tile_size - overlap)
+    
+    def starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+    
+    return [
+        (x, y, image[y:y + tile_size, x:x + tile_size])
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+def _bounds(box) -> Tuple[float, float, float, float]:
+    """检测框的外接矩形"""
+    xs = [point[0] for point in box]
+    ys = [point[1] for point in box]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def merge_tile_lines(
+    tile_lines: List[Tuple[int, int, int, int, List[List[Any]]]],
+    overlap: int,
+    image_size: Tuple[int, int]
+) -> List[List[Any]]:
+    """
+    合并各块的识别结果并还原到整图坐标
+    
+    每个文本行只由中心点落在该块核心区域（去掉与相邻块重叠的一半）的块
+    保留；被块边界截断后与完整文本行重叠的残段按外接矩形相交比例去除，
+    保留面积较大的一个。
+    
+    Args:
+        tile_lines: [(块x, 块y, 块宽, 块高, [[检测框, (文本, 置信度)], ...]), ...]
+        overlap: 相邻块的重叠像素
+        image_size: 整图尺寸(宽, 高)
+    
+    Returns:
+        按阅读顺序排列的[[检测框, (文本, 置信度)], ...]
+    """
+    width, height = image_size
+    half = overlap / 2
+    candidates = []
+    
+    for x0, y0, tile_width, tile_height, lines in tile_lines:
+        core = (
+            x0 + half if x0 > 0 else 0,
+            y0 + half if y0 > 0 else 0,
+            x0 + tile_width - half if x0 + tile_width < width else width,
+            y0 + tile_height - half if y0 + tile_height < height else height
+        )
+        for box, rec in lines:
+            box = [[float(x) + x0, float(y) + y0] for x, y in box]
+            left, top, right, bottom = _bounds(box)
+            center_x, center_y = (left + right) / 2, (top + bottom) / 2
+            if core[0] <= center_x <= core[2] and core[1] <= center_y <= core[3]:
+                candidates.append((box, rec, (left, top, right, bottom)))
+    
+    candidates.sort(key=lambda item: (item[2][2] - item[2][0]) * (item[2][3] - item[2][1]), reverse=True)
+    
+    kept = []
+    for box, rec, rect in candidates:
+        area = max(1e-6, (rect[2] - rect[0]) * (rect[3] - rect[1]))
+        duplicate = False
+        for _, _, other in kept:
+            inter_w = min(rect[2], other[2]) - max(rect[0], other[0])
+            inter_h = min(rect[3], other[3]) - max(rect[1], other[1])
+            if inter_w > 0 and inter_h > 0 and inter_w * inter_h / area > 0.5:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append((box, rec, rect))
+    
+    kept.sort(key=lambda item: (item[2][1], item[2][0]))
+    return [[box, rec] for box, rec, _ in kept]
+
+
+def scale_lines(lines: List[List[Any]], scale: float) -> List[List[Any]]:
+    """
+    将缩小后图片上的检测框还原到原图坐标
+    
+    Args:
+        lines: [[检测框, (文本, 置信度)], ...]
+        scale: 预处理时的缩放比例
+    
+    Returns:
+        坐标还原后的行结果
+    """
+    if scale == 1:
+        return lines
+    return [
+        [[[float(x) / scale, float(y) / scale] for x, y in box], rec]
+        for box, rec in lines
+    ]
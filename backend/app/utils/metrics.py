@@ -0,0 +1,342 @@
+"""
+运行指标模块
+统计接口请求数与耗时、各服务处理阶段耗时，并以Prometheus文本格式导出
+"""
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+# 覆盖从毫秒级的小图识别到十分钟级的长音频转录
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0, 60.0, 120.0, 300.0, 600.0
+)
+
+# 各服务记录的处理阶段
+STAGES = ("upload_save", "decode", "inference", "output_write", "cleanup")
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: Any) -> str:
+    """转义标签值"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    """生成{name="value",...}形式的标签串"""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    """格式化样本值"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """只增不减的计数器"""
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        """计数加amount，标签值按labelnames顺序传入"""
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def render(self) -> List[str]:
+        """导出为文本格式"""
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """按区间统计观测值分布的直方图"""
+    
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, *labels: Any) -> None:
+        """记录一个观测值，标签值按labelnames顺序传入"""
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # 各区间计数，末尾两项为总和与总数
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+    
+    def render(self) -> List[str]:
+        """导出为文本格式，区间计数为累计值"""
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(snapshot.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+
+def render_gauge(
+    name: str,
+    help_text: str,
+    samples: Iterable[Tuple[Sequence[Any], Optional[float]]],
+    labelnames: Sequence[str] = (),
+    metric_type: str = "gauge"
+) -> List[str]:
+    """
+    导出采集时计算的指标，如队列深度、内存占用
+    
+    Args:
+        name: 指标名
+        help_text: 说明
+        samples: [(标签值, 样本值), ...]，样本值为None的跳过
+        labelnames: 标签名
+        metric_type: 指标类型，累计值来自其他模块时为counter
+    
+    Returns:
+        文本格式的行
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        if value is not None:
+            lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+    return lines
+
+
+def process_rss() -> Optional[int]:
+    """
+    获取当前进程的常驻内存（字节）
+    
+    优先使用psutil；未安装时Windows通过GetProcessMemoryInfo读取，
+    Linux读取/proc/self/statm，都不可用时返回None
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t)
+            ]
+        
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Metrics:
+    """
+    运行指标类
+    
+    请求指标由MetricsMiddleware记录，处理阶段耗时由各服务通过stage()记录；
+    队列深度、模型加载耗时、缓存命中等由注册的采集函数在导出时读取，
+    不在请求路径上额外计算。指标只统计当前进程。
+    """
+    
+    _instance = None
+    _initialized = False
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        if self._initialized:
+            return
+        
+        self.requests = Counter(
+            "officetools_http_requests_total",
+            "HTTP请求数",
+            ("method", "path", "status")
+        )
+        self.request_seconds = Histogram(
+            "officetools_http_request_duration_seconds",
+            "HTTP请求耗时（秒），流式响应计到响应结束",
+            ("method", "path")
+        )
+        self.stage_seconds = Histogram(
+            "officetools_stage_duration_seconds",
+            "各服务处理阶段耗时（秒）",
+            ("service", "stage")
+        )
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._stage_sink: Optional[List[Tuple[str, str, float]]] = None
+        Metrics._initialized = True
+    
+    def observe_request(self, method: str, path: str, status: int, duration: float) -> None:
+        """记录一次HTTP请求"""
+        self.requests.inc(method, path, status)
+        self.request_seconds.observe(duration, method, path)
+    
+    def observe_stage(self, service: str, stage: str, duration: float) -> None:
+        """记录一次处理阶段耗时"""
+        if self._stage_sink is not None:
+            self._stage_sink.append((service, stage, duration))
+            return
+        self.stage_seconds.observe(duration, service, stage)
+    
+    def redirect_stages(self, sink: Optional[List[Tuple[str, str, float]]]) -> None:
+        """
+        把处理阶段耗时写入sink而不是直方图
+        
+        推理进程不对外导出指标，阶段耗时随调用结果带回HTTP进程记录
+        
+        Args:
+            sink: 接收(服务名, 阶段名, 耗时)的列表，None表示恢复记录到直方图
+        """
+        self._stage_sink = sink
+    
+    @contextmanager
+    def stage(self, service: str, stage: str) -> Iterator[None]:
+        """
+        统计代码块耗时，出错时同样记录
+        
+        Args:
+            service: 服务名，如'asr'、'ocr'、'pdf'
+            stage: 阶段名，见STAGES
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(service, stage, time.perf_counter() - started)
+    
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        """注册导出时调用的采集函数，返回文本格式的行"""
+        self._collectors.append(collector)
+    
+    def render(self) -> str:
+        """以Prometheus文本格式导出全部指标"""
+        lines = [
+            *self.requests.render(),
+            *self.request_seconds.render(),
+            *self.stage_seconds.render()
+        ]
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                print(f"指标采集失败: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def _route_label(scope: dict) -> str:
+    """
+    获取请求匹配的路由模板
+    
+    旧版FastAPI的include_router复制路由并在模板前加上前缀；0.137起保留原路由，
+    scope中route.path不含前缀，按模板段数从实际路径中截取补上，模板已含前缀时截取结果为空。
+    被准入控制拒绝的请求不进入路由，按其记录的接口路径统计；
+    未匹配任何路由的请求统计为unmatched
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        # 挂载的静态文件目录不设置route，按挂载路径统计
+        return (scope.get("state") or {}).get("admission_path") or scope.get("root_path") or "unmatched"
+    
+    path_parts = scope["path"].rstrip("/").split("/")
+    template_parts = template.rstrip("/").split("/")
+    prefix = "/".join(path_parts[:len(path_parts) - len(template_parts) + 1])
+    return (prefix + template) if prefix else template
+
+
+class MetricsMiddleware:
+    """
+    请求指标中间件
+    
+    按路由模板（如/api/ocr/task/{task_id}）统计请求数和耗时，
+    避免路径参数导致标签数量无限增长
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status = 500
+        
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.observe_request(scope["method"], _route_label(scope), status, time.perf_counter() - started)
+
+
+metrics = Metrics()
@@ -0,0 +1,99 @@
+"""
+模型加载状态模块
+记录各服务模型的加载状态，保证模型只加载一次，供延迟加载和就绪检查使用
+"""
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+STATUS_DISABLED = "disabled"
+STATUS_NOT_LOADED = "not_loaded"
+STATUS_LOADING = "loading"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+class ModelLoader:
+    """
+    模型加载器类
+    
+    首次调用ensure_loaded时在当前线程中执行加载函数，并发调用方等待同一次
+    加载完成；加载失败后不再重试，状态和耗时通过snapshot对外报告。
+    """
+    
+    def __init__(self, name: str, enabled: bool = True, preload: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.preload = preload
+        
+        self.status = STATUS_NOT_LOADED if enabled else STATUS_DISABLED
+        self.load_time: Optional[float] = None
+        self.error: Optional[str] = None
+        
+        self._lock = threading.Lock()
+    
+    def ensure_loaded(self, load: Callable[[], bool]) -> bool:
+        """
+        确保模型已加载
+        
+        Args:
+            load: 加载函数，返回是否加载成功
+        
+        Returns:
+            模型是否可用
+        """
+        if self.status == STATUS_READY:
+            return True
+        if not self.enabled:
+            return False
+        
+        with self._lock:
+            if self.status == STATUS_NOT_LOADED:
+                self.status = STATUS_LOADING
+                start_time = time.time()
+                try:
+                    loaded = load()
+                    self.error = None if loaded else "模型加载失败"
+                except Exception as e:
+                    loaded = False
+                    self.error = str(e)
+                self.load_time = time.time() - start_time
+                self.status = STATUS_READY if loaded else STATUS_FAILED
+        
+        return self.status == STATUS_READY
+    
+    @property
+    def usable(self) -> bool:
+        """服务已启用且模型未加载失败"""
+        return self.enabled and self.status != STATUS_FAILED
+    
+    @property
+    def ready(self) -> bool:
+        """
+        是否就绪
+        
+        需要预加载的服务在加载完成后就绪；延迟加载的服务在首个请求时加载，
+        只要未失败即视为就绪
+        """
+        if not self.enabled or self.status == STATUS_READY:
+            return True
+        if self.preload:
+            return False
+        return self.status != STATUS_FAILED
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取加载状态
+        
+        Returns:
+            包含状态、是否就绪、加载耗时和错误信息的字典
+        """
+        return {
+            "enabled": self.enabled,
+            "preload": self.preload,
+            "status": self.status,
+            "ready": self.ready,
+            "load_time": round(self.load_time, 3) if self.load_time is not None else None,
+            "error": self.error
+        }
@@ -0,0 +1,162 @@
+"""
+模型注册表模块
+按需加载多个模型，在内存预算内保留最近使用的模型，超出预算时按LRU卸载
+"""
+import gc
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class ModelRegistry:
+    """
+    模型注册表类
+    
+    以模型名为键缓存已加载的模型。加载新模型前按预估大小预先卸载最久未用的模型，
+    加载后按实际大小再次检查预算；单个模型超过预算时只保留该模型。
+    卸载只是从注册表移除引用，正在使用该模型的任务仍可正常完成。
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        load_func: Callable[[str], Any],
+        budget_bytes: int,
+        size_func: Optional[Callable[[Any], int]] = None,
+        estimates: Optional[Dict[str, int]] = None
+    ):
+        """
+        Args:
+            name: 注册表名称，用于日志
+            load_func: 加载函数，参数为模型名，返回模型对象
+            budget_bytes: 内存预算（字节）
+            size_func: 计算已加载模型占用字节数的函数
+            estimates: 各模型加载前的预估字节数
+        """
+        self.name = name
+        self.budget = int(budget_bytes)
+        
+        self._load_func = load_func
+        self._size_func = size_func
+        self._estimates = estimates or {}
+        
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        
+        self.load_times: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Any:
+        """
+        获取模型，未加载时在当前线程中加载
+        
+        同一模型的并发请求只加载一次，不同模型可以同时加载
+        
+        Args:
+            key: 模型名
+        
+        Returns:
+            模型对象
+        """
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return self._models[key]
+                self.misses += 1
+                self._evict(reserve=self._estimates.get(key, 0))
+            gc.collect()
+            
+            start_time = time.time()
+            model = self._load_func(key)
+            load_time = time.time() - start_time
+            
+            size = self._size_func(model) if self._size_func else self._estimates.get(key, 0)
+            
+            with self._lock:
+                self._models[key] = model
+                self._sizes[key] = size
+                self.load_times[key] = load_time
+                self._evict(keep=key)
+        
+        print(f"{self.name}: 已加载 {key}，耗时 {load_time:.1f}s，占用 {size / 1024 / 1024:.0f}MB")
+        return model
+    
+    @property
+    def total_size(self) -> int:
+        """已加载模型的总占用字节数"""
+        return sum(self._sizes.values())
+    
+    def _evict(self, reserve: int = 0, keep: Optional[str] = None) -> None:
+        """
+        按LRU卸载模型直到满足预算，调用方需持有锁
+        
+        Args:
+            reserve: 需要为即将加载的模型预留的字节数
+            keep: 不允许卸载的模型名
+        """
+        while self.total_size + reserve > self.budget:
+            victim = next((key for key in self._models if key != keep), None)
+            if victim is None:
+                return
+            self._models.pop(victim)
+            self._sizes.pop(victim)
+            self.evictions += 1
+            print(f"{self.name}: 超出内存预算，卸载 {victim}")
+    
+    def evict(self, key: str) -> bool:
+        """
+        卸载指定模型
+        
+        Args:
+            key: 模型名
+        
+        Returns:
+            模型是否曾被加载
+        """
+        with self._lock:
+            model = self._models.pop(key, None)
+            self._sizes.pop(key, None)
+        if model is None:
+            return False
+        del model
+        gc.collect()
+        return True
+    
+    def clear(self) -> None:
+        """卸载全部模型"""
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+        gc.collect()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取注册表统计信息
+        
+        Returns:
+            已加载模型（按最近使用排序）、占用大小、预算和命中次数等
+        """
+        with self._lock:
+            return {
+                "loaded": list(self._models),
+                "size_bytes": self.total_size,
+                "budget_bytes": self.budget,
+                "load_times": {key: round(value, 3) for key, value in self.load_times.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,581 @@
+"""
+推理服务模块
+Whisper和PaddleOCR模型只在独立的常驻推理进程中加载，HTTP工作进程通过本地IPC连接调用，
+HTTP并发数和模型内存可以分别扩展
+"""
+import os
+import time
+import queue
+import signal
+import secrets
+import threading
+import multiprocessing
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.app.config import config
+from backend.app.utils.metrics import metrics
+from backend.app.utils.model_loader import STATUS_DISABLED, STATUS_NOT_LOADED, STATUS_LOADING, STATUS_READY, STATUS_FAILED
+
+
+# 推理进程中设置该环境变量，进程内（包括其派生的长音频子进程）的服务直接执行，不再转发
+WORKER_ENV = "OFFICETOOLS_MODEL_WORKER"
+
+# 未配置model_server.authkey时，start_model_server生成的随机口令经该环境变量传给推理服务和HTTP工作进程
+AUTHKEY_ENV = "OFFICETOOLS_MODEL_SERVER_AUTHKEY"
+
+# 允许远程调用的服务方法，均为只接收文件路径或图片数组、返回可序列化结果的推理入口
+METHODS = {
+    "asr": ("_transcribe", "transcribe_window"),
+    "ocr": ("_recognize", "_recognize_many")
+}
+
+DEFAULT_WORKERS = {"asr": 1, "ocr": 2}
+
+
+def _settings() -> Dict[str, Any]:
+    """推理服务配置"""
+    return config.model_server
+
+
+def _address() -> Tuple[str, int]:
+    """推理服务监听地址"""
+    settings = _settings()
+    return settings.get("host", "127.0.0.1"), int(settings.get("port", 50001))
+
+
+def _authkey() -> bytes:
+    """
+    连接认证口令
+    
+    推理服务会反序列化连接上收到的数据，口令不能使用公开的固定值：配置了model_server.authkey时
+    使用配置值，否则使用环境变量中每次启动随机生成的口令
+    """
+    key = _settings().get("authkey") or os.environ.get(AUTHKEY_ENV)
+    if not key:
+        raise RuntimeError(f"未设置推理服务认证口令，请配置model_server.authkey或环境变量{AUTHKEY_ENV}")
+    return str(key).encode("utf-8")
+
+
+def _service(name: str):
+    """获取服务单例"""
+    if name == "asr":
+        from backend.app.services.asr_service import asr_service
+        return asr_service
+    from backend.app.services.ocr_service import ocr_service
+    return ocr_service
+
+
+def _service_stats(name: str) -> Dict[str, Any]:
+    """推理进程中服务的模型统计"""
+    service = _service(name)
+    return service.models_stats() if name == "asr" else service.engines_stats()
+
+
+def _worker_main(name: str, index: int, conn) -> None:
+    """
+    推理进程主函数
+    
+    启动时加载模型，之后从管道中逐个接收调用并执行，进度、结果和处理阶段耗时
+    通过同一管道返回；推理服务退出后管道关闭，推理进程随之退出
+    
+    Args:
+        name: 服务名
+        index: 进程序号
+        conn: 与推理服务相连的管道
+    """
+    os.environ[WORKER_ENV] = "1"
+    # Ctrl+C会发给整个进程组，推理进程等推理服务关闭管道后退出，不在调用中途中断
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    send_lock = threading.Lock()
+    
+    def send(message: Tuple[Any, ...]) -> None:
+        with send_lock:
+            conn.send(message)
+    
+    # 处理阶段耗时暂存后随结果带回，由HTTP进程记录到自己的指标中
+    stages: List[Tuple[str, str, float]] = []
+    metrics.redirect_stages(stages)
+    
+    service = _service(name)
+    service.load()
+    send(("loaded", {"pid": os.getpid(), "state": service.load_state(), "stats": _service_stats(name)}))
+    
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except (EOFError, OSError):
+                return
+            if job is None:
+                return
+            method, args, kwargs, progress = job
+            stages.clear()
+            
+            if progress is not None:
+                kwargs["progress_callback"] = (lambda value: send(("progress", value))) if progress else None
+            
+            try:
+                value = getattr(service, method)(*args, **kwargs)
+                kind, payload = "result", {"value": value}
+            except Exception as e:
+                kind, payload = "error", {"type": type(e).__name__, "message": str(e)}
+            payload["stages"] = list(stages)
+            payload["stats"] = _service_stats(name)
+            
+            try:
+                send((kind, payload))
+            except (EOFError, OSError):
+                return
+            except Exception as e:
+                # 结果无法序列化时仍要通知调用方，否则调用方会一直等待
+                send(("error", {"type": "RuntimeError", "message": f"推理结果无法传输: {e}", "stages": []}))
+    finally:
+        # 长音频分段转录进程池由推理进程创建，随推理进程一起关闭
+        if hasattr(service, "shutdown"):
+            service.shutdown()
+
+
+class ModelServer:
+    """
+    推理服务类
+    
+    每个服务启动model_server.workers配置数量的常驻推理进程，每个进程由推理服务中的
+    一个分发线程通过独立管道驱动：分发线程从服务的调用队列中取出调用，交给自己的进程
+    执行并转发结果，空闲的进程先取到调用。进程异常退出时管道断开，正在执行的调用
+    返回错误，分发线程重新启动一个进程补位。每个IPC连接由一个线程处理，同一时刻只
+    执行一个调用。
+    """
+    
+    def __init__(self):
+        self._context = multiprocessing.get_context("spawn")
+        self._queues: Dict[str, "queue.Queue"] = {}
+        self._workers: Dict[str, List[Dict[str, Any]]] = {}
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stopping = False
+        
+        workers = _settings().get("workers") or {}
+        for name in METHODS:
+            count = int(workers.get(name, DEFAULT_WORKERS[name]))
+            self._workers[name] = []
+            if not getattr(config, name).get("enabled", True) or count <= 0:
+                continue
+            self._queues[name] = queue.Queue()
+            for index in range(count):
+                self._workers[name].append({"status": STATUS_NOT_LOADED, "jobs": 0, "restarts": 0})
+                thread = threading.Thread(
+                    target=self._dispatch,
+                    args=(name, index),
+                    name=f"{name}-dispatch-{index}",
+                    daemon=True
+                )
+                self._threads.append(thread)
+    
+    def _update_worker(self, name: str, index: int, **values: Any) -> None:
+        """更新推理进程状态"""
+        with self._lock:
+            self._workers[name][index].update(values)
+    
+    def _start_worker(self, name: str, index: int):
+        """启动推理进程并等待模型加载结束，返回(进程, 管道)"""
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(name, index, child_conn),
+            name=f"{name}-model-{index}"
+        )
+        process.start()
+        # 关闭本进程中的子端，推理服务退出时推理进程才能读到管道关闭
+        child_conn.close()
+        self._update_worker(name, index, pid=process.pid, status=STATUS_LOADING, started_at=time.time())
+        print(f"推理进程已启动: {name}-{index} (pid {process.pid})")
+        
+        _, loaded = conn.recv()
+        state = loaded["state"]
+        self._update_worker(
+            name, index,
+            status=state["status"],
+            load_time=state["load_time"],
+            error=state["error"],
+            stats=loaded["stats"]
+        )
+        print(f"推理进程{name}-{index}模型加载{'完成' if state['status'] == STATUS_READY else '失败'}")
+        return process, conn
+    
+    def _dispatch(self, name: str, index: int) -> None:
+        """分发线程：为一个推理进程取调用、转发结果，进程退出后重新启动"""
+        while not self._stopping:
+            try:
+                process, conn = self._start_worker(name, index)
+            except (EOFError, OSError) as e:
+                self._update_worker(name, index, status=STATUS_FAILED, error=f"推理进程启动失败: {e}")
+                time.sleep(5)
+                continue
+            
+            while True:
+                job = self._queues[name].get()
+                if job is None:
+                    conn.close()
+                    process.join(10)
+                    if process.is_alive():
+                        process.terminate()
+                    return
+                
+                message, results = job
+                try:
+                    conn.send(message)
+                    while True:
+                        kind, payload = conn.recv()
+                        if kind != "progress":
+                            break
+                        results.put((kind, payload))
+                except (EOFError, OSError):
+                    results.put(("error", {"type": "RuntimeError", "message": "推理进程异常退出", "stages": []}))
+                    break
+                
+                with self._lock:
+                    worker = self._workers[name][index]
+                    worker["jobs"] += 1
+                    worker["stats"] = payload.pop("stats", worker.get("stats"))
+                results.put((kind, payload))
+            
+            conn.close()
+            process.join(1)
+            if self._stopping:
+                return
+            print(f"推理进程{name}-{index}异常退出 (exitcode {process.exitcode})，正在重新启动")
+            with self._lock:
+                self._workers[name][index]["restarts"] += 1
+    
+    def state(self) -> Dict[str, Any]:
+        """
+        获取各服务的推理进程状态
+        
+        Returns:
+            {服务名: {"load": 汇总的加载状态, "workers": [各进程状态], "queued": 排队调用数}}
+        """
+        with self._lock:
+            workers = {name: [dict(worker) for worker in items] for name, items in self._workers.items()}
+        
+        return {
+            name: {
+                "load": _aggregate_load(items),
+                "workers": items,
+                "queued": self._queues[name].qsize() if name in self._queues else 0
+            }
+            for name, items in workers.items()
+        }
+    
+    def _handle(self, conn) -> None:
+        """
+        连接处理线程
+        
+        请求格式为("call", 服务名, 方法名, 位置参数, 关键字参数, 进度标记)或("state",)；
+        调用的响应依次为若干("progress", 进度值)，最后为("result", 结果)或("error", 错误)
+        """
+        try:
+            while True:
+                message = conn.recv()
+                if message[0] == "state":
+                    conn.send(("state", self.state()))
+                    continue
+                
+                _, name, method, args, kwargs, progress = message
+                if name not in self._queues or method not in METHODS[name]:
+                    conn.send(("error", {"type": "RuntimeError", "message": f"推理服务不支持: {name}.{method}", "stages": []}))
+                    continue
+                
+                results: "queue.Queue" = queue.Queue()
+                self._queues[name].put(((method, args, kwargs, progress), results))
+                while True:
+                    kind, payload = results.get()
+                    conn.send((kind, payload))
+                    if kind != "progress":
+                        break
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+    
+    def serve_forever(self) -> None:
+        """启动推理进程并在当前线程中监听连接，直到收到中断信号"""
+        for thread in self._threads:
+            thread.start()
+        
+        host, port = _address()
+        with Listener((host, port), authkey=_authkey()) as listener:
+            print(f"推理服务地址: {host}:{port}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except multiprocessing.AuthenticationError:
+                    print("推理服务拒绝连接: 认证口令不一致")
+                    continue
+                except OSError as e:
+                    print(f"推理服务接受连接失败: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+    
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """通知各推理进程处理完当前调用后退出"""
+        self._stopping = True
+        for name, jobs in self._queues.items():
+            for _ in self._workers[name]:
+                jobs.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+def _aggregate_load(workers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    汇总一个服务各推理进程的加载状态，格式同ModelLoader.snapshot
+    
+    任一进程加载完成即可处理请求；全部失败时为失败
+    """
+    if not workers:
+        return {"enabled": False, "preload": True, "status": STATUS_DISABLED, "ready": True, "load_time": None, "error": None}
+    
+    statuses = [worker["status"] for worker in workers]
+    if STATUS_READY in statuses:
+        status = STATUS_READY
+    elif all(item == STATUS_FAILED for item in statuses):
+        status = STATUS_FAILED
+    else:
+        status = STATUS_LOADING
+    
+    load_times = [worker["load_time"] for worker in workers if worker["load_time"] is not None]
+    errors = [worker["error"] for worker in workers if worker["error"]]
+    return {
+        "enabled": True,
+        "preload": True,
+        "status": status,
+        "ready": status == STATUS_READY,
+        "load_time": max(load_times) if load_times else None,
+        "error": errors[0] if errors and status != STATUS_READY else None
+    }
+
+
+def _interrupt(signum, frame) -> None:
+    """收到SIGTERM时按Ctrl+C处理，正常关闭推理进程"""
+    raise KeyboardInterrupt
+
+
+def serve() -> None:
+    """启动推理服务并阻塞运行，Ctrl+C或SIGTERM时退出"""
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, _interrupt)
+    
+    print("正在启动推理服务...")
+    server = ModelServer()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("正在关闭推理服务...")
+        server.shutdown()
+
+
+def start_model_server(timeout: float = 30.0):
+    """
+    在子进程中启动推理服务，等待开始监听后返回
+    
+    未配置认证口令时生成随机口令写入环境变量，之后启动的推理服务和HTTP工作进程继承该口令
+    
+    Args:
+        timeout: 等待监听的最长时间（秒）
+    
+    Returns:
+        推理服务进程
+    """
+    if not _settings().get("authkey") and not os.environ.get(AUTHKEY_ENV):
+        os.environ[AUTHKEY_ENV] = secrets.token_hex(32)
+    
+    process = multiprocessing.get_context("spawn").Process(target=serve, name="model-server")
+    process.start()
+    
+    deadline = time.time() + timeout
+    while time.time() < deadline and process.is_alive():
+        try:
+            Client(_address(), authkey=_authkey()).close()
+            return process
+        except (OSError, multiprocessing.AuthenticationError):
+            time.sleep(0.2)
+    raise RuntimeError(f"推理服务启动失败: {_address()[0]}:{_address()[1]}")
+
+
+class ModelServerClient:
+    """
+    推理服务客户端类
+    
+    启用model_server后，ASR和OCR服务的推理入口通过本客户端转发到推理服务执行，
+    缓存、请求合并和调度排队仍在HTTP进程中完成。连接用完后放回空闲列表复用，
+    同一连接同时只承载一个调用。
+    """
+    
+    _instance = None
+    _initialized = False
+    
+    # 推理进程状态的缓存时间（秒），is_available在每个请求中都会调用
+    STATE_TTL = 1.0
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        if self._initialized:
+            return
+        
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+        self._state: Optional[Dict[str, Any]] = None
+        self._state_at = 0.0
+        self._state_error: Optional[str] = None
+        ModelServerClient._initialized = True
+    
+    @property
+    def enabled(self) -> bool:
+        """是否启用独立推理进程"""
+        return bool(_settings().get("enabled", False))
+    
+    def remote(self, service: str) -> bool:
+        """服务的推理是否转发到推理服务，推理进程自身始终直接执行"""
+        return self.enabled and service in METHODS and not os.environ.get(WORKER_ENV)
+    
+    def _connect(self):
+        """建立新连接"""
+        try:
+            return Client(_address(), authkey=_authkey())
+        except multiprocessing.AuthenticationError:
+            raise RuntimeError(f"推理服务认证失败，请检查model_server.authkey或环境变量{AUTHKEY_ENV}")
+        except OSError as e:
+            host, port = _address()
+            raise RuntimeError(f"无法连接推理服务 {host}:{port}: {e}")
+    
+    def _request(self, message: Tuple[Any, ...], on_progress: Optional[Callable[[Any], None]] = None) -> Tuple[str, Any]:
+        """
+        发送请求并等待最终响应
+        
+        复用的空闲连接可能已被推理服务关闭（如推理服务重启），发送失败时换新连接重试一次
+        """
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        reused = conn is not None
+        
+        while True:
+            if conn is None:
+                conn = self._connect()
+            try:
+                conn.send(message)
+                while True:
+                    kind, payload = conn.recv()
+                    if kind != "progress":
+                        break
+                    if on_progress is not None:
+                        on_progress(payload)
+            except (EOFError, OSError) as e:
+                conn.close()
+                conn = None
+                if reused:
+                    reused = False
+                    continue
+                raise RuntimeError(f"推理服务连接中断: {e}")
+            except BaseException:
+                # 进度回调出错或请求无法序列化时连接上可能还有未读的响应，不能再复用
+                conn.close()
+                raise
+            
+            with self._lock:
+                self._idle.append(conn)
+            return kind, payload
+    
+    def call(self, service: str, method: str, *args: Any, **kwargs: Any) -> Any:
+        """
+        在推理服务中调用服务方法
+        
+        关键字参数中的progress_callback不随请求发送，推理进程汇报的进度在当前线程中回调
+        
+        Args:
+            service: 服务名，'asr'或'ocr'
+            method: 方法名，见METHODS
+            *args: 位置参数
+            **kwargs: 关键字参数
+        
+        Returns:
+            方法的返回值
+        """
+        progress = None
+        callback = None
+        if "progress_callback" in kwargs:
+            callback = kwargs.pop("progress_callback")
+            progress = callback is not None
+        
+        kind, payload = self._request(("call", service, method, args, kwargs, progress), callback)
+        
+        for stage_service, stage, duration in payload.get("stages", []):
+            metrics.observe_stage(stage_service, stage, duration)
+        
+        if kind == "error":
+            error_type = ValueError if payload["type"] == "ValueError" else RuntimeError
+            raise error_type(payload["message"])
+        return payload["value"]
+    
+    def state(self) -> Optional[Dict[str, Any]]:
+        """
+        获取推理服务状态，缓存STATE_TTL秒
+        
+        Returns:
+            ModelServer.state的返回值，连接失败时返回None
+        """
+        now = time.time()
+        if now - self._state_at < self.STATE_TTL:
+            return self._state
+        try:
+            _, state = self._request(("state",))
+            self._state_error = None
+        except RuntimeError as e:
+            state = None
+            self._state_error = str(e)
+        self._state, self._state_at = state, now
+        return state
+    
+    def load_state(self, service: str) -> Dict[str, Any]:
+        """获取服务在推理服务中的加载状态，格式同ModelLoader.snapshot"""
+        state = self.state()
+        if state is None:
+            return {
+                "enabled": True,
+                "preload": True,
+                "status": STATUS_NOT_LOADED,
+                "ready": False,
+                "load_time": None,
+                "error": self._state_error
+            }
+        return state[service]["load"]
+    
+    def usable(self, service: str) -> bool:
+        """推理服务可连接，且服务已启用、模型未全部加载失败"""
+        load = self.load_state(service)
+        return self._state is not None and load["enabled"] and load["status"] != STATUS_FAILED
+    
+    def workers(self, service: str) -> List[Dict[str, Any]]:
+        """获取服务各推理进程的状态"""
+        state = self.state()
+        return state[service]["workers"] if state is not None else []
+    
+    def close(self) -> None:
+        """关闭空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+model_client = ModelServerClient()
+
+
+if __name__ == "__main__":
+    serve()
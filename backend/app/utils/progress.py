@@ -0,0 +1,136 @@
+"""
+进度统计模块
+按页统计多阶段任务的进度、耗时和预计剩余时间
+"""
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+class PageProgress:
+    """
+    按页进度统计类
+    
+    任务由若干阶段组成，每个阶段都要逐页处理一遍，各阶段按权重折算为
+    总进度，预计剩余时间按总进度和已用时间推算。每页的耗时都会记录，
+    用于定位耗时异常的页面：进行中的进度只带各阶段的平均、最大耗时和
+    最近几页的耗时，全部完成时的进度才带完整的每页耗时，进度字典的大小
+    不随页数增长。回调按最小间隔节流，切换阶段和阶段完成时立即回调。
+    多个线程可以同时汇报。
+    """
+    
+    # 进行中的进度字典中每个阶段保留的最近页数
+    RECENT_TIMINGS = 5
+    
+    def __init__(
+        self,
+        total_pages: int,
+        stages: Dict[str, float],
+        callback: Callable[[Dict[str, Any]], None],
+        interval: float = 0.5
+    ):
+        """
+        Args:
+            total_pages: 每个阶段需要处理的页数
+            stages: 阶段名到权重的映射，按执行顺序排列
+            callback: 回调函数，参数为snapshot()返回的进度字典
+            interval: 两次回调的最小间隔（秒）
+        """
+        self.total_pages = max(1, int(total_pages))
+        self.stages = dict(stages)
+        self.interval = interval
+        
+        self._callback = callback
+        self._lock = threading.Lock()
+        self._done: Dict[str, int] = {stage: 0 for stage in self.stages}
+        self._timings: Dict[str, List[List[float]]] = {stage: [] for stage in self.stages}
+        self._total_duration: Dict[str, float] = {stage: 0.0 for stage in self.stages}
+        self._slowest: Dict[str, List[float]] = {}
+        self._stage: Optional[str] = None
+        self._start_time = time.time()
+        self._last_report = 0.0
+    
+    def page_done(self, stage: str, page: int, duration: float) -> None:
+        """
+        记录一页处理完成
+        
+        Args:
+            stage: 阶段名
+            page: 页码（从0开始）
+            duration: 该页在该阶段的耗时（秒）
+        """
+        with self._lock:
+            if stage not in self._done:
+                return
+            self._done[stage] += 1
+            timing = [page, round(duration, 3)]
+            self._timings[stage].append(timing)
+            self._total_duration[stage] += duration
+            if stage not in self._slowest or timing[1] > self._slowest[stage][1]:
+                self._slowest[stage] = timing
+            
+            now = time.time()
+            changed = stage != self._stage
+            self._stage = stage
+            if (not changed and self._done[stage] < self.total_pages
+                    and now - self._last_report < self.interval):
+                return
+            self._last_report = now
+            snapshot = self._snapshot(now)
+        
+        try:
+            self._callback(snapshot)
+        except Exception as e:
+            print(f"进度回调失败: {e}")
+    
+    @property
+    def fraction(self) -> float:
+        """按阶段权重折算的总进度，0-1之间"""
+        total_weight = sum(self.stages.values()) or 1
+        return sum(
+            weight * min(self._done[stage], self.total_pages) / self.total_pages
+            for stage, weight in self.stages.items()
+        ) / total_weight
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取当前进度
+        
+        Returns:
+            包含当前阶段、页数、总进度、已用时间、预计剩余时间和页面耗时统计的字典，
+            全部完成时另带完整的每页耗时page_timings
+        """
+        with self._lock:
+            return self._snapshot(time.time())
+    
+    def _snapshot(self, now: float) -> Dict[str, Any]:
+        """生成进度字典，调用方需持有锁"""
+        fraction = self.fraction
+        elapsed = now - self._start_time
+        eta = elapsed * (1 - fraction) / fraction if fraction > 0 else None
+        stage = self._stage or next(iter(self.stages), None)
+        
+        snapshot = {
+            "stage": stage,
+            "pages_done": self._done.get(stage, 0),
+            "pages_total": self.total_pages,
+            "stages": dict(self._done),
+            "progress": round(fraction, 4),
+            "elapsed": round(elapsed, 2),
+            "eta": round(eta, 2) if eta is not None else None,
+            "page_stats": {
+                key: {
+                    "mean": round(self._total_duration[key] / self._done[key], 3),
+                    "max": slowest[1],
+                    "max_page": slowest[0]
+                }
+                for key, slowest in self._slowest.items()
+            },
+            "recent_timings": {
+                key: [list(timing) for timing in value[-self.RECENT_TIMINGS:]]
+                for key, value in self._timings.items() if value
+            }
+        }
+        if all(done >= self.total_pages for done in self._done.values()):
+            snapshot["page_timings"] = {key: list(value) for key, value in self._timings.items()}
+        return snapshot
@@ -0,0 +1,251 @@
+"""
+任务调度模块
+为ASR、OCR、PDF各服务维护独立的有界工作线程池和优先级队列
+"""
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.app.config import config
+
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+
+class _Job:
+    """队列中的任务"""
+    
+    __slots__ = ("priority", "seq", "task_id", "func", "args", "kwargs", "on_start", "future", "enqueued_at")
+    
+    def __init__(self, priority, seq, task_id, func, args, kwargs, on_start):
+        self.priority = priority
+        self.seq = seq
+        self.task_id = task_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_start = on_start
+        self.future: Future = Future()
+        self.enqueued_at = time.time()
+    
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ServicePool:
+    """
+    单个服务的工作池
+    
+    固定数量的工作线程从优先级队列中取任务执行，优先级数值越小越先执行，
+    同优先级按提交顺序先进先出。
+    """
+    
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = max(1, int(workers))
+        
+        self._queue: List[_Job] = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._shutdown = False
+        
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.avg_duration = 0.0
+    
+    def _ensure_workers(self) -> None:
+        """按需启动工作线程，调用方需持有锁"""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"{self.name}-worker-{len(self._threads)}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+    
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        priority: int = PRIORITY_NORMAL,
+        task_id: Optional[str] = None,
+        on_start: Optional[Callable[[], None]] = None,
+        **kwargs: Any
+    ) -> Future:
+        """
+        提交任务
+        
+        Args:
+            func: 要执行的函数
+            *args: 位置参数
+            priority: 优先级，数值越小越先执行
+            task_id: 关联的异步任务ID，用于查询排队位置
+            on_start: 任务开始执行时的回调
+            **kwargs: 关键字参数
+        
+        Returns:
+            任务结果Future
+        """
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError(f"{self.name}调度器已关闭")
+            job = _Job(priority, next(self._seq), task_id, func, args, kwargs, on_start)
+            heapq.heappush(self._queue, job)
+            self._ensure_workers()
+            self._cond.notify()
+        return job.future
+    
+    def _worker(self) -> None:
+        """工作线程主循环"""
+        while True:
+            with self._cond:
+                while not self._queue and not self._shutdown:
+                    self._cond.wait()
+                if self._shutdown and not self._queue:
+                    return
+                job = heapq.heappop(self._queue)
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                self.running += 1
+            
+            start_time = time.time()
+            try:
+                if job.on_start is not None:
+                    job.on_start()
+                job.future.set_result(job.func(*job.args, **job.kwargs))
+                succeeded = True
+            except BaseException as e:
+                job.future.set_exception(e)
+                succeeded = False
+            
+            duration = time.time() - start_time
+            with self._cond:
+                self.running -= 1
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                finished = self.completed + self.failed
+                self.avg_duration += (duration - self.avg_duration) / min(finished, 20)
+    
+    def queue_position(self, task_id: str) -> Optional[int]:
+        """
+        查询任务在队列中的位置
+        
+        Args:
+            task_id: 异步任务ID
+        
+        Returns:
+            从1开始的排队位置，不在队列中时返回None
+        """
+        with self._cond:
+            waiting = sorted(job for job in self._queue if not job.future.cancelled())
+        for position, job in enumerate(waiting, start=1):
+            if job.task_id == task_id:
+                return position
+        return None
+    
+    @property
+    def queue_depth(self) -> int:
+        """排队中的任务数"""
+        with self._cond:
+            return len(self._queue)
+    
+    def stats(self) -> Dict[str, Any]:
+        """获取工作池统计信息"""
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "running": self.running,
+                "queued": len(self._queue),
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_duration": round(self.avg_duration, 3)
+            }
+    
+    def shutdown(self) -> None:
+        """关闭工作池，取消排队中的任务"""
+        with self._cond:
+            self._shutdown = True
+            for job in self._queue:
+                job.future.cancel()
+            self._queue.clear()
+            self._cond.notify_all()
+
+
+class JobScheduler:
+    """
+    任务调度器类
+    
+    每个服务一个ServicePool，并发数由config.yaml的scheduler.workers配置，
+    避免不同服务的推理任务在同一个线程池中无限制地争抢CPU。
+    """
+    
+    _instance = None
+    _initialized = False
+    
+    DEFAULT_WORKERS = {"asr": 1, "ocr": 2, "pdf": 2}
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        if self._initialized:
+            return
+        
+        workers = {**self.DEFAULT_WORKERS, **config.scheduler.get("workers", {})}
+        self.pools: Dict[str, ServicePool] = {
+            name: ServicePool(name, count) for name, count in workers.items()
+        }
+        JobScheduler._initialized = True
+    
+    def pool(self, service: str) -> ServicePool:
+        """获取服务对应的工作池"""
+        if service not in self.pools:
+            raise KeyError(f"未知的服务: {service}")
+        return self.pools[service]
+    
+    def submit(self, service: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        向服务工作池提交任务，参数同ServicePool.submit
+        
+        Returns:
+            任务结果Future
+        """
+        return self.pool(service).submit(func, *args, **kwargs)
+    
+    async def run(self, service: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        提交任务并等待结果，参数同ServicePool.submit
+        
+        Returns:
+            函数返回值
+        """
+        return await asyncio.wrap_future(self.submit(service, func, *args, **kwargs))
+    
+    def queue_position(self, service: str, task_id: str) -> Optional[int]:
+        """查询任务在服务队列中的位置"""
+        return self.pool(service).queue_position(task_id)
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各服务工作池的统计信息"""
+        return {name: pool.stats() for name, pool in self.pools.items()}
+    
+    def shutdown(self) -> None:
+        """关闭所有工作池"""
+        for pool in self.pools.values():
+            pool.shutdown()
+
+
+job_scheduler = JobScheduler()
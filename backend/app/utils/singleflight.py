@@ -0,0 +1,158 @@
+"""
+请求合并模块
+相同输入和参数的请求正在处理时，后到的请求等待同一次计算的结果，不再重复执行
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class _Call:
+    """一次进行中的计算及等待它的调用方"""
+    
+    def __init__(self):
+        self.task: Optional[asyncio.Future] = None
+        self.waiters = 0
+        self.started = False
+        self.progress: Optional[Any] = None
+        self.on_start: List[Callable[[], None]] = []
+        self.progress_callbacks: List[Callable[[Any], None]] = []
+        self.lock = threading.Lock()
+    
+    def attach(
+        self,
+        on_start: Optional[Callable[[], None]],
+        progress_callback: Optional[Callable[[Any], None]]
+    ) -> None:
+        """加入一个调用方，计算已开始时立即补发开始回调和最近一次进度"""
+        with self.lock:
+            self.waiters += 1
+            if on_start is not None:
+                self.on_start.append(on_start)
+            if progress_callback is not None:
+                self.progress_callbacks.append(progress_callback)
+            started, progress = self.started, self.progress
+        
+        if started and on_start is not None:
+            on_start()
+        if progress is not None and progress_callback is not None:
+            progress_callback(progress)
+    
+    def notify_start(self) -> None:
+        """计算开始执行，通知全部调用方"""
+        with self.lock:
+            self.started = True
+            callbacks = list(self.on_start)
+        for callback in callbacks:
+            _safe_call(callback)
+    
+    def notify_progress(self, progress: Any) -> None:
+        """计算进度更新，通知全部调用方"""
+        with self.lock:
+            self.progress = progress
+            callbacks = list(self.progress_callbacks)
+        for callback in callbacks:
+            _safe_call(callback, progress)
+
+
+def _safe_call(callback: Callable[..., None], *args: Any) -> None:
+    """执行回调，某个调用方的回调出错不影响其他调用方"""
+    try:
+        callback(*args)
+    except Exception as e:
+        print(f"合并请求回调失败: {e}")
+
+
+class SingleFlight:
+    """
+    进行中请求合并类
+    
+    以缓存键标识计算，同一个键的计算进行中时，后到的调用方挂到这次计算上，
+    共享它的开始通知、进度和结果。所有调用方都取消等待后计算才被取消，
+    单个调用方断开不影响其他调用方。复用的计算失败时（例如发起方的输入
+    文件已被删除），后到的调用方用自己的输入重新执行一次。只在当前进程
+    和事件循环内合并。
+    """
+    
+    _instance = None
+    _initialized = False
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        if self._initialized:
+            return
+        
+        self._calls: Dict[str, _Call] = {}
+        self.started = 0
+        self.shared = 0
+        SingleFlight._initialized = True
+    
+    async def run(
+        self,
+        key: str,
+        func: Callable[[Callable[[], None], Callable[[Any], None]], Awaitable[Any]],
+        on_start: Optional[Callable[[], None]] = None,
+        progress_callback: Optional[Callable[[Any], None]] = None,
+        retry_shared: bool = True
+    ) -> Tuple[Any, bool]:
+        """
+        执行计算，相同键的计算进行中时等待其结果
+        
+        Args:
+            key: 计算标识，通常为结果缓存键
+            func: 发起计算的函数，参数为开始回调和进度回调，返回可等待对象
+            on_start: 计算开始执行时的回调
+            progress_callback: 进度回调
+            retry_shared: 复用的计算失败时是否重新执行一次
+        
+        Returns:
+            (计算结果, 是否复用了其他请求的计算)
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        
+        if call is None:
+            call = self._calls[key] = _Call()
+            call.task = asyncio.ensure_future(func(call.notify_start, call.notify_progress))
+            call.task.add_done_callback(lambda _: self._finish(key, call))
+            self.started += 1
+        else:
+            self.shared += 1
+        
+        call.attach(on_start, progress_callback)
+        
+        try:
+            result = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            with call.lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0
+            if abandoned:
+                call.task.cancel()
+            raise
+        except Exception:
+            if not (shared and retry_shared):
+                raise
+            return await self.run(key, func, on_start, progress_callback, retry_shared=False)
+        
+        return result, shared
+    
+    def _finish(self, key: str, call: _Call) -> None:
+        """计算结束，之后的同键请求重新发起计算"""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+    
+    def stats(self) -> Dict[str, Any]:
+        """获取合并统计"""
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "shared": self.shared
+        }
+
+
+single_flight = SingleFlight()
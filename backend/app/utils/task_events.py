@@ -0,0 +1,109 @@
+"""
+任务事件推送模块
+以Server-Sent Events推送异步任务的状态、进度和最终结果，代替客户端轮询
+"""
+import json
+import time
+import asyncio
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+from backend.app.config import config
+from backend.app.models.schemas import TaskStatus
+from backend.app.utils.scheduler import job_scheduler
+from backend.app.utils.task_store import task_store, FINISHED_STATUSES
+
+
+def get_events_config() -> dict:
+    """获取任务事件推送配置"""
+    return config.tasks.get("events", {})
+
+
+def _task_status(service: str, task_id: str) -> Optional[TaskStatus]:
+    """查询任务状态，排队中的任务附带排队位置"""
+    task = task_store.get(task_id, service)
+    if task is None:
+        return None
+    if task["status"] == "pending":
+        task["queue_position"] = job_scheduler.queue_position(service, task_id)
+    return TaskStatus(**task)
+
+
+def _format_event(event: str, data: str) -> str:
+    """生成一条SSE消息"""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _task_event_stream(request: Request, service: str, task_id: str) -> AsyncIterator[str]:
+    """
+    任务状态事件流
+    
+    连接后立即发送一次当前状态，之后任务每次变化发送一次，任务结束时
+    发送最终状态后关闭。本进程内的更新即时推送；其他工作进程中的更新
+    和排队位置变化按recheck_seconds重新查询。状态长时间不变时发送
+    心跳注释保持连接。
+    """
+    events_config = get_events_config()
+    recheck = float(events_config.get("recheck_seconds", 2))
+    heartbeat = float(events_config.get("heartbeat_seconds", 15))
+    
+    yield f"retry: {int(recheck * 1000)}\n\n"
+    
+    last_data = None
+    last_sent = time.monotonic()
+    
+    with task_store.watch(task_id) as changed:
+        while True:
+            changed.clear()
+            status = _task_status(service, task_id)
+            if status is None:
+                yield _format_event("error", json.dumps({"detail": "任务不存在"}, ensure_ascii=False))
+                return
+            
+            data = json.dumps(jsonable_encoder(status), ensure_ascii=False)
+            if data != last_data:
+                yield _format_event("task", data)
+                last_data = data
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= heartbeat:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            
+            if status.status in FINISHED_STATUSES or await request.is_disconnected():
+                return
+            
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=recheck)
+            except asyncio.TimeoutError:
+                pass
+
+
+def task_events_response(request: Request, service: str, task_id: str) -> StreamingResponse:
+    """
+    创建任务状态的SSE响应
+    
+    每条task事件的数据与/task/{task_id}接口返回的TaskStatus相同，
+    任务结束（completed或failed）后服务端关闭连接
+    
+    Args:
+        request: 当前请求，用于检测客户端断开
+        service: 所属服务
+        task_id: 任务ID
+    
+    Returns:
+        text/event-stream响应
+    """
+    if task_store.get(task_id, service) is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    
+    return StreamingResponse(
+        _task_event_stream(request, service, task_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
@@ -0,0 +1,282 @@
+"""
+任务存储模块
+使用SQLite（WAL模式）持久化异步任务状态，供各路由和多个工作进程共享
+"""
+import os
+import json
+import asyncio
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from backend.app.config import config
+
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class TaskStore:
+    """
+    任务存储类
+    
+    每个线程持有独立的数据库连接，WAL模式下读写互不阻塞，
+    多个uvicorn工作进程可以共享同一个数据库文件。
+    已结束的任务超过保留时间后自动清理；因服务重启或进程崩溃而长时间
+    没有更新的未结束任务标记为失败，避免轮询和事件流一直等待。
+    本进程内的任务更新会通知订阅了该任务的事件流。
+    """
+    
+    _instance = None
+    _initialized = False
+    
+    UPDATABLE_FIELDS = ("status", "progress", "message", "result", "detail")
+    JSON_FIELDS = ("result", "detail")
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        if self._initialized:
+            return
+        
+        tasks_config = config.tasks
+        
+        self.db_path = os.path.join(
+            config.paths.get("data", "data"),
+            tasks_config.get("db_name", "tasks.db")
+        )
+        self.ttl = tasks_config.get("ttl_hours", 24) * 3600
+        self.purge_interval = tasks_config.get("purge_interval_minutes", 10) * 60
+        self.stale_timeout = tasks_config.get("stale_minutes", 120) * 60
+        
+        self._local = threading.local()
+        self._last_purge = 0.0
+        self._watchers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._watch_lock = threading.Lock()
+        
+        self._init_schema()
+        self.purge_expired()
+        TaskStore._initialized = True
+    
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _init_schema(self) -> None:
+        """创建任务表和索引"""
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                service TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT NOT NULL DEFAULT '',
+                result TEXT,
+                detail TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_status_updated "
+            "ON tasks (status, updated_at)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_service_created "
+            "ON tasks (service, created_at)"
+        )
+        
+        # 旧版本数据库没有detail列
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+        if "detail" not in columns:
+            try:
+                conn.execute("ALTER TABLE tasks ADD COLUMN detail TEXT")
+            except sqlite3.OperationalError:
+                pass
+    
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """将数据库行转换为TaskStatus结构的字典"""
+        return {
+            "task_id": row["task_id"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "message": row["message"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "detail": json.loads(row["detail"]) if row["detail"] else None
+        }
+    
+    def create(
+        self,
+        service: str,
+        task_id: Optional[str] = None,
+        message: str = "任务已创建"
+    ) -> Dict[str, Any]:
+        """
+        创建任务
+        
+        Args:
+            service: 所属服务，如'asr'、'ocr'、'pdf'
+            task_id: 任务ID，不指定则自动生成
+            message: 初始状态说明
+        
+        Returns:
+            任务状态字典
+        """
+        now = time.time()
+        self._purge_if_due(now)
+        
+        task_id = task_id or str(uuid.uuid4())
+        self._connect().execute(
+            "INSERT INTO tasks (task_id, service, status, progress, message, created_at, updated_at) "
+            "VALUES (?, ?, 'pending', 0, ?, ?, ?)",
+            (task_id, service, message, now, now)
+        )
+        
+        return {
+            "task_id": task_id,
+            "status": "pending",
+            "progress": 0.0,
+            "message": message,
+            "result": None,
+            "detail": None
+        }
+    
+    def get(self, task_id: str, service: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        查询任务状态
+        
+        Args:
+            task_id: 任务ID
+            service: 所属服务，指定时只返回该服务的任务
+        
+        Returns:
+            任务状态字典，不存在时返回None
+        """
+        self._purge_if_due(time.time())
+        
+        if service is None:
+            row = self._connect().execute(
+                "SELECT * FROM tasks WHERE task_id = ?",
+                (task_id,)
+            ).fetchone()
+        else:
+            row = self._connect().execute(
+                "SELECT * FROM tasks WHERE task_id = ? AND service = ?",
+                (task_id, service)
+            ).fetchone()
+        
+        return self._row_to_dict(row) if row else None
+    
+    def update(self, task_id: str, **fields: Any) -> None:
+        """
+        更新任务状态
+        
+        Args:
+            task_id: 任务ID
+            **fields: 要更新的字段，可选status、progress、message、result、detail
+        """
+        unknown = set(fields) - set(self.UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"未知的任务字段: {', '.join(sorted(unknown))}")
+        
+        for name in self.JSON_FIELDS:
+            if fields.get(name) is not None:
+                fields[name] = json.dumps(fields[name], ensure_ascii=False)
+        
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._connect().execute(
+            f"UPDATE tasks SET {assignments}, updated_at = ? WHERE task_id = ?",
+            (*fields.values(), time.time(), task_id)
+        )
+        self._notify(task_id)
+    
+    @contextmanager
+    def watch(self, task_id: str) -> Iterator[asyncio.Event]:
+        """
+        订阅任务变更，需在事件循环中调用
+        
+        本进程内任何线程更新该任务时置位返回的事件，由订阅方清除后继续等待。
+        其他工作进程中的更新不会通知，订阅方需定期重新查询。
+        
+        Args:
+            task_id: 任务ID
+        
+        Yields:
+            任务变更事件
+        """
+        watcher = (asyncio.get_running_loop(), asyncio.Event())
+        with self._watch_lock:
+            self._watchers.setdefault(task_id, []).append(watcher)
+        try:
+            yield watcher[1]
+        finally:
+            with self._watch_lock:
+                watchers = self._watchers.get(task_id, [])
+                if watcher in watchers:
+                    watchers.remove(watcher)
+                if not watchers:
+                    self._watchers.pop(task_id, None)
+    
+    def _notify(self, task_id: str) -> None:
+        """通知订阅了该任务的事件流"""
+        with self._watch_lock:
+            watchers = list(self._watchers.get(task_id, ()))
+        for loop, event in watchers:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass
+    
+    def _purge_if_due(self, now: float) -> None:
+        """距上次清理超过purge_interval时执行清理"""
+        if now - self._last_purge > self.purge_interval:
+            self.purge_expired()
+    
+    def purge_expired(self) -> int:
+        """
+        清理超过保留时间的任务，并将长时间没有更新的未结束任务标记为失败
+        
+        未结束的任务在处理过程中会持续更新进度，超过stale_minutes没有更新
+        说明处理它的进程已经退出；已超过保留时间的任务无论状态都直接删除
+        
+        Returns:
+            清理的任务数
+        """
+        now = self._last_purge = time.time()
+        conn = self._connect()
+        cursor = conn.execute("DELETE FROM tasks WHERE updated_at < ?", (now - self.ttl,))
+        
+        stale = [
+            row["task_id"] for row in conn.execute(
+                "SELECT task_id FROM tasks WHERE status NOT IN (?, ?) AND updated_at < ?",
+                (*FINISHED_STATUSES, now - self.stale_timeout)
+            )
+        ]
+        if stale:
+            conn.execute(
+                f"UPDATE tasks SET status = 'failed', message = ?, updated_at = ? "
+                f"WHERE task_id IN ({', '.join('?' * len(stale))}) AND status NOT IN (?, ?)",
+                ("任务长时间未更新，可能因服务重启而中断，请重新提交", now, *stale, *FINISHED_STATUSES)
+            )
+            for task_id in stale:
+                self._notify(task_id)
+        return cursor.rowcount
+
+
+task_store = TaskStore()
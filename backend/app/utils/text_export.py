@@ -0,0 +1,74 @@
+"""
+文本导出模块
+将按页组织的文本写入Word文档或纯文本文件
+"""
+import os
+from typing import Iterable
+
+
+TEXT_FORMATS = ("docx", "txt")
+
+
+def output_format(output_path: str) -> str:
+    """
+    根据输出文件扩展名判断导出格式
+    
+    Args:
+        output_path: 输出文件路径
+    
+    Returns:
+        'docx'或'txt'
+    """
+    ext = os.path.splitext(output_path)[1].lower().lstrip(".")
+    if ext not in TEXT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {ext}，可选: {', '.join(TEXT_FORMATS)}")
+    return ext
+
+
+def write_pages(pages: Iterable[str], output_path: str) -> int:
+    """
+    按页写出文本，格式由输出文件扩展名决定
+    
+    Word文档中每行文本为一个段落，页与页之间插入分页符；纯文本文件中
+    页与页之间以换页符分隔。pages可以是生成器，纯文本逐页写入文件。
+    
+    Args:
+        pages: 各页文本
+        output_path: 输出文件路径，扩展名为.docx或.txt
+    
+    Returns:
+        字数统计，不含换行
+    """
+    if output_format(output_path) == "txt":
+        return _write_txt(pages, output_path)
+    return _write_docx(pages, output_path)
+
+
+def _write_txt(pages: Iterable[str], output_path: str) -> int:
+    """逐页写入纯文本文件"""
+    word_count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for index, text in enumerate(pages):
+            if index:
+                f.write("\n\f\n")
+            f.write(text)
+            word_count += len(text.replace("\n", ""))
+    return word_count
+
+
+def _write_docx(pages: Iterable[str], output_path: str) -> int:
+    """写入Word文档，每页之后分页"""
+    from docx import Document
+    
+    document = Document()
+    word_count = 0
+    
+    for index, text in enumerate(pages):
+        if index:
+            document.add_page_break()
+        for line in text.splitlines():
+            document.add_paragraph(line)
+        word_count += len(text.replace("\n", ""))
+    
+    document.save(output_path)
+    return word_count
@@ -0,0 +1,169 @@
+"""
+上传文件处理模块
+以固定大小的块流式保存上传文件，同时限制文件大小并计算内容哈希
+"""
+import os
+import time
+import uuid
+import hashlib
+import aiofiles
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import UploadFile, HTTPException
+
+from backend.app.config import config
+from backend.app.utils.metrics import metrics
+
+
+@dataclass
+class SavedUpload:
+    """已保存的上传文件"""
+    path: str
+    size: int
+    sha256: str
+
+
+@dataclass
+class UploadedBytes:
+    """读入内存的上传文件，data直接使用读取时的缓冲区，不另外复制"""
+    data: bytearray
+    size: int
+    sha256: str
+
+
+def get_chunk_size() -> int:
+    """获取流式读写的块大小（字节）"""
+    return int(config.upload.get("chunk_size_kb", 1024) * 1024)
+
+
+def get_max_upload_size(endpoint: str) -> Optional[int]:
+    """
+    获取接口允许的最大上传大小
+    
+    Args:
+        endpoint: 接口类型，如'asr'、'ocr'、'pdf'
+    
+    Returns:
+        最大字节数，未配置时返回None表示不限制
+    """
+    max_size_mb = config.upload.get("max_size_mb", {}).get(endpoint)
+    if max_size_mb is None:
+        return None
+    return int(max_size_mb * 1024 * 1024)
+
+
+def raise_too_large(max_size: int) -> None:
+    """
+    抛出文件过大异常
+    
+    Args:
+        max_size: 允许的最大字节数
+    """
+    raise HTTPException(
+        status_code=413,
+        detail=f"文件过大，最大允许 {max_size / 1024 / 1024:.0f}MB"
+    )
+
+
+async def save_upload_file(
+    upload_file: UploadFile,
+    save_dir: str,
+    max_size: Optional[int] = None,
+    service: Optional[str] = None
+) -> SavedUpload:
+    """
+    流式保存上传的文件
+    
+    按块读取并写入磁盘，内存占用与文件大小无关；超过大小限制时
+    删除已写入的部分并返回413。
+    
+    Args:
+        upload_file: 上传的文件对象
+        save_dir: 保存目录
+        max_size: 最大字节数，None表示不限制
+        service: 所属服务，指定时记录上传保存耗时
+    
+    Returns:
+        保存后的文件信息，包含路径、大小和SHA-256
+    """
+    file_ext = os.path.splitext(upload_file.filename or "")[1]
+    file_name = f"{uuid.uuid4()}{file_ext}"
+    file_path = os.path.join(save_dir, file_name)
+    
+    started = time.perf_counter()
+    chunk_size = get_chunk_size()
+    digest = hashlib.sha256()
+    size = 0
+    
+    try:
+        async with aiofiles.open(file_path, 'wb') as f:
+            while True:
+                chunk = await upload_file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise_too_large(max_size)
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    
+    if service is not None:
+        metrics.observe_stage(service, "upload_save", time.perf_counter() - started)
+    return SavedUpload(path=file_path, size=size, sha256=digest.hexdigest())
+
+
+async def read_upload_file(
+    upload_file: UploadFile,
+    max_size: Optional[int] = None,
+    service: Optional[str] = None
+) -> UploadedBytes:
+    """
+    将上传文件读入内存
+    
+    与save_upload_file一样按块读取、限制大小并计算SHA-256，但不写入
+    uploads目录，内容只在内存中保留一份，内存占用由max_size限制
+    
+    Args:
+        upload_file: 上传的文件对象
+        max_size: 最大字节数，None表示不限制
+        service: 所属服务，指定时记录上传保存耗时
+    
+    Returns:
+        读入的文件内容、大小和SHA-256
+    """
+    started = time.perf_counter()
+    chunk_size = get_chunk_size()
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    
+    while True:
+        chunk = await upload_file.read(chunk_size)
+        if not chunk:
+            break
+        if max_size is not None and len(buffer) + len(chunk) > max_size:
+            raise_too_large(max_size)
+        digest.update(chunk)
+        buffer += chunk
+    
+    if service is not None:
+        metrics.observe_stage(service, "upload_save", time.perf_counter() - started)
+    return UploadedBytes(data=buffer, size=len(buffer), sha256=digest.hexdigest())
+
+
+def remove_upload(file_path: Optional[str], service: str) -> None:
+    """
+    删除处理完毕的上传文件，记录清理耗时
+    
+    Args:
+        file_path: 文件路径，为空或文件不存在时忽略
+        service: 所属服务
+    """
+    if not file_path or not os.path.exists(file_path):
+        return
+    with metrics.stage(service, "cleanup"):
+        os.remove(file_path)
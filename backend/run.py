@@ -12,9 +12,20 @@ from backend.app.config import config
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "backend.app.main:app",
-        host=config.server["host"],
-        port=config.server["port"],
-        reload=config.server.get("debug", False)
-    )
+    model_server = None
+    if config.model_server.get("enabled", False) and config.model_server.get("autostart", True):
+        from backend.app.utils.model_server import start_model_server
+        model_server = start_model_server()
+    
+    try:
+        uvicorn.run(
+            "backend.app.main:app",
+            host=config.server["host"],
+            port=config.server["port"],
+            reload=config.server.get("debug", False),
+            workers=config.server.get("workers", 1)
+        )
+    finally:
+        if model_server is not None:
+            model_server.terminate()
+            model_server.join()
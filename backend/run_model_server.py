@@ -0,0 +1,16 @@
+"""
+推理服务启动脚本
+单独启动Whisper和PaddleOCR的常驻推理进程，供model_server.autostart为false时使用
+须配置model_server.authkey（或设置环境变量OFFICETOOLS_MODEL_SERVER_AUTHKEY），HTTP服务使用相同口令连接
+"""
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.resolve()
+sys.path.insert(0, str(project_root))
+
+from backend.app.utils.model_server import serve
+
+
+if __name__ == "__main__":
+    serve()
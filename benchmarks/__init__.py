@@ -0,0 +1,5 @@
+"""
+离线办公助手基准测试
+在本地生成确定性素材，直接调用各服务或通过FastAPI接口测量吞吐量、延迟和内存峰值，
+用法见 python -m benchmarks --help
+"""
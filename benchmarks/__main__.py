@@ -0,0 +1,166 @@
+"""
+基准测试命令行入口
+
+    python -m benchmarks run [--suite quick|full] [--mode direct,app] [--services asr,ocr,pdf]
+                             [--repeat 3] [--output report.json] [--baseline baseline.json]
+    python -m benchmarks compare report.json baseline.json [--tolerance 0.2]
+    python -m benchmarks fixtures [--suite quick|full]
+    python -m benchmarks load [--mix ocr=20,pdf=3,asr=2] [--arrival burst|uniform|poisson] [--rate 5]
+                              [--target asgi|uvicorn|http://host:port] [--stub] [--no-rate-limit]
+                              [--output load.json]
+"""
+import os
+import sys
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve()))
+
+from benchmarks.cases import SUITES, MODES, SERVICES, prepare_fixtures
+from benchmarks.runner import run_benchmarks, compare_reports, print_comparison, load_report, save_report
+from benchmarks.loadtest import FLOWS, ARRIVALS, parse_mix, run_load_test, print_load_summary
+
+
+def _split(value: str, choices) -> list:
+    """解析逗号分隔的选项"""
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    invalid = [item for item in items if item not in choices]
+    if invalid:
+        raise argparse.ArgumentTypeError(f"不支持的选项: {', '.join(invalid)}，可选: {', '.join(choices)}")
+    return items
+
+
+def _timings(value: str) -> dict:
+    """解析桩耗时，如'asr=2,ocr=0.2,pdf=0.5'"""
+    timings = {}
+    for item in value.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() not in SERVICES:
+            raise argparse.ArgumentTypeError(f"不支持的服务: {name}，可选: {', '.join(SERVICES)}")
+        timings[name.strip()] = float(seconds)
+    return timings
+
+
+def _size(value: str) -> tuple:
+    """解析图片尺寸，如'1280x960'"""
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def _mix(value: str) -> dict:
+    """解析流量组合"""
+    try:
+        return parse_mix(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _default_output(prefix: str = "") -> str:
+    """默认报告路径：输出目录下的benchmarks/<前缀><时间>.json"""
+    from backend.app.config import config
+    name = prefix + datetime.now().strftime("%Y%m%d_%H%M%S") + ".json"
+    return os.path.join(config.paths["outputs"], "benchmarks", name)
+
+
+def main() -> int:
+    """命令行主函数，存在性能退化时返回1"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="离线办公助手基准测试")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run = commands.add_parser("run", help="执行基准测试")
+    run.add_argument("--suite", choices=sorted(SUITES), default="quick", help="测试集，full包含500页PDF和10分钟音频")
+    run.add_argument("--mode", type=lambda v: _split(v, MODES), default=list(MODES), help="direct、app，逗号分隔")
+    run.add_argument("--services", type=lambda v: _split(v, SERVICES), default=list(SERVICES), help="asr、ocr、pdf，逗号分隔")
+    run.add_argument("--repeat", type=int, default=3, help="每个用例的计时调用次数")
+    run.add_argument("--warmup", type=int, default=1, help="每个用例的预热调用次数")
+    run.add_argument("--fixtures-dir", help="素材目录，默认为缓存目录下的benchmarks")
+    run.add_argument("--use-cache", action="store_true", help="保留结果缓存，默认关闭")
+    run.add_argument("--output", help="报告路径，默认为输出目录下的benchmarks/<时间>.json")
+    run.add_argument("--baseline", help="与该基线报告比较")
+    run.add_argument("--tolerance", type=float, default=0.2, help="允许的相对变化，默认0.2")
+    
+    compare = commands.add_parser("compare", help="比较两份报告")
+    compare.add_argument("report", help="本次报告")
+    compare.add_argument("baseline", help="基线报告")
+    compare.add_argument("--tolerance", type=float, default=0.2, help="允许的相对变化，默认0.2")
+    
+    generate = commands.add_parser("fixtures", help="只生成素材")
+    generate.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    generate.add_argument("--fixtures-dir", help="素材目录，默认为缓存目录下的benchmarks")
+    
+    load = commands.add_parser("load", help="并发负载测试")
+    load.add_argument("--mix", type=_mix, default="ocr=20,pdf=3,asr=2",
+                      help=f"各类请求数，逗号分隔，可选: {', '.join(FLOWS)}")
+    load.add_argument("--arrival", choices=ARRIVALS, default="burst", help="burst同时发出，uniform匀速，poisson随机到达")
+    load.add_argument("--rate", type=float, default=5.0, help="uniform和poisson的每秒请求数")
+    load.add_argument("--target", default="asgi", help="asgi（进程内）、uvicorn（本地服务器）或已运行服务的地址")
+    load.add_argument("--stub", action="store_true", help="用固定耗时的桩替换模型推理")
+    load.add_argument("--stub-timing", type=_timings, help="桩的单次耗时（秒），如asr=2,ocr=0.2,pdf=0.5")
+    load.add_argument("--poll-interval", type=float, default=0.5, help="异步任务轮询间隔（秒）")
+    load.add_argument("--sample-interval", type=float, default=0.5, help="队列采样间隔（秒）")
+    load.add_argument("--timeout", type=float, default=600, help="单个请求的超时（秒）")
+    load.add_argument("--no-rate-limit", action="store_true", help="关闭准入控制的客户端速率限制，只对asgi和uvicorn生效")
+    load.add_argument("--allow-duplicates", action="store_true", help="发送相同内容，测试缓存和请求合并")
+    load.add_argument("--image-size", type=_size, default=(1280, 960), help="OCR图片尺寸，如1280x960")
+    load.add_argument("--pdf-pages", type=int, default=10, help="PDF页数")
+    load.add_argument("--audio-seconds", type=float, default=30, help="音频时长（秒）")
+    load.add_argument("--seed", type=int, default=0, help="请求顺序和到达间隔的随机种子")
+    load.add_argument("--output", help="结果路径，默认为输出目录下的benchmarks/load_<时间>.json")
+    
+    args = parser.parse_args()
+    
+    if args.command == "fixtures":
+        from backend.app.config import config
+        fixtures_dir = args.fixtures_dir or os.path.join(config.paths["cache"], "benchmarks")
+        for kind, items in prepare_fixtures(args.suite, fixtures_dir).items():
+            for label, path, _ in items:
+                print(f"{kind:<10} {label:<20} {path}")
+        return 0
+    
+    if args.command == "load":
+        report = run_load_test(
+            mix=args.mix,
+            arrival=args.arrival,
+            rate=args.rate,
+            target=args.target,
+            stub=args.stub,
+            stub_timings=args.stub_timing,
+            poll_interval=args.poll_interval,
+            sample_interval=args.sample_interval,
+            timeout=args.timeout,
+            unique=not args.allow_duplicates,
+            image_size=args.image_size,
+            pdf_pages=args.pdf_pages,
+            audio_seconds=args.audio_seconds,
+            seed=args.seed,
+            rate_limit=not args.no_rate_limit
+        )
+        print_load_summary(report)
+        save_report(report, args.output or _default_output("load_"))
+        return 0
+    
+    if args.command == "compare":
+        rows = compare_reports(load_report(args.report), load_report(args.baseline), args.tolerance)
+        return 1 if print_comparison(rows, args.tolerance) else 0
+    
+    report = run_benchmarks(
+        suite=args.suite,
+        modes=args.mode,
+        services=args.services,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        fixtures_dir=args.fixtures_dir,
+        use_cache=args.use_cache
+    )
+    
+    save_report(report, args.output or _default_output())
+    
+    if args.baseline:
+        rows = compare_reports(report, load_report(args.baseline), args.tolerance)
+        return 1 if print_comparison(rows, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
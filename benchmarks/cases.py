@@ -0,0 +1,236 @@
+"""
+基准测试用例模块
+定义各档测试集使用的素材，并生成直接调用服务和通过FastAPI接口调用的测试用例
+"""
+import os
+import shutil
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks import fixtures
+
+
+# 各档测试集的素材规格
+SUITES: Dict[str, Dict[str, List[Any]]] = {
+    "quick": {
+        "audio_seconds": [5, 30],
+        "image_sizes": [(640, 480), (1280, 960), (2480, 3508)],
+        "text_pdf_pages": [1, 10],
+        "image_pdf_pages": [1, 10]
+    },
+    "full": {
+        "audio_seconds": [5, 30, 120, 600],
+        "image_sizes": [(640, 480), (1280, 960), (2480, 3508), (4000, 3000), (10240, 2560)],
+        "text_pdf_pages": [1, 10, 100, 500],
+        "image_pdf_pages": [1, 10, 100, 500]
+    }
+}
+
+MODES = ("direct", "app")
+SERVICES = ("asr", "ocr", "pdf")
+
+
+@dataclass
+class BenchCase:
+    """一个测试用例"""
+    name: str
+    service: str
+    mode: str
+    units: float
+    unit: str
+    run: Callable[[], None]
+    skip_reason: Optional[str] = None
+
+
+def prepare_fixtures(suite: str, fixtures_dir: str) -> Dict[str, List[Tuple[str, str, float]]]:
+    """
+    生成测试集所需的素材，已生成的直接复用
+    
+    Args:
+        suite: 测试集名，见SUITES
+        fixtures_dir: 素材目录
+    
+    Returns:
+        {素材类型: [(标签, 文件路径, 计量单位数), ...]}
+    """
+    spec = SUITES[suite]
+    os.makedirs(fixtures_dir, exist_ok=True)
+    
+    def target(name: str) -> str:
+        return os.path.join(fixtures_dir, name)
+    
+    prepared: Dict[str, List[Tuple[str, str, float]]] = {"audio": [], "image": [], "text_pdf": [], "image_pdf": []}
+    
+    for seconds in spec["audio_seconds"]:
+        label = f"speech_{seconds}s"
+        prepared["audio"].append((label, fixtures.make_speech_wav(target(f"{label}.wav"), seconds), seconds))
+    
+    for width, height in spec["image_sizes"]:
+        label = f"image_{width}x{height}"
+        path = fixtures.make_text_image(target(f"{label}.png"), width, height)
+        prepared["image"].append((label, path, width * height / 1e6))
+    
+    for pages in spec["text_pdf_pages"]:
+        label = f"text_{pages}p"
+        prepared["text_pdf"].append((label, fixtures.make_text_pdf(target(f"{label}.pdf"), pages), pages))
+    
+    for pages in spec["image_pdf_pages"]:
+        label = f"scan_{pages}p"
+        prepared["image_pdf"].append((label, fixtures.make_image_pdf(target(f"{label}.pdf"), pages), pages))
+    
+    return prepared
+
+
+def _clear_dir(path: str) -> None:
+    """清空目录，保留目录本身"""
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def _availability() -> Dict[str, Optional[str]]:
+    """各服务不可用的原因，可用时为None"""
+    from backend.app.services.asr_service import asr_service
+    from backend.app.services.ocr_service import ocr_service
+    from backend.app.services.pdf_service import pdf_service
+    
+    return {
+        "asr": None if asr_service.is_available() else "语音识别服务不可用，请安装openai-whisper",
+        "ocr": None if ocr_service.is_available() else "OCR服务不可用，请安装paddleocr",
+        "pdf": None if pdf_service.is_available() else "PDF转换服务不可用，请安装pdf2docx"
+    }
+
+
+def direct_cases(prepared: Dict[str, List[Tuple[str, str, float]]], work_dir: str) -> List[BenchCase]:
+    """
+    生成直接调用AsrService、OcrService、PdfService的用例
+    
+    输出文件写入work_dir，每次调用后删除
+    
+    Args:
+        prepared: prepare_fixtures的返回值
+        work_dir: 临时输出目录
+    
+    Returns:
+        用例列表
+    """
+    from backend.app.services.asr_service import asr_service
+    from backend.app.services.ocr_service import ocr_service
+    from backend.app.services.pdf_service import pdf_service
+    
+    unavailable = _availability()
+    os.makedirs(work_dir, exist_ok=True)
+    
+    def with_output(func: Callable[..., Any], path: str, ext: str, **kwargs: Any) -> Callable[[], None]:
+        output_path = os.path.join(work_dir, f"output{ext}")
+        
+        def run() -> None:
+            try:
+                func(path, output_path, **kwargs)
+            finally:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+        return run
+    
+    cases = []
+    for label, path, seconds in prepared["audio"]:
+        cases.append(BenchCase(
+            f"direct/asr.transcribe/{label}", "asr", "direct", seconds, "audio_seconds",
+            lambda path=path: asr_service.transcribe(path, long_audio=None),
+            unavailable["asr"]
+        ))
+    
+    for label, path, megapixels in prepared["image"]:
+        cases.append(BenchCase(
+            f"direct/ocr.recognize/{label}", "ocr", "direct", megapixels, "megapixels",
+            lambda path=path: ocr_service.recognize(path),
+            unavailable["ocr"]
+        ))
+    
+    for label, path, pages in prepared["text_pdf"]:
+        cases.append(BenchCase(
+            f"direct/pdf.convert/{label}", "pdf", "direct", pages, "pages",
+            with_output(pdf_service.convert, path, ".docx"),
+            unavailable["pdf"]
+        ))
+        cases.append(BenchCase(
+            f"direct/pdf.extract_text/{label}", "pdf", "direct", pages, "pages",
+            with_output(pdf_service.extract_text, path, ".docx"),
+            unavailable["pdf"]
+        ))
+    
+    for label, path, pages in prepared["image_pdf"]:
+        cases.append(BenchCase(
+            f"direct/pdf.ocr_convert/{label}", "pdf", "direct", pages, "pages",
+            with_output(pdf_service.ocr_convert, path, ".docx"),
+            unavailable["pdf"] or unavailable["ocr"]
+        ))
+    
+    return cases
+
+
+def app_cases(
+    prepared: Dict[str, List[Tuple[str, str, float]]],
+    client: Any,
+    outputs_dir: str
+) -> List[BenchCase]:
+    """
+    生成通过FastAPI接口调用的用例
+    
+    请求经过上传保存、参数校验、调度排队和结果写出的完整流程，
+    接口生成的输出文件每次调用后清理
+    
+    Args:
+        prepared: prepare_fixtures的返回值
+        client: fastapi.testclient.TestClient实例
+        outputs_dir: 接口的输出目录（config.paths["outputs"]）
+    
+    Returns:
+        用例列表
+    """
+    unavailable = _availability()
+    
+    def post(url: str, filename: str, path: str, content_type: str, data: Optional[Dict[str, str]] = None):
+        with open(path, "rb") as f:
+            content = f.read()
+        
+        def run() -> None:
+            try:
+                response = client.post(url, files={"file": (filename, content, content_type)}, data=data or {})
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} 返回 {response.status_code}: {response.text[:200]}")
+            finally:
+                _clear_dir(outputs_dir)
+        return run
+    
+    cases = []
+    for label, path, seconds in prepared["audio"]:
+        cases.append(BenchCase(
+            f"app/asr.transcribe/{label}", "asr", "app", seconds, "audio_seconds",
+            post("/api/asr/transcribe", "speech.wav", path, "audio/wav"),
+            unavailable["asr"]
+        ))
+    
+    for label, path, megapixels in prepared["image"]:
+        cases.append(BenchCase(
+            f"app/ocr.recognize/{label}", "ocr", "app", megapixels, "megapixels",
+            post("/api/ocr/recognize", "image.png", path, "image/png"),
+            unavailable["ocr"]
+        ))
+    
+    for label, path, pages in prepared["text_pdf"]:
+        for mode in ("layout", "text"):
+            cases.append(BenchCase(
+                f"app/pdf.convert.{mode}/{label}", "pdf", "app", pages, "pages",
+                post("/api/pdf/convert", "document.pdf", path, "application/pdf", {"mode": mode}),
+                unavailable["pdf"]
+            ))
+    
+    for label, path, pages in prepared["image_pdf"]:
+        cases.append(BenchCase(
+            f"app/pdf.convert.ocr/{label}", "pdf", "app", pages, "pages",
+            post("/api/pdf/convert", "document.pdf", path, "application/pdf", {"mode": "ocr"}),
+            unavailable["pdf"] or unavailable["ocr"]
+        ))
+    
+    return cases
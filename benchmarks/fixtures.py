@@ -0,0 +1,254 @@
+"""
+基准测试素材生成模块
+在本地生成确定性的测试素材：类语音WAV、渲染文字图片、纯文字PDF和扫描件PDF，
+相同参数每次生成的内容相同，已生成的文件直接复用
+"""
+import os
+import wave
+from typing import List, Tuple
+
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+
+# 生成文字用的词表，Hershey字体只支持ASCII字符
+WORDS = (
+    "office tools offline speech text image document page report meeting "
+    "budget quarter result summary project schedule review system model "
+    "network memory process worker queue latency throughput table figure "
+    "section chapter invoice contract approval deadline customer product"
+).split()
+
+
+def _rng(seed: int) -> np.random.Generator:
+    """创建固定种子的随机数生成器"""
+    return np.random.default_rng(seed)
+
+
+def _text_lines(rng: np.random.Generator, count: int, words_per_line: Tuple[int, int]) -> List[str]:
+    """生成count行随机词组成的文字"""
+    lines = []
+    for _ in range(count):
+        n = int(rng.integers(words_per_line[0], words_per_line[1] + 1))
+        lines.append(" ".join(WORDS[i] for i in rng.integers(0, len(WORDS), n)))
+    return lines
+
+
+def _syllable(rng: np.random.Generator, duration: float) -> np.ndarray:
+    """
+    合成一个浊音音节
+    
+    基频沿音节缓慢滑动，谐波幅度按三个共振峰包络加权，
+    频谱结构接近元音，能触发语音识别模型的解码
+    """
+    n = int(duration * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    f0_start, f0_end = rng.uniform(110, 230), rng.uniform(100, 220)
+    f0 = np.linspace(f0_start, f0_end, n)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    formants = (rng.uniform(300, 900), rng.uniform(900, 2300), rng.uniform(2300, 3200))
+    
+    signal = np.zeros(n)
+    for harmonic in range(1, 30):
+        freq = harmonic * (f0_start + f0_end) / 2
+        if freq > SAMPLE_RATE / 2 - 500:
+            break
+        gain = sum(np.exp(-((freq - f) / 180) ** 2) for f in formants) + 0.02
+        signal += gain / harmonic ** 0.5 * np.sin(harmonic * phase)
+    
+    envelope = np.hanning(n) ** 0.6
+    tremolo = 1 + 0.1 * np.sin(2 * np.pi * rng.uniform(4, 7) * t)
+    return signal * envelope * tremolo
+
+
+def make_speech_wav(path: str, seconds: float, seed: int = 0) -> str:
+    """
+    生成类语音的16kHz单声道WAV
+    
+    由长短不一的音节、音节间短停顿和句间长停顿组成，叠加少量底噪
+    
+    Args:
+        path: 输出路径，文件已存在时直接返回
+        seconds: 时长（秒）
+        seed: 随机种子
+    
+    Returns:
+        文件路径
+    """
+    if os.path.exists(path):
+        return path
+    
+    rng = _rng(seed)
+    total = int(seconds * SAMPLE_RATE)
+    audio = np.zeros(total)
+    pos = int(0.3 * SAMPLE_RATE)
+    syllables = 0
+    
+    while pos < total:
+        duration = rng.uniform(0.12, 0.32)
+        chunk = _syllable(rng, duration)[:total - pos]
+        audio[pos:pos + len(chunk)] += chunk
+        pos += len(chunk)
+        syllables += 1
+        # 每6到12个音节为一句，句间停顿更长
+        if syllables % int(rng.integers(6, 13)) == 0:
+            pos += int(rng.uniform(0.4, 0.9) * SAMPLE_RATE)
+        else:
+            pos += int(rng.uniform(0.03, 0.12) * SAMPLE_RATE)
+    
+    audio /= max(np.abs(audio).max(), 1e-6)
+    audio = audio * 0.6 + rng.normal(0, 0.003, total)
+    pcm = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+    
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with wave.open(tmp_path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_text_image(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """
+    渲染白底黑字的文字图片
+    
+    字号随图片宽度缩放，每行约占宽度的八成，模拟文档截图或扫描页
+    
+    Args:
+        width: 宽度
+        height: 高度
+        seed: 随机种子
+    
+    Returns:
+        BGR图像数组
+    """
+    import cv2
+    
+    rng = _rng(seed)
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    scale = max(width / 1400, 0.4)
+    thickness = max(int(round(scale * 2)), 1)
+    line_height = int(48 * scale)
+    margin = int(60 * scale)
+    
+    y = margin + line_height
+    for line in _text_lines(rng, max((height - 2 * margin) // line_height, 1), (5, 9)):
+        cv2.putText(image, line, (margin, y), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), thickness, cv2.LINE_AA)
+        y += line_height
+    return image
+
+
+def make_text_image(path: str, width: int, height: int, seed: int = 0) -> str:
+    """
+    生成文字图片文件，格式由扩展名决定
+    
+    Args:
+        path: 输出路径，文件已存在时直接返回
+        width: 宽度
+        height: 高度
+        seed: 随机种子
+    
+    Returns:
+        文件路径
+    """
+    if os.path.exists(path):
+        return path
+    
+    import cv2
+    
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    ok, encoded = cv2.imencode(os.path.splitext(path)[1], render_text_image(width, height, seed))
+    if not ok:
+        raise RuntimeError(f"图片编码失败: {path}")
+    
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encoded.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _save_pdf(doc, path: str) -> None:
+    """保存PDF，固定元数据中的时间并不生成新的文件ID，使输出逐字节一致"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    doc.set_metadata({"producer": "OfficeTools benchmarks", "creationDate": "", "modDate": ""})
+    tmp_path = path + ".tmp"
+    doc.save(tmp_path, garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+    os.replace(tmp_path, path)
+
+
+def make_text_pdf(path: str, pages: int, seed: int = 0) -> str:
+    """
+    生成只含文字的PDF，每页一个标题和约40行正文
+    
+    Args:
+        path: 输出路径，文件已存在时直接返回
+        pages: 页数
+        seed: 随机种子
+    
+    Returns:
+        文件路径
+    """
+    if os.path.exists(path):
+        return path
+    
+    import fitz
+    
+    rng = _rng(seed)
+    doc = fitz.open()
+    for index in range(pages):
+        page = doc.new_page(width=595, height=842)
+        page.insert_text((60, 70), f"Section {index + 1}", fontsize=16)
+        y = 100
+        for line in _text_lines(rng, 40, (6, 11)):
+            page.insert_text((60, y), line, fontsize=10)
+            y += 17
+    
+    _save_pdf(doc, path)
+    return path
+
+
+def make_image_pdf(path: str, pages: int, seed: int = 0, variants: int = 4) -> str:
+    """
+    生成只含整页图片的扫描件PDF
+    
+    页面图片为A4@150dpi的文字图片，共variants种，按页循环引用同一图片对象，
+    500页的文件也只有几MB
+    
+    Args:
+        path: 输出路径，文件已存在时直接返回
+        pages: 页数
+        seed: 随机种子
+        variants: 不同页面图片的数量
+    
+    Returns:
+        文件路径
+    """
+    if os.path.exists(path):
+        return path
+    
+    import cv2
+    import fitz
+    
+    streams = []
+    for index in range(min(variants, pages)):
+        ok, encoded = cv2.imencode(".png", render_text_image(1240, 1754, seed + index))
+        streams.append(encoded.tobytes())
+    
+    doc = fitz.open()
+    xrefs: List[int] = []
+    for index in range(pages):
+        page = doc.new_page(width=595, height=842)
+        variant = index % len(streams)
+        if variant < len(xrefs):
+            page.insert_image(page.rect, xref=xrefs[variant])
+        else:
+            xrefs.append(page.insert_image(page.rect, stream=streams[variant]))
+    
+    _save_pdf(doc, path)
+    return path
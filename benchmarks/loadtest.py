@@ -0,0 +1,605 @@
+"""
+HTTP负载测试模块
+按配置的流量组合和到达速率并发请求FastAPI应用，异步任务由客户端轮询至结束，
+统计延迟分布、错误率与503/429比例，并定时采样/metrics记录各服务队列的增长
+"""
+import os
+import re
+import time
+import uuid
+import random
+import asyncio
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks import fixtures
+from benchmarks.runner import percentile
+
+
+# 请求类型：poll为异步接口的任务查询地址，不配置的为同步接口
+FLOWS: Dict[str, Dict[str, Any]] = {
+    "ocr": {
+        "service": "ocr",
+        "url": "/api/ocr/recognize",
+        "fixture": "image",
+        "filename": "image.png",
+        "content_type": "image/png"
+    },
+    "ocr_async": {
+        "service": "ocr",
+        "url": "/api/ocr/recognize/async",
+        "poll": "/api/ocr/task/{task_id}",
+        "fixture": "image",
+        "filename": "image.png",
+        "content_type": "image/png"
+    },
+    "pdf": {
+        "service": "pdf",
+        "url": "/api/pdf/convert/async",
+        "poll": "/api/pdf/task/{task_id}",
+        "fixture": "pdf",
+        "filename": "document.pdf",
+        "content_type": "application/pdf",
+        "data": {"mode": "layout"}
+    },
+    "pdf_text": {
+        "service": "pdf",
+        "url": "/api/pdf/convert/async",
+        "poll": "/api/pdf/task/{task_id}",
+        "fixture": "pdf",
+        "filename": "document.pdf",
+        "content_type": "application/pdf",
+        "data": {"mode": "text"}
+    },
+    "asr": {
+        "service": "asr",
+        "url": "/api/asr/transcribe/async",
+        "poll": "/api/asr/task/{task_id}",
+        "fixture": "audio",
+        "filename": "speech.wav",
+        "content_type": "audio/wav"
+    }
+}
+
+ARRIVALS = ("burst", "uniform", "poisson")
+
+QUEUE_METRIC = re.compile(r'^officetools_(queue_depth|jobs_running)\{service="(\w+)"\} (\S+)$')
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """解析流量组合，如'ocr=20,pdf=3,asr=2'"""
+    mix = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, count = item.partition("=")
+        name = name.strip()
+        if name not in FLOWS:
+            raise ValueError(f"不支持的请求类型: {name}，可选: {', '.join(FLOWS)}")
+        mix[name] = int(count or 1)
+    return mix
+
+
+def build_plan(mix: Dict[str, int], arrival: str, rate: float, seed: int = 0) -> List[Tuple[float, str]]:
+    """
+    生成请求计划
+    
+    各类请求按固定种子打乱顺序；burst全部同时发出，uniform按rate等间隔发出，
+    poisson的间隔服从均值为1/rate的指数分布
+    
+    Args:
+        mix: {请求类型: 数量}
+        arrival: 到达方式，见ARRIVALS
+        rate: 每秒请求数，burst时忽略
+        seed: 随机种子
+    
+    Returns:
+        [(相对开始时间, 请求类型), ...]
+    """
+    rng = random.Random(seed)
+    names = [name for name, count in mix.items() for _ in range(count)]
+    rng.shuffle(names)
+    
+    plan = []
+    offset = 0.0
+    for name in names:
+        plan.append((offset, name))
+        if arrival == "uniform":
+            offset += 1 / rate
+        elif arrival == "poisson":
+            offset += rng.expovariate(rate)
+    return plan
+
+
+class DetachedASGITransport(httpx.AsyncBaseTransport):
+    """
+    在当前事件循环中直接调用ASGI应用的传输层
+    
+    httpx自带的ASGITransport等应用调用完全结束才返回，BackgroundTasks
+    中的异步任务会被算进提交请求的耗时；这里响应体发送完毕即返回，
+    后台任务继续在事件循环中执行，与真实服务器的行为一致
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self._background = set()
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "root_path": "",
+            "headers": [(key.lower(), value) for key, value in request.headers.raw],
+            "client": ("127.0.0.1", 0),
+            "server": (request.url.host, request.url.port or 80)
+        }
+        
+        request_sent = False
+        disconnected = asyncio.Event()
+        response_done = asyncio.Event()
+        status = 500
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+        
+        async def send(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_done.set()
+        
+        app_task = asyncio.ensure_future(self.app(scope, receive, send))
+        done_waiter = asyncio.ensure_future(response_done.wait())
+        await asyncio.wait({app_task, done_waiter}, return_when=asyncio.FIRST_COMPLETED)
+        
+        if not response_done.is_set():
+            done_waiter.cancel()
+            app_task.result()
+            raise RuntimeError("应用未返回响应")
+        
+        disconnected.set()
+        if not app_task.done():
+            self._background.add(app_task)
+            app_task.add_done_callback(self._finish_background)
+        elif not app_task.cancelled():
+            app_task.exception()
+        
+        return httpx.Response(status, headers=headers, content=b"".join(chunks), request=request)
+    
+    def _finish_background(self, task: asyncio.Future) -> None:
+        """后台任务结束，取出异常避免未处理警告"""
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"后台任务出错: {task.exception()}")
+    
+    async def aclose(self) -> None:
+        """等待仍在执行的后台任务"""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+
+class QueueSampler:
+    """定时采样/metrics中各服务的排队数和执行中任务数"""
+    
+    def __init__(self, client: httpx.AsyncClient, interval: float):
+        self.client = client
+        self.interval = interval
+        self.samples: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+    
+    async def sample(self) -> None:
+        """采样一次，/metrics不可用时跳过"""
+        try:
+            response = await self.client.get("/metrics")
+        except httpx.HTTPError:
+            return
+        if response.status_code != 200:
+            return
+        
+        sample: Dict[str, Any] = {"t": round(time.perf_counter() - self._started, 3), "queued": {}, "running": {}}
+        for line in response.text.splitlines():
+            match = QUEUE_METRIC.match(line)
+            if match:
+                kind = "queued" if match.group(1) == "queue_depth" else "running"
+                sample[kind][match.group(2)] = float(match.group(3))
+        self.samples.append(sample)
+    
+    async def run(self, stop: asyncio.Event) -> None:
+        """采样直到stop被设置，结束时再采样一次"""
+        while not stop.is_set():
+            await self.sample()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+        await self.sample()
+
+
+def _slope(points: List[Tuple[float, float]]) -> Optional[float]:
+    """最小二乘拟合斜率"""
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def summarize_queues(samples: List[Dict[str, Any]], arrival_window: float) -> Dict[str, Any]:
+    """
+    汇总各服务队列变化
+    
+    growth_per_second为请求到达期间排队数的拟合斜率，持续为正说明
+    到达速率超过处理能力
+    """
+    services = sorted({name for sample in samples for name in sample["queued"]})
+    summary = {}
+    for name in services:
+        queued = [(sample["t"], sample["queued"].get(name, 0.0)) for sample in samples]
+        running = [sample["running"].get(name, 0.0) for sample in samples]
+        window = [point for point in queued if point[0] <= arrival_window] if arrival_window > 0 else []
+        slope = _slope(window)
+        summary[name] = {
+            "max_queued": max(value for _, value in queued),
+            "max_running": max(running),
+            "growth_per_second": round(slope, 4) if slope is not None else None
+        }
+    return summary
+
+
+def _latency_stats(values: List[float]) -> Optional[Dict[str, float]]:
+    """延迟分布"""
+    if not values:
+        return None
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p90": round(percentile(values, 90), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "max": round(max(values), 4),
+        "mean": round(sum(values) / len(values), 4)
+    }
+
+
+def summarize_requests(records: List[Dict[str, Any]], wall_time: float) -> Dict[str, Any]:
+    """按请求类型和总体汇总成功率、错误率和延迟分布"""
+    groups: Dict[str, List[Dict[str, Any]]] = {"all": records}
+    for record in records:
+        groups.setdefault(record["flow"], []).append(record)
+    
+    summary = {}
+    for name, items in groups.items():
+        count = len(items)
+        outcomes: Dict[str, int] = {}
+        for record in items:
+            outcomes[record["outcome"]] = outcomes.get(record["outcome"], 0) + 1
+        ok = [record for record in items if record["outcome"] == "ok"]
+        summary[name] = {
+            "requests": count,
+            "ok": len(ok),
+            "error_rate": round(1 - len(ok) / count, 4),
+            "rate_503": round(outcomes.get("http_503", 0) / count, 4),
+            "rate_429": round(outcomes.get("http_429", 0) / count, 4),
+            "outcomes": outcomes,
+            "throughput": round(len(ok) / wall_time, 4) if wall_time > 0 else None,
+            "latency": _latency_stats([record["latency"] for record in ok]),
+            "submit_latency": _latency_stats([record["submit_latency"] for record in items if "submit_latency" in record])
+        }
+    return summary
+
+
+class LoadTest:
+    """
+    负载测试
+    
+    请求内容默认在文件末尾附加本次测试的标识和请求序号，使每个请求的
+    内容哈希不同，避免被结果缓存和请求合并吸收
+    """
+    
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        payloads: Dict[str, bytes],
+        poll_interval: float = 0.5,
+        timeout: float = 600,
+        unique: bool = True
+    ):
+        self.client = client
+        self.payloads = payloads
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.unique = unique
+        self.run_id = uuid.uuid4().hex[:8]
+    
+    def _content(self, flow: Dict[str, Any], index: int) -> bytes:
+        """请求的文件内容，PNG、PDF和WAV的解码都会忽略末尾附加的字节"""
+        content = self.payloads[flow["fixture"]]
+        return content + f"\nloadtest-{self.run_id}-{index}\n".encode() if self.unique else content
+    
+    async def request(self, index: int, name: str) -> Dict[str, Any]:
+        """发送一个请求，异步接口轮询至任务结束"""
+        flow = FLOWS[name]
+        record: Dict[str, Any] = {"index": index, "flow": name}
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        
+        try:
+            response = await self.client.post(
+                flow["url"],
+                files={"file": (flow["filename"], self._content(flow, index), flow["content_type"])},
+                data=flow.get("data", {}),
+                timeout=self.timeout
+            )
+            record["submit_latency"] = time.perf_counter() - started
+            record["status"] = response.status_code
+            if response.status_code != 200:
+                record["outcome"] = f"http_{response.status_code}"
+                return record
+            
+            if "poll" in flow:
+                poll_url = flow["poll"].format(task_id=response.json()["task_id"])
+                polls = 0
+                while True:
+                    if time.perf_counter() > deadline:
+                        record["outcome"] = "timeout"
+                        return record
+                    await asyncio.sleep(self.poll_interval)
+                    status = await self.client.get(poll_url)
+                    polls += 1
+                    if status.status_code != 200:
+                        record["outcome"] = f"poll_http_{status.status_code}"
+                        return record
+                    task = status.json()
+                    if task["status"] in ("completed", "failed"):
+                        break
+                record["polls"] = polls
+                if task["status"] == "failed":
+                    record["outcome"] = "task_failed"
+                    record["error"] = task.get("message")
+                    return record
+            
+            record["outcome"] = "ok"
+            record["latency"] = time.perf_counter() - started
+        except httpx.TimeoutException:
+            record["outcome"] = "timeout"
+        except Exception as e:
+            record["outcome"] = "error"
+            record["error"] = str(e)
+        return record
+    
+    async def run(self, plan: List[Tuple[float, str]], sample_interval: float = 0.5) -> Dict[str, Any]:
+        """
+        按计划发送全部请求并等待结束
+        
+        Returns:
+            包含逐请求记录、汇总和队列采样的结果
+        """
+        sampler = QueueSampler(self.client, sample_interval)
+        stop = asyncio.Event()
+        sampler_task = asyncio.ensure_future(sampler.run(stop))
+        started = time.perf_counter()
+        
+        async def delayed(index: int, offset: float, name: str) -> Dict[str, Any]:
+            await asyncio.sleep(max(offset - (time.perf_counter() - started), 0))
+            return await self.request(index, name)
+        
+        records = await asyncio.gather(*(
+            delayed(index, offset, name) for index, (offset, name) in enumerate(plan)
+        ))
+        wall_time = time.perf_counter() - started
+        stop.set()
+        await sampler_task
+        
+        arrival_window = plan[-1][0] if plan else 0.0
+        return {
+            "wall_time": round(wall_time, 3),
+            "arrival_window": round(arrival_window, 3),
+            "summary": summarize_requests(list(records), wall_time),
+            "queues": summarize_queues(sampler.samples, arrival_window),
+            "queue_samples": sampler.samples,
+            "requests": [
+                {key: round(value, 4) if isinstance(value, float) else value for key, value in record.items()}
+                for record in records
+            ]
+        }
+
+
+def load_payloads(fixtures_dir: str, image_size: Tuple[int, int], pdf_pages: int, audio_seconds: float) -> Dict[str, bytes]:
+    """生成并读取负载测试用的素材"""
+    paths = {
+        "image": fixtures.make_text_image(
+            os.path.join(fixtures_dir, f"image_{image_size[0]}x{image_size[1]}.png"), *image_size
+        ),
+        "pdf": fixtures.make_text_pdf(os.path.join(fixtures_dir, f"text_{pdf_pages}p.pdf"), pdf_pages),
+        "audio": fixtures.make_speech_wav(os.path.join(fixtures_dir, f"speech_{audio_seconds:g}s.wav"), audio_seconds)
+    }
+    payloads = {}
+    for kind, path in paths.items():
+        with open(path, "rb") as f:
+            payloads[kind] = f.read()
+    return payloads
+
+
+async def _run_in_process(app, load_test_args: Dict[str, Any], plan, sample_interval: float) -> Dict[str, Any]:
+    """在当前事件循环中启动应用并执行负载测试"""
+    transport = DetachedASGITransport(app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            result = await LoadTest(client, **load_test_args).run(plan, sample_interval)
+            await transport.aclose()
+    return result
+
+
+def _start_uvicorn(app, port: int):
+    """在后台线程中启动uvicorn，返回服务器对象"""
+    import uvicorn
+    
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started:
+        if not thread.is_alive() or time.time() > deadline:
+            raise RuntimeError("uvicorn启动失败")
+        time.sleep(0.05)
+    return server, thread
+
+
+def _free_port() -> int:
+    """获取一个空闲端口"""
+    import socket
+    
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _run_over_http(base_url: str, load_test_args: Dict[str, Any], plan, sample_interval: float) -> Dict[str, Any]:
+    """通过HTTP请求已启动的服务执行负载测试"""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        return await LoadTest(client, **load_test_args).run(plan, sample_interval)
+
+
+def run_load_test(
+    mix: Dict[str, int],
+    arrival: str = "burst",
+    rate: float = 5.0,
+    target: str = "asgi",
+    stub: bool = False,
+    stub_timings: Optional[Dict[str, float]] = None,
+    poll_interval: float = 0.5,
+    sample_interval: float = 0.5,
+    timeout: float = 600,
+    unique: bool = True,
+    image_size: Tuple[int, int] = (1280, 960),
+    pdf_pages: int = 10,
+    audio_seconds: float = 30,
+    fixtures_dir: Optional[str] = None,
+    seed: int = 0,
+    rate_limit: bool = True
+) -> Dict[str, Any]:
+    """
+    执行负载测试
+    
+    Args:
+        mix: {请求类型: 数量}，请求类型见FLOWS
+        arrival: 到达方式，burst、uniform或poisson
+        rate: 每秒请求数
+        target: asgi在当前进程中直接调用应用；uvicorn在后台线程启动本地服务器；
+            以http开头时请求该地址上已运行的服务
+        stub: 是否用固定耗时的桩替换模型推理，只对asgi和uvicorn生效
+        stub_timings: 各服务桩的单次耗时（秒）
+        poll_interval: 异步任务的轮询间隔
+        sample_interval: 队列采样间隔
+        timeout: 单个请求从提交到结束的超时
+        unique: 是否使每个请求的内容不同
+        image_size: OCR图片尺寸
+        pdf_pages: PDF页数
+        audio_seconds: 音频时长
+        fixtures_dir: 素材目录
+        seed: 请求顺序和到达间隔的随机种子
+        rate_limit: 是否保留准入控制的客户端速率限制，所有请求来自同一客户端，
+            关闭后只有并发数和排队长度限制生效；只对asgi和uvicorn生效
+    
+    Returns:
+        测试结果
+    """
+    from contextlib import nullcontext
+    from backend.app.config import config
+    from benchmarks.stubs import stub_backends
+    
+    remote = target.startswith("http")
+    if remote and stub:
+        print("警告: 请求外部服务时桩后端不生效")
+    
+    fixtures_dir = fixtures_dir or os.path.join(config.paths["cache"], "benchmarks")
+    payloads = load_payloads(fixtures_dir, image_size, pdf_pages, audio_seconds)
+    plan = build_plan(mix, arrival, rate, seed)
+    load_test_args = {
+        "payloads": payloads,
+        "poll_interval": poll_interval,
+        "timeout": timeout,
+        "unique": unique
+    }
+    
+    print(f"负载测试: {len(plan)} 个请求，{arrival}，目标 {target}{'（桩后端）' if stub and not remote else ''}")
+    
+    timings = None
+    if remote:
+        result = asyncio.run(_run_over_http(target, load_test_args, plan, sample_interval))
+    else:
+        from backend.app.main import app
+        from backend.app.utils.cache import result_cache
+        
+        # 进程内运行时关闭结果缓存，负载测试的结果不写入缓存目录
+        cache_enabled, result_cache.enabled = result_cache.enabled, False
+        rate_limit_settings = config.admission.get("rate_limit")
+        if not rate_limit:
+            config.admission["rate_limit"] = {"requests_per_minute": 0}
+        try:
+            with (stub_backends(stub_timings) if stub else nullcontext()) as timings:
+                if target == "uvicorn":
+                    server, thread = _start_uvicorn(app, _free_port())
+                    try:
+                        base_url = f"http://127.0.0.1:{server.config.port}"
+                        result = asyncio.run(_run_over_http(base_url, load_test_args, plan, sample_interval))
+                    finally:
+                        server.should_exit = True
+                        thread.join()
+                else:
+                    result = asyncio.run(_run_in_process(app, load_test_args, plan, sample_interval))
+        finally:
+            result_cache.enabled = cache_enabled
+            config.admission["rate_limit"] = rate_limit_settings
+    
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "mix": mix,
+        "arrival": arrival,
+        "rate": rate if arrival != "burst" else None,
+        "target": target,
+        "stub_timings": timings,
+        "unique": unique,
+        **result
+    }
+
+
+def print_load_summary(report: Dict[str, Any]) -> None:
+    """打印负载测试汇总"""
+    print(f"总耗时 {report['wall_time']}s，请求到达窗口 {report['arrival_window']}s")
+    for name, item in report["summary"].items():
+        latency = item["latency"] or {}
+        print(
+            f"  {name:<10} 请求 {item['requests']:>4}  成功 {item['ok']:>4}  "
+            f"错误率 {item['error_rate']:.1%}  503 {item['rate_503']:.1%}  429 {item['rate_429']:.1%}  "
+            f"p50 {latency.get('p50', '-')}s  p95 {latency.get('p95', '-')}s  p99 {latency.get('p99', '-')}s"
+        )
+    for name, item in report["queues"].items():
+        print(
+            f"  队列 {name:<4} 最大排队 {item['max_queued']:g}  最大执行 {item['max_running']:g}  "
+            f"增长 {item['growth_per_second'] if item['growth_per_second'] is not None else '-'}/s"
+        )
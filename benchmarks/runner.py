@@ -0,0 +1,360 @@
+"""
+基准测试执行模块
+执行测试用例，统计吞吐量、延迟分位数和内存峰值，输出JSON报告并与基线比较
+"""
+import os
+import json
+import logging
+import time
+import shutil
+import tempfile
+import platform
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks.cases import BenchCase, MODES, SERVICES, prepare_fixtures, direct_cases, app_cases
+
+
+# 与基线比较的指标及方向：1表示越大越差，-1表示越小越差
+COMPARED_METRICS = (
+    ("latency.p50", 1),
+    ("latency.p95", 1),
+    ("throughput.units_per_second", -1),
+    ("peak_rss_bytes", 1)
+)
+
+
+def tree_rss() -> Optional[int]:
+    """
+    获取当前进程及其子进程的常驻内存之和（字节）
+    
+    PDF转换进程池和长音频转录进程都是子进程，需要psutil才能统计；
+    未安装psutil时只统计当前进程
+    """
+    try:
+        import psutil
+    except ImportError:
+        from backend.app.utils.metrics import process_rss
+        return process_rss()
+    
+    process = psutil.Process()
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+class PeakRssSampler:
+    """在后台线程中定时采样内存，记录峰值"""
+    
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _sample(self) -> None:
+        rss = tree_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def __enter__(self) -> "PeakRssSampler":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """线性插值计算分位数，q为0-100"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def run_case(case: BenchCase, repeat: int, warmup: int) -> Dict[str, Any]:
+    """
+    执行一个用例
+    
+    预热调用的耗时单独记为first_seconds（含引擎创建、进程池启动等冷启动开销），
+    不计入延迟分位数和吞吐量
+    
+    Args:
+        case: 测试用例
+        repeat: 计时调用次数
+        warmup: 预热调用次数
+    
+    Returns:
+        用例结果
+    """
+    result: Dict[str, Any] = {
+        "name": case.name,
+        "service": case.service,
+        "mode": case.mode,
+        "units": case.units,
+        "unit": case.unit
+    }
+    if case.skip_reason:
+        result["skipped"] = case.skip_reason
+        return result
+    
+    try:
+        with PeakRssSampler() as sampler:
+            first = None
+            for _ in range(warmup):
+                started = time.perf_counter()
+                case.run()
+                first = first if first is not None else time.perf_counter() - started
+            
+            durations = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                case.run()
+                durations.append(time.perf_counter() - started)
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    
+    total = sum(durations)
+    result.update({
+        "runs": repeat,
+        "first_seconds": round(first, 4) if first is not None else None,
+        "latency": {
+            "p50": round(percentile(durations, 50), 4),
+            "p95": round(percentile(durations, 95), 4),
+            "mean": round(total / repeat, 4),
+            "min": round(min(durations), 4),
+            "max": round(max(durations), 4)
+        },
+        "throughput": {
+            "requests_per_second": round(repeat / total, 4),
+            "units_per_second": round(case.units * repeat / total, 4)
+        },
+        "peak_rss_bytes": sampler.peak
+    })
+    return result
+
+
+def _environment() -> Dict[str, Any]:
+    """记录运行环境和影响结果的配置"""
+    from backend.app.config import config
+    
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "asr_model": config.asr.get("model_size"),
+        "ocr_profile": config.ocr.get("profile"),
+        "pdf_executor": config.pdf.get("executor"),
+        "scheduler_workers": config.scheduler.get("workers")
+    }
+
+
+def run_benchmarks(
+    suite: str = "quick",
+    modes: Sequence[str] = MODES,
+    services: Sequence[str] = SERVICES,
+    repeat: int = 3,
+    warmup: int = 1,
+    fixtures_dir: Optional[str] = None,
+    use_cache: bool = False
+) -> Dict[str, Any]:
+    """
+    执行测试集
+    
+    默认关闭结果缓存，否则重复调用只测到缓存命中。直接调用的用例先于
+    接口用例执行，接口用例结束时应用关闭会释放转换进程池等资源。
+    
+    Args:
+        suite: 测试集名，quick或full
+        modes: 调用方式，direct直接调用服务，app通过FastAPI接口
+        services: 测试的服务
+        repeat: 每个用例的计时调用次数
+        warmup: 每个用例的预热调用次数
+        fixtures_dir: 素材目录，默认为缓存目录下的benchmarks
+        use_cache: 是否保留结果缓存
+    
+    Returns:
+        测试报告
+    """
+    from backend.app.config import config
+    from backend.app.utils.cache import result_cache
+    
+    fixtures_dir = fixtures_dir or os.path.join(config.paths["cache"], "benchmarks")
+    print(f"正在准备素材: {fixtures_dir}")
+    prepared = prepare_fixtures(suite, fixtures_dir)
+    
+    result_cache.enabled = use_cache
+    work_dir = tempfile.mkdtemp(prefix="benchmark_", dir=config.paths["outputs"])
+    original_paths = dict(config.paths)
+    results: List[Dict[str, Any]] = []
+    
+    def execute(cases: List[BenchCase]) -> None:
+        for case in cases:
+            if case.service not in services:
+                continue
+            print(f"  {case.name} ...", end=" ", flush=True)
+            result = run_case(case, repeat, warmup)
+            results.append(result)
+            if "latency" in result:
+                print(f"p50 {result['latency']['p50']}s, {result['throughput']['units_per_second']} {case.unit}/s")
+            else:
+                print(result.get("skipped") or f"失败: {result.get('error')}")
+    
+    try:
+        if "direct" in modes:
+            print("直接调用服务:")
+            for name in services:
+                _load_service(name)
+            execute(direct_cases(prepared, work_dir))
+        
+        if "app" in modes:
+            from fastapi.testclient import TestClient
+            from backend.app.main import app
+            
+            # 每个请求一行的httpx日志会淹没结果输出
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+            
+            # 上传和输出目录指向临时目录，避免基准测试的文件混入正常数据
+            config.paths["uploads"] = os.path.join(work_dir, "uploads")
+            config.paths["outputs"] = os.path.join(work_dir, "outputs")
+            os.makedirs(config.paths["uploads"], exist_ok=True)
+            
+            print("通过FastAPI接口调用:")
+            with TestClient(app) as client:
+                for name in services:
+                    _load_service(name)
+                execute(app_cases(prepared, client, config.paths["outputs"]))
+    finally:
+        config.paths.update(original_paths)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "suite": suite,
+        "repeat": repeat,
+        "warmup": warmup,
+        "cache": use_cache,
+        "environment": _environment(),
+        "results": results
+    }
+
+
+def _load_service(name: str) -> None:
+    """计时前加载服务的模型或进程池，加载耗时不计入用例"""
+    from backend.app.services.asr_service import asr_service
+    from backend.app.services.ocr_service import ocr_service
+    from backend.app.services.pdf_service import pdf_service
+    
+    service = {"asr": asr_service, "ocr": ocr_service, "pdf": pdf_service}[name]
+    if service.is_available():
+        service.load()
+
+
+def _lookup(result: Dict[str, Any], path: str) -> Optional[float]:
+    """按点分隔路径读取结果中的指标"""
+    value: Any = result
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare_reports(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.2
+) -> List[Dict[str, Any]]:
+    """
+    与基线报告逐用例比较
+    
+    延迟和内存增加、吞吐量下降超过tolerance比例时记为退化；
+    只比较两份报告中都成功执行的用例
+    
+    Args:
+        current: 本次报告
+        baseline: 基线报告
+        tolerance: 允许的相对变化
+    
+    Returns:
+        [{name, metric, baseline, current, change, regression}, ...]
+    """
+    baseline_results = {result["name"]: result for result in baseline.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        base = baseline_results.get(result["name"])
+        if base is None:
+            continue
+        for metric, direction in COMPARED_METRICS:
+            old, new = _lookup(base, metric), _lookup(result, metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            rows.append({
+                "name": result["name"],
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": round(change, 4),
+                "regression": change * direction > tolerance
+            })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], tolerance: float) -> bool:
+    """
+    打印比较结果
+    
+    Returns:
+        是否存在退化
+    """
+    if not rows:
+        print("没有可比较的用例")
+        return False
+    
+    width = max(len(row["name"]) for row in rows)
+    for row in rows:
+        mark = "退化" if row["regression"] else ""
+        print(
+            f"{row['name']:<{width}}  {row['metric']:<28} "
+            f"{row['baseline']:>14} -> {row['current']:<14} {row['change']:+.1%} {mark}"
+        )
+    
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"{len(regressions)} 项指标退化超过 {tolerance:.0%}")
+    else:
+        print(f"全部指标变化在 {tolerance:.0%} 以内")
+    return bool(regressions)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    """读取JSON报告"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_report(report: Dict[str, Any], path: str) -> None:
+    """保存JSON报告"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已保存: {path}")
@@ -0,0 +1,144 @@
+"""
+桩后端模块
+用固定耗时的桩替换各服务的模型推理和文档转换，上传保存、调度排队、请求合并、
+任务状态和结果写出仍走真实代码，未安装模型的机器也能运行负载测试
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+# 各服务单次处理的默认耗时（秒）
+DEFAULT_TIMINGS = {"asr": 2.0, "ocr": 0.2, "pdf": 0.5}
+
+STUB_TEXT = "stub result"
+
+
+def _page_count(pdf_path: str) -> int:
+    """读取PDF页数，PyMuPDF不可用时按1页计"""
+    try:
+        import fitz
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    except Exception:
+        return 1
+
+
+def _run_pages(
+    seconds: float,
+    pdf_path: str,
+    output_path: str,
+    start_page: int,
+    end_page: Optional[int],
+    stage: str,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]]
+) -> Dict[str, Any]:
+    """耗时平均分到各页并逐页汇报进度，最后写出占位结果文件"""
+    from backend.app.utils.progress import PageProgress
+    
+    page_count = _page_count(pdf_path)
+    if end_page is None or end_page >= page_count:
+        end_page = page_count - 1
+    pages = max(end_page - start_page + 1, 1)
+    
+    progress = PageProgress(pages, {stage: 1.0}, progress_callback) if progress_callback else None
+    for page in range(start_page, start_page + pages):
+        time.sleep(seconds / pages)
+        if progress is not None:
+            progress.page_done(stage, page, seconds / pages)
+    
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(STUB_TEXT)
+    
+    return {
+        "output_path": output_path,
+        "page_count": page_count,
+        "converted_pages": pages,
+        "word_count": len(STUB_TEXT),
+        "duration": seconds
+    }
+
+
+@contextmanager
+def stub_backends(timings: Optional[Dict[str, float]] = None) -> Iterator[Dict[str, float]]:
+    """
+    在with语句内用桩替换各服务的处理函数
+    
+    替换的是各服务实例上的_transcribe、_recognize、_convert、_extract_text、
+    _ocr_convert，以及is_available和load，退出时恢复
+    
+    Args:
+        timings: 各服务单次处理的耗时（秒），未指定的使用DEFAULT_TIMINGS
+    
+    Yields:
+        实际使用的耗时配置
+    """
+    from backend.app.config import config
+    from backend.app.services.asr_service import asr_service
+    from backend.app.services.ocr_service import ocr_service
+    from backend.app.services.pdf_service import pdf_service
+    
+    timings = {**DEFAULT_TIMINGS, **(timings or {})}
+    
+    def transcribe(audio_path, language=None, task="transcribe", long_audio=None,
+                   progress_callback=None, model=None):
+        steps = 10
+        for step in range(steps):
+            time.sleep(timings["asr"] / steps)
+            if progress_callback is not None:
+                progress_callback((step + 1) / steps)
+        return {
+            "text": STUB_TEXT,
+            "language": language or config.asr.get("language", "zh"),
+            "segments": [{"start": 0.0, "end": 1.0, "text": STUB_TEXT}],
+            "duration": timings["asr"],
+            "model": asr_service.resolve_model(model)
+        }
+    
+    def recognize(prepared, language=None, profile=None):
+        time.sleep(timings["ocr"])
+        output = ocr_service._format_result([], timings["ocr"])
+        output["language"] = ocr_service.resolve_language(language)
+        output["profile"] = ocr_service.resolve_profile(profile)
+        output["models"] = ocr_service.resolve_models(language, profile)
+        output["preprocess"] = ocr_service._preprocess_info(prepared, 1)
+        return output
+    
+    def convert(pdf_path, output_path, start_page, end_page, dpi, progress_callback=None):
+        return _run_pages(timings["pdf"], pdf_path, output_path, start_page, end_page, "parse", progress_callback)
+    
+    def extract_text(pdf_path, output_path, start_page, end_page, progress_callback=None):
+        result = _run_pages(timings["pdf"], pdf_path, output_path, start_page, end_page, "text", progress_callback)
+        return {**result, "mode": "text"}
+    
+    def ocr_convert(pdf_path, output_path, start_page, end_page, language=None, profile=None,
+                    progress_callback=None):
+        result = _run_pages(timings["pdf"], pdf_path, output_path, start_page, end_page, "ocr", progress_callback)
+        return {
+            **result,
+            "mode": "ocr",
+            "ocr_pages": result["converted_pages"],
+            "language": ocr_service.resolve_language(language),
+            "profile": ocr_service.resolve_profile(profile),
+            "models": ocr_service.resolve_models(language, profile),
+            "pages": []
+        }
+    
+    patches = {
+        asr_service: {"_transcribe": transcribe},
+        ocr_service: {"_recognize": recognize},
+        pdf_service: {"_convert": convert, "_extract_text": extract_text, "_ocr_convert": ocr_convert}
+    }
+    for service, methods in patches.items():
+        methods.update({"is_available": lambda: True, "load": lambda: True})
+        for name, func in methods.items():
+            setattr(service, name, func)
+    
+    try:
+        yield timings
+    finally:
+        for service, methods in patches.items():
+            for name in methods:
+                delattr(service, name)
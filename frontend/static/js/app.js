@@ -150,6 +150,61 @@ async function uploadFile(url, formData) {
 }
 
 
+/**
+ * 订阅异步任务状态，服务端推送每次状态变化，任务结束后关闭连接
+ * @param {string} service - 服务名 (asr/ocr/pdf)
+ * @param {string} taskId - 任务ID
+ * @param {function} onProgress - 进度回调，参数为任务状态
+ * @returns {Promise} 任务完成时的状态
+ */
+function watchTask(service, taskId, onProgress) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`${API_BASE}/api/${service}/task/${taskId}/events`);
+        
+        source.addEventListener('task', (e) => {
+            const task = JSON.parse(e.data);
+            if (task.status === 'completed') {
+                source.close();
+                resolve(task);
+            } else if (task.status === 'failed') {
+                source.close();
+                reject(new Error(task.message || '任务失败'));
+            } else {
+                onProgress(task);
+            }
+        });
+        
+        source.addEventListener('error', (e) => {
+            if (e.data) {
+                source.close();
+                reject(new Error(JSON.parse(e.data).detail));
+            } else if (source.readyState === EventSource.CLOSED) {
+                reject(new Error('任务状态连接已断开'));
+            }
+        });
+    });
+}
+
+
+/**
+ * 生成任务进度文本
+ * @param {object} task - 任务状态
+ * @param {string} fallback - 没有状态说明时显示的文本
+ * @returns {string} 进度文本
+ */
+function taskProgressText(task, fallback) {
+    if (task.status === 'pending') {
+        return task.queue_position ? `排队中，前面还有 ${task.queue_position - 1} 个任务` : '排队中...';
+    }
+    
+    let text = task.message || fallback;
+    if (task.detail && task.detail.eta != null) {
+        text += `，预计还需 ${Math.ceil(task.detail.eta)} 秒`;
+    }
+    return text;
+}
+
+
 /**
  * 显示进度条
  * @param {string} type - 模块类型
@@ -224,15 +279,19 @@ async function handleAsrConvert() {
         formData.append('file', file);
         if (language) formData.append('language', language);
         
-        showProgress('asr', 0.5, '正在识别语音...');
+        const created = await uploadFile(`${API_BASE}/api/asr/transcribe/async`, formData);
+        
+        showProgress('asr', 0, '排队中...');
         
-        const result = await uploadFile(`${API_BASE}/api/asr/transcribe`, formData);
+        const task = await watchTask('asr', created.task_id, (state) => {
+            showProgress('asr', state.progress, taskProgressText(state, '正在识别语音...'));
+        });
         
         showProgress('asr', 1, '识别完成');
         
         setTimeout(() => {
             hideProgress('asr');
-            showResult('asr', result.data.text);
+            showResult('asr', task.result.text);
             showToast('语音识别完成');
         }, 500);
         
@@ -268,19 +327,23 @@ async function handlePdfConvert() {
         if (endPage) formData.append('end_page', endPage);
         formData.append('dpi', dpi);
         
-        showProgress('pdf', 0.5, '正在转换PDF...');
+        const created = await uploadFile(`${API_BASE}/api/pdf/convert/async`, formData);
+        
+        showProgress('pdf', 0, '排队中...');
         
-        const result = await uploadFile(`${API_BASE}/api/pdf/convert`, formData);
+        const task = await watchTask('pdf', created.task_id, (state) => {
+            showProgress('pdf', state.progress, taskProgressText(state, '正在转换PDF...'));
+        });
         
         showProgress('pdf', 1, '转换完成');
         
-        downloadUrls.pdf = result.data.output_path;
+        downloadUrls.pdf = task.result.output_path.split(/[\\/]/).pop();
         
         setTimeout(() => {
             hideProgress('pdf');
             const infoHtml = `
-                <p><strong>页数:</strong> ${result.data.page_count} 页</p>
-                <p><strong>字数:</strong> ${result.data.word_count} 字</p>
+                <p><strong>页数:</strong> ${task.result.page_count} 页</p>
+                <p><strong>字数:</strong> ${task.result.word_count} 字</p>
             `;
             showResult('pdf', infoHtml);
             showToast('PDF转换完成');